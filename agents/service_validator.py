@@ -1,58 +1,38 @@
 """
 Service validation agent for incident response workflows.
+
+By default one agent is configured per incident, with the incident baked
+into its name, instructions and environment. With ``shared_validator_agent``
+a single long-lived agent serves every incident. Its static configuration is
+built once per process and runner, and each conversation starts with a
+compact incident context message instead.
 """
 
-from typing import Any, Dict, List
+import threading
+from typing import Any, Dict, List, Tuple
 
 from core.config import IncidentConfig
-from tools.kubernetes_tools import KubernetesToolDefinitions
-from tools.workflow_tools import WorkflowRetriggerTool
-
-
-class ServiceValidationAgent:
-    """AI agent for validating Kubernetes service names and re-triggering workflows."""
-
-    def __init__(self, config: IncidentConfig):
-        """Initialize the service validation agent.
-
-        Args:
-            config: Incident configuration containing all necessary parameters
-        """
-        self.config = config
-        self.agent_name = f"incident-service-validator-{config.incident_id}"
-
-    def get_agent_tools(self) -> List[Dict[str, Any]]:
-        """Get all tools for the service validation agent."""
-        k8s_tools = KubernetesToolDefinitions.get_all_tools()
-        workflow_tool = WorkflowRetriggerTool.create_retrigger_tool()
-
-        return k8s_tools + [workflow_tool]
-
-    def get_agent_config(self) -> Dict[str, Any]:
-        """Generate complete agent configuration."""
-        return {
-            "name": self.agent_name,
-            "description": f"AI agent for validating Kubernetes service names and re-triggering incident workflow {self.config.incident_id}",
-            "instructions": self._get_agent_instructions(),
-            "tools": self.get_agent_tools(),
-            "model": "claude-3-5-sonnet-20241022",
-            "runner": self.config.runner,
-            "secrets": ["KUBIYA_API_KEY"],
-            "env_vars": self._get_agent_env_vars(),
-            "conversation_starters": self._get_conversation_starters(),
-        }
+from tools.kubernetes_tools import (
+    CLUSTER_CACHE_URL,
+    TOOL_SERVER_URL,
+    KubernetesToolDefinitions,
+)
+from tools.workflow_tools import RETRIGGER_SECRET_ENV, WorkflowRetriggerTool
+from utils.slack_blocks import MAX_BUTTON_VALUE
+from workflows.incident_response import IncidentResponseWorkflow
+from workflows.prompt_layout import PromptLayout, incident_block
 
-    def _get_agent_instructions(self) -> str:
-        """Get detailed instructions for the service validation agent."""
-        return f"""
-You are an expert incident response agent specialized in validating Kubernetes service names and re-triggering workflows.
+SHARED_AGENT_NAME = "incident-service-validator"
+AGENT_MODEL = "claude-3-5-sonnet-20241022"
 
-**INCIDENT CONTEXT:**
-- Incident ID: {self.config.incident_id}
-- Title: {self.config.incident_title}
-- Severity: {self.config.incident_severity}
-- Description: {self.config.incident_body}
+_INTRO = (
+    "You are an expert incident response agent specialized in validating Kubernetes "
+    "service names and re-triggering workflows."
+)
 
+# Incident-independent part of the agent instructions; the incident context
+# follows it so the whole block stays a cacheable prompt prefix
+_INSTRUCTIONS = """
 **YOUR RESPONSIBILITIES:**
 1. **Service Discovery**: Help users discover available Kubernetes services in the cluster
 2. **Service Validation**: Validate that provided service names exist in the cluster
@@ -83,6 +63,16 @@ You are an expert incident response agent specialized in validating Kubernetes s
 - Helps identify related services or infrastructure issues
 - Use when users need broader cluster context
 
+**kubectl_cluster_snapshot:**
+- Prefer this over kubectl_cluster_investigation on large clusters
+- Fetches nodes, pods, services and events in one parallel snapshot and summarizes anomalies
+- Pass the affected services to get per-service pod health
+
+**kubectl_log_sample:**
+- Use this instead of dumping raw logs with kubectl logs
+- Samples the affected services' pods in parallel with byte caps and returns error signatures with counts
+- Pass the affected services; signatures point to the pods worth inspecting further
+
 **helm_deployments_check:**
 - Use this to check recent deployments that might be related to the incident
 - Helpful for understanding recent changes that could cause issues
@@ -91,6 +81,7 @@ You are an expert incident response agent specialized in validating Kubernetes s
 - Use this ONLY after validating service names
 - Requires the `validated_service_name` parameter
 - This creates a new focused incident workflow
+- Repeating it for the same incident and services does not start another workflow; it reports a duplicate
 
 **EXAMPLE INTERACTION:**
 User: "I think the service is called user-api but I'm not sure"
@@ -117,7 +108,194 @@ User: "I think the service is called user-api but I'm not sure"
 - Explain what the re-trigger will do before executing it
 
 Be helpful, accurate, and always prioritize getting the correct service information before proceeding with workflow re-triggers.
+"""
+
+_SHARED_INSTRUCTIONS = f"""
+{_INTRO}
+
+**INCIDENT CONTEXT:**
+You serve every incident. Each conversation starts with an INCIDENT CONTEXT line
+(id, title, severity, url, slack_channel, parent_execution, body). Work only on
+that incident, and take the workflow_retrigger incident parameters (INCIDENT_ID,
+INCIDENT_TITLE, INCIDENT_SEVERITY, INCIDENT_URL, SLACK_CHANNEL_ID,
+PARENT_EXECUTION_ID, INCIDENT_BODY) from it. The body is last and may be cut
+short; pass it as it is.
+""" + _INSTRUCTIONS
+
+_tools: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+_shared_configs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_shared_lock = threading.Lock()
+
+
+def validator_secrets() -> List[str]:
+    """Get the secrets the validator tools read, with the tool server and cache shared secret."""
+    if TOOL_SERVER_URL or CLUSTER_CACHE_URL:
+        return ["KUBIYA_API_KEY", RETRIGGER_SECRET_ENV]
+    return ["KUBIYA_API_KEY"]
+
+
+def validator_tools(config: IncidentConfig) -> List[Dict[str, Any]]:
+    """Get the validator tool list of a runner, built once per process.
+
+    The tool definitions do not depend on the incident, so every agent
+    configuration of a runner and Slack token secret shares one list. Treat it
+    as read-only.
+    """
+    key = (config.runner, config.slack_token_secret)
+    with _shared_lock:
+        tools = _tools.get(key)
+        if tools is None:
+            # The re-trigger workflow only takes incident values from the tool's parameters
+            retrigger = IncidentResponseWorkflow(config).create_retrigger_workflow().to_dict()
+            tools = _tools[key] = KubernetesToolDefinitions.get_all_tools() + [
+                WorkflowRetriggerTool.create_retrigger_tool(
+                    retrigger, config.runner, config.slack_token_secret
+                )
+            ]
+        return tools
+
+
+def shared_agent_config(config: IncidentConfig) -> Dict[str, Any]:
+    """Get the configuration of the long-lived validator agent of a runner.
+
+    Built on first use and reused for every incident afterwards. Treat it as read-only.
+
+    Args:
+        config: Configuration providing the runner the agent executes its tools on
+            and the Slack token secret
+
+    Returns:
+        Agent configuration without any incident-specific content
+    """
+    runner = config.runner
+    tools = validator_tools(config)
+    key = (runner, config.slack_token_secret)
+    with _shared_lock:
+        agent_config = _shared_configs.get(key)
+        if agent_config is None:
+            agent_config = _shared_configs[key] = {
+                "name": SHARED_AGENT_NAME,
+                "description": "AI agent for validating Kubernetes service names and re-triggering incident workflows",
+                "instructions": _SHARED_INSTRUCTIONS,
+                "tools": tools,
+                "model": AGENT_MODEL,
+                "runner": runner,
+                "secrets": validator_secrets(),
+                "env_vars": {
+                    "KUBIYA_USER_EMAIL": "${KUBIYA_USER_EMAIL}",
+                    "KUBIYA_USER_ORG": "${KUBIYA_USER_ORG}",
+                },
+                "conversation_starters": [
+                    "Show me all available services in the cluster",
+                    "Help me find the correct service name for an incident",
+                    "I'm not sure of the exact service name, can you help me find it?",
+                ],
+            }
+        return agent_config
+
+
+def conversation_context(
+    incident_id: str,
+    incident_title: str,
+    incident_severity: str,
+    incident_url: str,
+    slack_channel_id: str,
+    parent_execution_id: str,
+    incident_body: str,
+) -> str:
+    """Get the incident context message that opens a conversation with the shared agent.
+
+    Values may be workflow references such as ``${incident_id}``, resolved when
+    the message is sent. The body comes last, so clipping the message to a size
+    limit only shortens the body.
+    """
+    return (
+        f"Help me find and validate the affected services for incident {incident_id}. "
+        f"INCIDENT CONTEXT: id={incident_id}; title={incident_title}; severity={incident_severity}; "
+        f"url={incident_url}; slack_channel={slack_channel_id}; parent_execution={parent_execution_id}; "
+        f"body={incident_body}"
+    )
+
+
+class ServiceValidationAgent:
+    """AI agent for validating Kubernetes service names and re-triggering workflows."""
+
+    def __init__(self, config: IncidentConfig):
+        """Initialize the service validation agent.
+
+        Args:
+            config: Incident configuration containing all necessary parameters
         """
+        self.config = config
+        self.shared = config.shared_validator_agent
+        self.agent_name = (
+            SHARED_AGENT_NAME if self.shared else f"incident-service-validator-{config.incident_id}"
+        )
+
+    def get_agent_tools(self) -> List[Dict[str, Any]]:
+        """Get all tools for the service validation agent."""
+        return list(validator_tools(self.config))
+
+    def get_agent_config(self) -> Dict[str, Any]:
+        """Generate complete agent configuration.
+
+        In shared mode this is the memoized configuration of the long-lived agent;
+        start each conversation with ``get_conversation_context``.
+        """
+        if self.shared:
+            return shared_agent_config(self.config)
+        return {
+            "name": self.agent_name,
+            "description": f"AI agent for validating Kubernetes service names and re-triggering incident workflow {self.config.incident_id}",
+            "instructions": self._get_agent_instructions(),
+            "tools": self.get_agent_tools(),
+            "model": AGENT_MODEL,
+            "runner": self.config.runner,
+            "secrets": validator_secrets(),
+            "env_vars": self._get_agent_env_vars(),
+            "conversation_starters": self._get_conversation_starters(),
+        }
+
+    def get_conversation_context(self) -> str:
+        """Get the incident context message that opens a conversation with the shared agent.
+
+        The message is one line of at most ``MAX_BUTTON_VALUE`` bytes, like the
+        one the Slack "Validate Services" button sends.
+        """
+        context = conversation_context(
+            self.config.incident_id,
+            self.config.incident_title,
+            self.config.incident_severity,
+            self.config.incident_url,
+            self.config.slack_channel_id,
+            self.config.execution_id,
+            " ".join(self.config.incident_body.split()),
+        )
+        return context.encode()[:MAX_BUTTON_VALUE].decode(errors="ignore")
+
+    def get_instructions_layout(self) -> PromptLayout:
+        """Get the agent prompt as static instructions followed by the incident context.
+
+        In shared mode the incident context is the conversation's first message.
+        """
+        if self.shared:
+            return PromptLayout(
+                "service_validator_agent", _SHARED_INSTRUCTIONS, self.get_conversation_context()
+            )
+        context = incident_block(
+            [
+                ("Incident ID", self.config.incident_id),
+                ("Title", self.config.incident_title),
+                ("Severity", self.config.incident_severity),
+                ("Description", self.config.incident_body),
+            ],
+            heading="INCIDENT CONTEXT",
+        )
+        return PromptLayout("service_validator_agent", f"\n{_INTRO}\n{_INSTRUCTIONS}", context)
+
+    def _get_agent_instructions(self) -> str:
+        """Get detailed instructions for the service validation agent."""
+        return self.get_instructions_layout().render()
 
     def _get_agent_env_vars(self) -> Dict[str, str]:
         """Get environment variables for the agent."""
@@ -128,6 +306,7 @@ Be helpful, accurate, and always prioritize getting the correct service informat
             "INCIDENT_BODY": self.config.incident_body,
             "INCIDENT_URL": self.config.incident_url,
             "SLACK_CHANNEL_ID": self.config.slack_channel_id,
+            "PARENT_EXECUTION_ID": self.config.execution_id,
             "KUBIYA_USER_EMAIL": self.config.kubiya_user_email or "${KUBIYA_USER_EMAIL}",
             "KUBIYA_USER_ORG": self.config.kubiya_user_org or "${KUBIYA_USER_ORG}",
         }
@@ -5,10 +5,22 @@ Command-line interface for Kubiya Incident Response Workflow.
 
 import argparse
 import json
+import os
 import sys
 
 from core.config import IncidentConfig
+from core.retrigger import RetriggerRelay
 from core.workflow import IncidentWorkflow
+from tools.cluster_cache import ClusterStateCache, serve
+from tools.kube_client import KubeClient
+from tools.kubernetes_tools import TOOLBOX_IMAGE, TOOLBOX_IMAGE_ENV
+from tools.service_matcher import benchmark_match
+from tools.tool_benchmark import RUNTIMES, benchmark_tools, format_benchmark
+from tools.tool_runtime import PythonToolRuntime, serve as serve_tools
+from tools.workflow_tools import RETRIGGER_SECRET_ENV
+from utils.slack_templates import benchmark_render
+from workflows.prompt_layout import format_prompt_report, prompt_report
+from workflows.step_library import payload_report
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -32,6 +44,22 @@ Examples:
 
   # Test workflow configuration
   kubiya-incident validate --incident-id INC-123 --title "Test" --severity medium
+
+  # Report serialized payload size per step
+  kubiya-incident payload-report --severity critical --format json
+
+  # Report prompt token counts and prefix-cache eligibility
+  kubiya-incident prompt-report --format json
+
+  # Benchmark Slack template rendering
+  kubiya-incident template-benchmark --iterations 50000
+  kubiya-incident match-benchmark --services 50000
+
+  # Benchmark the Kubernetes tools against a fake cluster
+  kubiya-incident tool-benchmark --pods 10000 --services 50000 --latency-ms 5
+
+  # Serve investigation queries from a watch-based cluster cache
+  kubiya-incident cluster-cache --port 8787
 """,
     )
 
@@ -59,6 +87,11 @@ Examples:
     execute_parser.add_argument("--body", help="Incident description")
     execute_parser.add_argument("--url", help="Incident dashboard URL")
     execute_parser.add_argument("--channel", help="Slack channel ID")
+    execute_parser.add_argument(
+        "--digest-below",
+        choices=["critical", "high", "medium"],
+        help="Batch alerts below this severity into a channel digest",
+    )
     execute_parser.add_argument("--stream", action="store_true", help="Stream execution output")
 
     # Export command
@@ -90,6 +123,11 @@ Examples:
     )
     agent_parser.add_argument("--body", help="Incident description")
     agent_parser.add_argument("--output", help="Output file for agent config")
+    agent_parser.add_argument(
+        "--shared",
+        action="store_true",
+        help="Export the long-lived validator agent shared by all incidents",
+    )
 
     # Validate command
     validate_parser = subparsers.add_parser("validate", help="Validate workflow configuration")
@@ -103,6 +141,119 @@ Examples:
     )
     validate_parser.add_argument("--services", help="Comma-separated list of affected services")
 
+    # Payload report command
+    report_parser = subparsers.add_parser(
+        "payload-report", help="Report serialized workflow payload size per step"
+    )
+    report_parser.add_argument(
+        "--format", choices=["table", "json"], default="table", help="Report format"
+    )
+    report_parser.add_argument("--output", help="Output file path (default: stdout)")
+    report_parser.add_argument(
+        "--severity",
+        default="medium",
+        choices=["critical", "high", "medium", "low"],
+        help="Template severity",
+    )
+
+    # Prompt report command
+    prompt_parser = subparsers.add_parser(
+        "prompt-report", help="Report prompt token counts and prefix-cache eligibility"
+    )
+    prompt_parser.add_argument(
+        "--format", choices=["table", "json"], default="table", help="Report format"
+    )
+    prompt_parser.add_argument("--output", help="Output file path (default: stdout)")
+    prompt_parser.add_argument(
+        "--severity",
+        default="medium",
+        choices=["critical", "high", "medium", "low"],
+        help="Template severity",
+    )
+    prompt_parser.add_argument(
+        "--shared", action="store_true", help="Report the shared validator agent prompt"
+    )
+
+    # Template benchmark command
+    benchmark_parser = subparsers.add_parser(
+        "template-benchmark", help="Benchmark Slack Block Kit template rendering"
+    )
+    benchmark_parser.add_argument(
+        "--iterations", type=int, default=10000, help="Renders per template"
+    )
+    benchmark_parser.add_argument(
+        "--format", choices=["table", "json"], default="table", help="Report format"
+    )
+
+    # Service matcher benchmark command
+    match_parser = subparsers.add_parser(
+        "match-benchmark", help="Benchmark fuzzy service-name matching"
+    )
+    match_parser.add_argument(
+        "--services", type=int, default=50000, help="Synthetic services in the index"
+    )
+    match_parser.add_argument("--queries", type=int, default=1000, help="Misspelled queries")
+
+    # Kubernetes tool benchmark command
+    tool_bench_parser = subparsers.add_parser(
+        "tool-benchmark", help="Benchmark the Kubernetes tools against a fake API server"
+    )
+    tool_bench_parser.add_argument(
+        "--nodes", type=int, default=50, help="Nodes in the fake cluster"
+    )
+    tool_bench_parser.add_argument(
+        "--pods", type=int, default=10000, help="Pods in the fake cluster"
+    )
+    tool_bench_parser.add_argument(
+        "--services", type=int, default=2000, help="Services in the fake cluster"
+    )
+    tool_bench_parser.add_argument(
+        "--events", type=int, default=20000, help="Events in the fake cluster"
+    )
+    tool_bench_parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Latency added to every API request"
+    )
+    tool_bench_parser.add_argument("--runs", type=int, default=2, help="Runs per tool")
+    tool_bench_parser.add_argument(
+        "--tool", action="append", help="Only benchmark this tool (repeatable)"
+    )
+    tool_bench_parser.add_argument(
+        "--runtime",
+        choices=RUNTIMES,
+        default="container",
+        help="Run the Python-backed tools as scripts or in-process",
+    )
+    tool_bench_parser.add_argument(
+        "--format", choices=["table", "json"], default="table", help="Report format"
+    )
+
+    # Cluster state cache command
+    cache_parser = subparsers.add_parser(
+        "cluster-cache", help="Serve investigation queries from a watch-based cluster cache"
+    )
+    cache_parser.add_argument(
+        "--host", default="127.0.0.1", help="Bind address (0.0.0.0 to serve other hosts)"
+    )
+    cache_parser.add_argument("--port", type=int, default=8787, help="Bind port")
+    cache_parser.add_argument(
+        "--event-retention", type=int, default=6 * 3600, help="Seconds events are retained"
+    )
+    cache_parser.add_argument(
+        "--max-events", type=int, default=50000, help="Maximum events retained"
+    )
+
+    # In-process tool server command
+    tool_server_parser = subparsers.add_parser(
+        "tool-server", help="Serve the Python-backed Kubernetes tools in-process over HTTP"
+    )
+    tool_server_parser.add_argument(
+        "--host", default="127.0.0.1", help="Bind address (0.0.0.0 to serve other hosts)"
+    )
+    tool_server_parser.add_argument("--port", type=int, default=8788, help="Bind port")
+    tool_server_parser.add_argument(
+        "--runner", help="Runner for workflows re-triggered through /retrigger"
+    )
+
     return parser
 
 
@@ -124,6 +275,8 @@ def execute_workflow(args) -> int:
 
         if args.services:
             config_dict["affected_services"] = args.services
+        if args.digest_below:
+            config_dict["digest_below"] = args.digest_below
 
         config = IncidentConfig(**config_dict)
         incident = IncidentWorkflow(config)
@@ -206,6 +359,7 @@ def create_agent(args) -> int:
             "incident_severity": args.severity,
             "incident_body": args.body or f"Incident: {args.title}",
             "incident_url": "https://example.com/incidents/agent-test",
+            "shared_validator_agent": args.shared,
         }
 
         config = IncidentConfig(**config_dict)
@@ -213,6 +367,12 @@ def create_agent(args) -> int:
 
         agent_config = incident.create_service_validation_agent()
         output = json.dumps(agent_config, indent=2)
+        if not TOOLBOX_IMAGE:
+            print(
+                f"⚠️ {TOOLBOX_IMAGE_ENV} is not set; the agent's container tools have no image "
+                "and fail to run until it is set and the agent is exported again",
+                file=sys.stderr,
+            )
 
         if args.output:
             with open(args.output, "w") as f:
@@ -266,6 +426,208 @@ def validate_config(args) -> int:
         return 1
 
 
+def report_payload(args) -> int:
+    """Report serialized workflow payload size per step."""
+    try:
+        config = IncidentConfig(
+            incident_id="TEMPLATE",
+            incident_title="Template Incident",
+            incident_severity=args.severity,
+            incident_body="Template incident: payload report",
+            incident_url="https://example.com/incidents/template",
+        )
+        incident = IncidentWorkflow(config)
+        report = payload_report(incident.to_dict())
+
+        if args.format == "json":
+            output = json.dumps(report, indent=2)
+        else:
+            lines = [f"{'STEP':<45} {'COMMAND':>10} {'MESSAGE':>10} {'TOTAL':>10}"]
+            for row in report:
+                lines.append(
+                    f"{row['step']:<45} {row['command_bytes']:>10} "
+                    f"{row['message_bytes']:>10} {row['total_bytes']:>10}"
+                )
+            output = "\n".join(lines)
+
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(output)
+            print(f"✅ Payload report written to {args.output}")
+        else:
+            print(output)
+
+        return 0
+
+    except Exception as e:
+        print(f"❌ Error creating payload report: {str(e)}")
+        return 1
+
+
+def report_prompts(args) -> int:
+    """Report prompt token counts and prefix-cache eligibility."""
+    try:
+        config = IncidentConfig(
+            incident_id="TEMPLATE",
+            incident_title="Template Incident",
+            incident_severity=args.severity,
+            incident_body="Template incident: prompt report",
+            incident_url="https://example.com/incidents/template",
+            shared_validator_agent=args.shared,
+        )
+        incident = IncidentWorkflow(config)
+        report = prompt_report(
+            incident.workflow_impl.get_prompt_layouts()
+            + [incident.service_agent.get_instructions_layout()]
+        )
+
+        if args.format == "json":
+            output = json.dumps(report, indent=2)
+        else:
+            output = format_prompt_report(report)
+
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(output)
+            print(f"✅ Prompt report written to {args.output}")
+        else:
+            print(output)
+
+        return 0
+
+    except Exception as e:
+        print(f"❌ Error creating prompt report: {str(e)}")
+        return 1
+
+
+def benchmark_templates(args) -> int:
+    """Benchmark Slack Block Kit template rendering."""
+    try:
+        results = benchmark_render(args.iterations)
+
+        if args.format == "json":
+            print(json.dumps(results, indent=2))
+        else:
+            print(f"{'TEMPLATE':<30} {'BYTES':>8} {'RENDERS/SEC':>12}")
+            for row in results:
+                print(
+                    f"{row['template']:<30} {row['payload_bytes']:>8} "
+                    f"{row['renders_per_second']:>12}"
+                )
+
+        return 0
+
+    except Exception as e:
+        print(f"❌ Error benchmarking templates: {str(e)}")
+        return 1
+
+
+def benchmark_matcher(args) -> int:
+    """Benchmark fuzzy service-name matching."""
+    try:
+        results = benchmark_match(args.services, args.queries)
+        for key, value in results.items():
+            print(f"{key:<16} {value}")
+        return 0
+
+    except Exception as e:
+        print(f"❌ Error benchmarking service matching: {str(e)}")
+        return 1
+
+
+def benchmark_kubernetes_tools(args) -> int:
+    """Benchmark the Kubernetes tools against a fake API server."""
+    try:
+        print("🧪 Generating fake cluster and running tools...", file=sys.stderr)
+        report = benchmark_tools(
+            nodes=args.nodes,
+            pods=args.pods,
+            services=args.services,
+            events=args.events,
+            latency=args.latency_ms / 1000,
+            runs=args.runs,
+            tools=args.tool,
+            runtime=args.runtime,
+        )
+        if args.format == "json":
+            print(json.dumps(report, indent=2))
+        else:
+            print(format_benchmark(report))
+        return 1 if any(run["status"] == "failed" for run in report["runs"]) else 0
+
+    except Exception as e:
+        print(f"❌ Error benchmarking tools: {str(e)}")
+        return 1
+
+
+def serve_cluster_cache(args) -> int:
+    """Run the watch-based cluster state cache until interrupted."""
+    secret = os.getenv(RETRIGGER_SECRET_ENV, "")
+    if not secret:
+        print(
+            f"❌ {RETRIGGER_SECRET_ENV} is not set; cache queries must present it as a bearer token"
+        )
+        return 1
+    try:
+        print("🛰️ Listing and watching the cluster...")
+        cache = ClusterStateCache(
+            KubeClient.from_env(), event_retention=args.event_retention, max_events=args.max_events
+        ).start()
+        server = serve(cache, secret, args.host, args.port)
+        print(f"✅ Serving /summary, /events, /pods and /healthz on http://{args.host}:{args.port}")
+        print(f"💡 Point the tools at it with INCIDENT_CLUSTER_CACHE_URL=http://<host>:{args.port}")
+    except Exception as e:
+        print(f"❌ Error starting cluster cache: {str(e)}")
+        return 1
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Stopping cluster cache")
+    finally:
+        cache.stop()
+        server.server_close()
+    return 0
+
+
+def serve_tool_runtime(args) -> int:
+    """Run the in-process tool server until interrupted."""
+    secret = os.getenv(RETRIGGER_SECRET_ENV, "")
+    if not secret:
+        print(f"❌ {RETRIGGER_SECRET_ENV} is not set; tool calls must present it as a bearer token")
+        return 1
+    try:
+        print("🐍 Loading the Python tool modules...")
+        runtime = PythonToolRuntime().load()
+        routes = {}
+        config = IncidentConfig.from_env(**({"runner": args.runner} if args.runner else {}))
+        if config.kubiya_api_key:
+            routes["/retrigger"] = RetriggerRelay(config, secret).route
+        server = serve_tools(runtime, secret, args.host, args.port, routes)
+        print(
+            f"✅ Serving {len(runtime.tools)} tools on http://{args.host}:{args.port}/tools/<name>"
+        )
+        if routes:
+            print(
+                f"🔁 Re-trigger relay on http://{args.host}:{args.port}/retrigger "
+                f"(runner {config.runner})"
+            )
+        else:
+            print("⚠️ KUBIYA_API_KEY not set - re-trigger relay disabled")
+        print(f"💡 Point the agents at it with INCIDENT_TOOL_SERVER_URL=http://<host>:{args.port}")
+    except Exception as e:
+        print(f"❌ Error starting tool server: {str(e)}")
+        return 1
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Stopping tool server")
+    finally:
+        server.server_close()
+    return 0
+
+
 def main() -> int:
     """Main CLI entry point."""
     parser = create_parser()
@@ -284,6 +646,20 @@ def main() -> int:
         return create_agent(args)
     elif args.command == "validate":
         return validate_config(args)
+    elif args.command == "payload-report":
+        return report_payload(args)
+    elif args.command == "prompt-report":
+        return report_prompts(args)
+    elif args.command == "template-benchmark":
+        return benchmark_templates(args)
+    elif args.command == "match-benchmark":
+        return benchmark_matcher(args)
+    elif args.command == "tool-benchmark":
+        return benchmark_kubernetes_tools(args)
+    elif args.command == "cluster-cache":
+        return serve_cluster_cache(args)
+    elif args.command == "tool-server":
+        return serve_tool_runtime(args)
     else:
         print(f"❌ Unknown command: {args.command}")
         return 1
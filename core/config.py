@@ -3,6 +3,7 @@ Configuration management for incident response workflows.
 """
 
 import os
+import uuid
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
@@ -18,6 +19,23 @@ class IncidentSeverity(str, Enum):
     LOW = "low"
 
 
+# End-to-end response deadlines in seconds, from alert to posted results
+SEVERITY_DEADLINES = {
+    IncidentSeverity.CRITICAL: 300,
+    IncidentSeverity.HIGH: 900,
+    IncidentSeverity.MEDIUM: 1800,
+    IncidentSeverity.LOW: 3600,
+}
+
+# Severities from least to most urgent
+SEVERITY_ORDER = [
+    IncidentSeverity.LOW,
+    IncidentSeverity.MEDIUM,
+    IncidentSeverity.HIGH,
+    IncidentSeverity.CRITICAL,
+]
+
+
 class IncidentPriority(str, Enum):
     """Incident priority levels."""
 
@@ -56,17 +74,63 @@ class IncidentConfig(BaseModel):
     )
     notification_channels: str = Field("#alerts", description="Additional notification channels")
     escalation_channel: str = Field("#incident-escalation", description="Escalation channel")
+    slack_fold_window: int = Field(
+        15, description="Seconds during which lifecycle stage updates are folded into one"
+    )
+    digest_below: Optional[IncidentSeverity] = Field(
+        None, description="Alerts below this severity are batched into channel digests"
+    )
+    digest_window: int = Field(
+        300, description="Seconds the oldest digest entry waits before the digest is sent"
+    )
+    digest_max_items: int = Field(10, description="Digest entries that trigger an immediate send")
 
     # Workflow settings
     investigation_timeout: int = Field(600, description="AI investigation timeout in seconds")
     max_retries: int = Field(3, description="Maximum retry attempts")
+    incident_deadline: Optional[int] = Field(
+        None, description="End-to-end deadline in seconds (defaults by severity)"
+    )
     investigation_agent: str = Field("test-workflow", description="AI agent name for investigation")
 
+    # Output budgets for step results interpolated into downstream steps
+    output_budgets: Dict[str, int] = Field(
+        default_factory=lambda: {"kubernetes_cluster_health_results": 16384},
+        description="Per-output byte budgets; oversized outputs are stored as artifacts and digested",
+    )
+    artifact_dir: str = Field(
+        "/tmp/incident-artifacts", description="Directory for full copies of oversized outputs"
+    )
+
+    # Execution tracking for re-triggers
+    execution_id: str = Field(
+        default_factory=lambda: uuid.uuid4().hex[:16],
+        description="Identifier of this workflow execution",
+    )
+    parent_execution_id: Optional[str] = Field(
+        None, description="Execution this run was re-triggered from; fresh outputs are reused"
+    )
+
     # Environment configuration
     kubiya_api_key: Optional[str] = Field(None, description="Kubiya API key")
     kubiya_user_email: Optional[str] = Field(None, description="Kubiya user email")
     kubiya_user_org: Optional[str] = Field(None, description="Kubiya user organization")
+    slack_token_secret: str = Field(
+        "SLACK_BOT_TOKEN",
+        description="Kubiya secret holding the Slack bot token; the runner injects it into the "
+        "setup step, which fetches the token from the integration API when it is absent",
+    )
     runner: str = Field("gke-integration", description="Workflow runner")
+    shared_validator_agent: bool = Field(
+        False,
+        description="Use one long-lived service validation agent for all incidents, "
+        "with the incident context passed per conversation",
+    )
+    service_prevalidation: bool = Field(
+        True,
+        description="Resolve affected services against the service inventory before the workflow "
+        "falls back to the validation agent",
+    )
 
     class Config:
         """Pydantic configuration."""
@@ -102,6 +166,34 @@ class IncidentConfig(BaseModel):
             return os.getenv("KUBIYA_USER_ORG", "default")
         return v
 
+    def get_deadline(self) -> int:
+        """Get the end-to-end deadline for this incident in seconds."""
+        if self.incident_deadline:
+            return self.incident_deadline
+        return SEVERITY_DEADLINES[IncidentSeverity(self.incident_severity)]
+
+    def is_digested(self) -> bool:
+        """Check whether the alert for this incident is batched into a digest."""
+        if not self.digest_below:
+            return False
+        severity = SEVERITY_ORDER.index(IncidentSeverity(self.incident_severity))
+        return severity < SEVERITY_ORDER.index(IncidentSeverity(self.digest_below))
+
+    def get_alert_channels(self) -> List[str]:
+        """Get the channels the incident alert fans out to.
+
+        The primary channel always receives the alert. High and critical
+        incidents also go to the notification channels, and critical incidents
+        to the escalation channel.
+        """
+        channels = [self.slack_channel_id]
+        severity = IncidentSeverity(self.incident_severity)
+        if severity in (IncidentSeverity.CRITICAL, IncidentSeverity.HIGH):
+            channels.extend(c.strip() for c in self.notification_channels.split(","))
+        if severity == IncidentSeverity.CRITICAL:
+            channels.append(self.escalation_channel)
+        return list(dict.fromkeys(c for c in channels if c))
+
     def to_workflow_params(self) -> Dict[str, Any]:
         """Convert config to workflow parameters."""
         return {
@@ -116,11 +208,15 @@ class IncidentConfig(BaseModel):
             "slack_channel_id": self.slack_channel_id,
             "notification_channels": self.notification_channels,
             "escalation_channel": self.escalation_channel,
+            "alert_channels": ",".join(self.get_alert_channels()),
             "investigation_timeout": str(self.investigation_timeout),
             "max_retries": str(self.max_retries),
+            "incident_deadline": str(self.get_deadline()),
             "investigation_agent": self.investigation_agent,
             "customer_impact": self.customer_impact,
             "affected_services": self.affected_services or "",
+            "execution_id": self.execution_id,
+            "parent_execution_id": self.parent_execution_id or "",
         }
 
     def to_workflow_env(self) -> Dict[str, str]:
@@ -149,6 +245,12 @@ class IncidentConfig(BaseModel):
             "incident_url": os.getenv("INCIDENT_URL", "https://monitoring.company.com"),
             "slack_channel_id": os.getenv("SLACK_CHANNEL_ID", "#incidents"),
             "affected_services": os.getenv("AFFECTED_SERVICES"),
+            "digest_below": os.getenv("INCIDENT_DIGEST_BELOW") or None,
+            "slack_token_secret": os.getenv("INCIDENT_SLACK_TOKEN_SECRET", "SLACK_BOT_TOKEN"),
+            "shared_validator_agent": os.getenv("INCIDENT_SHARED_VALIDATOR", "").lower()
+            in ("1", "true", "yes"),
+            "service_prevalidation": os.getenv("INCIDENT_SERVICE_PREVALIDATION", "true").lower()
+            not in ("0", "false", "no"),
         }
         env_data.update(overrides)
         return cls(**env_data)
@@ -0,0 +1,149 @@
+"""
+Re-trigger relay for agent-validated incidents.
+
+The ``workflow_retrigger`` tool sends only the incident and the parameters
+that change on re-trigger. The relay turns that into the focused re-trigger
+workflow, built from its own configuration and submitted on the configured
+runner. Each re-trigger is keyed by the incident and its validated service
+set; while a key is accepted, further requests with it are answered as
+duplicates instead of starting another execution. Served by
+``kubiya-incident tool-server`` at ``POST /retrigger``, only to callers that
+present the shared secret. Requests may only pick the relay's own channels.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Tuple
+
+from core.config import IncidentConfig
+from core.workflow import IncidentWorkflow
+from tools.kube_client import bearer_authorized
+from tools.workflow_tools import (
+    RETRIGGER_PARAMS,
+    RETRIGGER_TTL,
+    normalize_services,
+    retrigger_execution_id,
+    retrigger_key,
+)
+
+# Longest incident title and description a re-trigger request may carry
+MAX_TEXT_LENGTH = 4000
+
+
+class RetriggerRelay:
+    """Submits re-triggered incident workflows, collapsing duplicate requests."""
+
+    def __init__(
+        self,
+        config: IncidentConfig,
+        secret: str,
+        ttl: int = RETRIGGER_TTL,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Initialize the relay.
+
+        Args:
+            config: Base configuration providing the runner, credentials, defaults
+                and the channels a re-trigger may post to
+            secret: Shared secret callers send as ``Authorization: Bearer <secret>``
+            ttl: Seconds an accepted re-trigger key collapses duplicates
+            clock: Time source
+
+        Raises:
+            ValueError: If the secret is empty
+        """
+        if not secret:
+            raise ValueError("The re-trigger relay requires a shared secret")
+        self.secret = secret
+        self.channels = {
+            config.slack_channel_id,
+            config.escalation_channel,
+            *(c.strip() for c in config.notification_channels.split(",")),
+        } - {""}
+        self.incident = IncidentWorkflow(config)
+        self.ttl = ttl
+        self.clock = clock
+        self._accepted: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Re-trigger an incident with its validated services.
+
+        Args:
+            request: Incident parameters from ``RETRIGGER_PARAMS``, the only ones a
+                request may set; ``incident_id`` and ``affected_services`` are required
+
+        Returns:
+            ``status`` (``submitted``, ``duplicate`` or ``failed``), the idempotency
+            key and the execution ID of the re-triggered workflow
+
+        Raises:
+            ValueError: If the request sets unknown parameters, misses required ones,
+                names a channel the relay does not post to or carries oversized text
+        """
+        unknown = sorted(set(request) - set(RETRIGGER_PARAMS))
+        if unknown:
+            raise ValueError(f"Unknown re-trigger parameters: {', '.join(unknown)}")
+        channel = request.get("slack_channel_id")
+        if channel and channel not in self.channels:
+            raise ValueError(f"Channel {channel} is not one of the relay's incident channels")
+        for name in ("incident_title", "incident_body"):
+            if len(str(request.get(name) or "")) > MAX_TEXT_LENGTH:
+                raise ValueError(f"{name} is longer than {MAX_TEXT_LENGTH} characters")
+        incident_id = str(request.get("incident_id") or "")
+        services = ",".join(normalize_services(str(request.get("affected_services") or "")))
+        if not incident_id or not services:
+            raise ValueError("incident_id and affected_services are required")
+
+        key = retrigger_key(incident_id, services)
+        result = {"idempotency_key": key, "execution_id": retrigger_execution_id(key)}
+        if not self._claim(key):
+            return {"status": "duplicate", **result}
+
+        overrides = {name: value for name, value in request.items() if value not in (None, "")}
+        overrides.update(
+            affected_services=services,
+            execution_id=result["execution_id"],
+            incident_source="agent-validated",
+        )
+        try:
+            workflow = self.incident.create_retrigger(**overrides)
+            # The execution streams until the workflow ends; its first event confirms acceptance
+            stream = self.incident.execute_workflow_stream(workflow)
+            next(stream, None)
+            stream.close()
+        except Exception as e:
+            # A failed submission must not block a retry
+            self._release(key)
+            return {"status": "failed", "error": str(e), **result}
+        return {"status": "submitted", **result}
+
+    def _claim(self, key: str) -> bool:
+        """Accept a key unless it was accepted within the TTL."""
+        now = self.clock()
+        with self._lock:
+            self._accepted = {k: at for k, at in self._accepted.items() if now - at < self.ttl}
+            if key in self._accepted:
+                return False
+            self._accepted[key] = now
+            return True
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            self._accepted.pop(key, None)
+
+    def authorized(self, headers: Mapping[str, str]) -> bool:
+        """Tell whether request headers carry the shared secret."""
+        return bearer_authorized(headers, self.secret)
+
+    def route(
+        self, request: Dict[str, Any], headers: Mapping[str, str]
+    ) -> Tuple[int, Dict[str, Any]]:
+        """Answer a ``POST /retrigger`` request for the tool server."""
+        if not self.authorized(headers):
+            return 401, {"error": "missing or invalid re-trigger secret"}
+        try:
+            result = self.submit(request)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        return (502 if result["status"] == "failed" else 200), result
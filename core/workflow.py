@@ -3,12 +3,14 @@ Main workflow orchestrator for incident response.
 """
 
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import requests
 from kubiya_workflow_sdk.dsl import Workflow
 
 from agents.service_validator import ServiceValidationAgent
+from tools.kubernetes_tools import TOOL_SERVER_URL, require_tool_images
+from tools.workflow_tools import RETRIGGER_SECRET_ENV
 from workflows.incident_response import IncidentResponseWorkflow
 from core.config import IncidentConfig
 
@@ -54,6 +56,19 @@ class IncidentWorkflow:
 
         return self.workflow_impl.create_workflow()
 
+    def create_retrigger(self, **overrides) -> Workflow:
+        """Create the focused re-trigger workflow of an agent-validated incident.
+
+        Args:
+            **overrides: Parameters to override in the configuration, typically the
+                incident and its validated ``affected_services``
+
+        Returns:
+            Configured re-trigger Workflow object ready for execution
+        """
+        config = IncidentConfig(**{**self.config.dict(), **overrides})
+        return IncidentResponseWorkflow(config).create_retrigger_workflow()
+
     def create_service_validation_agent(self) -> Dict[str, Any]:
         """Create service validation agent configuration.
 
@@ -72,31 +87,7 @@ class IncidentWorkflow:
         Returns:
             Execution result from the API
         """
-        if not self.config.kubiya_api_key:
-            raise ValueError("KUBIYA_API_KEY is required for workflow execution")
-
-        workflow_dict = workflow.to_dict()
-
-        # Merge execution parameters
-        if execution_params:
-            workflow_dict["params"].update(execution_params)
-
-        # Prepare API request
-        url = f"https://api.kubiya.ai/api/v1/workflow?runner={self.config.runner}&operation=execute_workflow"
-        headers = {
-            "Authorization": f"UserKey {self.config.kubiya_api_key}",
-            "Content-Type": "application/json",
-            "Accept": "text/event-stream",
-        }
-
-        api_payload = {
-            "command": "execute_workflow",
-            "name": workflow_dict["name"],
-            "description": workflow_dict["description"],
-            "env": workflow_dict.get("env", {}),
-            "params": workflow_dict.get("params", {}),
-            "steps": workflow_dict["steps"],
-        }
+        url, headers, api_payload = self._prepare_request(workflow, execution_params)
 
         # Execute workflow
         response = requests.post(url, headers=headers, json=api_payload, timeout=60)
@@ -116,10 +107,49 @@ class IncidentWorkflow:
         Yields:
             Streaming response lines
         """
+        url, headers, api_payload = self._prepare_request(workflow, execution_params)
+
+        # Execute workflow with streaming
+        response = requests.post(url, headers=headers, json=api_payload, stream=True, timeout=60)
+
+        if response.status_code == 200:
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    yield line
+        else:
+            raise Exception(f"API Error {response.status_code}: {response.text}")
+
+    def _prepare_request(
+        self, workflow: Workflow, execution_params: Dict[str, Any]
+    ) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
+        """Build the Kubiya API request for a workflow execution.
+
+        The Slack token is never put in the request: the execution references
+        the ``slack_token_secret`` Kubiya secret, which the runner injects into
+        the setup step.
+
+        Args:
+            workflow: The workflow to execute
+            execution_params: Additional execution parameters
+
+        Returns:
+            Tuple of URL, headers and JSON payload
+
+        Raises:
+            ValueError: If the API key is missing, or a container tool step has no
+                toolbox image to run on
+        """
         if not self.config.kubiya_api_key:
             raise ValueError("KUBIYA_API_KEY is required for workflow execution")
 
         workflow_dict = workflow.to_dict()
+        require_tool_images(
+            [
+                step["executor"]["config"]["tool_def"]
+                for step in workflow_dict["steps"]
+                if step.get("executor", {}).get("type") == "tool"
+            ]
+        )
 
         # Merge execution parameters
         if execution_params:
@@ -138,19 +168,13 @@ class IncidentWorkflow:
             "name": workflow_dict["name"],
             "description": workflow_dict["description"],
             "env": workflow_dict.get("env", {}),
+            # Tool steps calling the tool server send its shared secret
+            "secrets": [self.config.slack_token_secret]
+            + ([RETRIGGER_SECRET_ENV] if TOOL_SERVER_URL else []),
             "params": workflow_dict.get("params", {}),
             "steps": workflow_dict["steps"],
         }
-
-        # Execute workflow with streaming
-        response = requests.post(url, headers=headers, json=api_payload, stream=True, timeout=60)
-
-        if response.status_code == 200:
-            for line in response.iter_lines(decode_unicode=True):
-                if line:
-                    yield line
-        else:
-            raise Exception(f"API Error {response.status_code}: {response.text}")
+        return url, headers, api_payload
 
     def to_dict(self) -> Dict[str, Any]:
         """Export workflow to dictionary format.
@@ -15,6 +15,7 @@ NC='\033[0m' # No Color
 IMAGE_NAME="kubiya-incident-response"
 IMAGE_TAG="latest"
 DOCKERFILE_PATH="./Dockerfile"
+TOOLBOX=false
 
 # Get the project root directory (parent of kubiya_incident)
 PROJECT_ROOT="$(cd "$(dirname "${BASH_SOURCE[0]}")/.." && pwd)"
@@ -45,6 +46,10 @@ while [[ $# -gt 0 ]]; do
             NO_CACHE=true
             shift
             ;;
+        --toolbox)
+            TOOLBOX=true
+            shift
+            ;;
         --help|-h)
             echo "Usage: $0 [OPTIONS]"
             echo "Options:"
@@ -52,6 +57,7 @@ while [[ $# -gt 0 ]]; do
             echo "  --name, -n NAME      Set image name (default: kubiya-incident-response)"
             echo "  --push, -p           Push image to registry after build"
             echo "  --no-cache           Build without using cache"
+            echo "  --toolbox            Build the kubectl/helm/jq toolbox image used by the tools"
             echo "  --help, -h           Show this help message"
             exit 0
             ;;
@@ -62,6 +68,16 @@ while [[ $# -gt 0 ]]; do
     esac
 done
 
+if [ "$TOOLBOX" = true ]; then
+    DOCKERFILE_PATH="./Dockerfile.toolbox"
+    if [ "$IMAGE_NAME" = "kubiya-incident-response" ]; then
+        IMAGE_NAME="kubiya-incident-toolbox"
+    fi
+    if [ "$IMAGE_TAG" = "latest" ]; then
+        IMAGE_TAG="1.0.0"
+    fi
+fi
+
 FULL_IMAGE_NAME="$IMAGE_NAME:$IMAGE_TAG"
 
 echo -e "${YELLOW}🏗️  Building image: $FULL_IMAGE_NAME${NC}"
@@ -73,7 +89,12 @@ fi
 
 # Build the Docker image
 echo -e "${YELLOW}🔨 Running docker build...${NC}"
-docker build $BUILD_ARGS -t "$FULL_IMAGE_NAME" -f kubiya_incident/Dockerfile .
+if [ "$TOOLBOX" = true ]; then
+    # The toolbox copies the tool modules, so the package directory is its context
+    docker build $BUILD_ARGS -t "$FULL_IMAGE_NAME" -f "kubiya_incident/$DOCKERFILE_PATH" kubiya_incident
+else
+    docker build $BUILD_ARGS -t "$FULL_IMAGE_NAME" -f kubiya_incident/Dockerfile .
+fi
 
 # Verify the build
 echo -e "${YELLOW}✅ Verifying image build...${NC}"
@@ -81,7 +102,11 @@ docker images | grep "$IMAGE_NAME"
 
 # Test the image
 echo -e "${YELLOW}🧪 Testing the image...${NC}"
-docker run --rm "$FULL_IMAGE_NAME" kubiya-incident --help
+if [ "$TOOLBOX" = true ]; then
+    docker run --rm "$FULL_IMAGE_NAME" sh -c "kubectl version --client && helm version --short && jq --version"
+else
+    docker run --rm "$FULL_IMAGE_NAME" kubiya-incident --help
+fi
 
 # Push if requested
 if [ "$PUSH_IMAGE" = true ]; then
@@ -94,6 +119,17 @@ echo ""
 echo -e "${GREEN}🎉 Docker build complete!${NC}"
 echo ""
 echo "Image name: $FULL_IMAGE_NAME"
+if [ "$TOOLBOX" = true ]; then
+    echo ""
+    if [ "$PUSH_IMAGE" != true ]; then
+        echo "Runners pull the toolbox from a registry; rebuild with a registry name and push it:"
+        echo -e "${YELLOW}./docker-build.sh --toolbox --name <registry>/kubiya-incident-toolbox --push${NC}"
+    fi
+    echo "Point the investigation tools at the pushed image:"
+    echo -e "${YELLOW}export INCIDENT_TOOLBOX_IMAGE=$FULL_IMAGE_NAME${NC}"
+    exit 0
+fi
+
 echo ""
 echo "To run the container:"
 echo -e "${YELLOW}docker run --rm $FULL_IMAGE_NAME kubiya-incident --help${NC}"
@@ -0,0 +1,7 @@
+"""
+Shared test setup.
+"""
+
+# core imports workflows, which imports core.config back: enter the cycle from core
+# the way cli.py does, so tests can import workflows modules directly
+import core  # noqa: F401
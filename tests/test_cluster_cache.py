@@ -0,0 +1,117 @@
+"""
+Tests for the watch-based cluster state cache and its query server.
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from tools.cluster_cache import ClusterStateCache, serve
+
+
+def pod(name, version, app="web"):
+    return {
+        "metadata": {
+            "name": name,
+            "namespace": "default",
+            "resourceVersion": version,
+            "labels": {"app": app},
+            "managedFields": [{"manager": "kubectl"}],
+        }
+    }
+
+
+class FakeClient:
+    """Serves scripted lists and watches of the pods kind."""
+
+    def __init__(self, cache_stop, lists, watches):
+        self.cache_stop = cache_stop
+        self.lists = list(lists)
+        self.watches = list(watches)
+        self.watched_from = []
+
+    def list(self, path):
+        return self.lists.pop(0)
+
+    def watch(self, path, resourceVersion, **params):
+        self.watched_from.append(resourceVersion)
+        if not self.watches:
+            self.cache_stop()
+            return iter([])
+        return iter(self.watches.pop(0))
+
+
+def make_cache(lists, watches):
+    cache = ClusterStateCache(client=None)
+    cache.client = FakeClient(cache.stop, lists, watches)
+    return cache
+
+
+def test_watch_resumes_from_last_version_and_relists_when_expired():
+    """Test that watches resume from the newest version and a 410 replaces the store."""
+    cache = make_cache(
+        lists=[([pod("a", "1")], "1"), ([pod("a", "1"), pod("c", "9")], "10")],
+        watches=[
+            [{"type": "ADDED", "object": pod("b", "2")}],
+            [{"type": "ERROR", "object": {"message": "too old resource version: 2"}}],
+        ],
+    )
+    cache._run("pods")
+
+    assert cache.client.watched_from == ["1", "2", "10"]
+    assert cache.relists["pods"] == 2
+    assert list(cache.stores["pods"]) == ["default/a", "default/c"]
+    assert cache.versions["pods"] == "10"
+    assert "managedFields" not in cache.stores["pods"]["default/a"]["metadata"]
+
+
+def test_deleted_objects_leave_the_store():
+    """Test that DELETED watch events remove cached objects."""
+    cache = make_cache(
+        lists=[([pod("a", "1"), pod("b", "1", app="api")], "1")],
+        watches=[[{"type": "DELETED", "object": pod("a", "3")}]],
+    )
+    cache._run("pods")
+
+    assert [p["metadata"]["name"] for p in cache.pods()] == ["b"]
+    assert cache.pods(app="web") == []
+
+
+@pytest.fixture
+def server():
+    cache = make_cache(lists=[([pod("a", "1")], "1")], watches=[])
+    cache._run("pods")
+    server = serve(cache, "s3cret", port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url, secret=None):
+    headers = {"Authorization": f"Bearer {secret}"} if secret else {}
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_queries_require_the_shared_secret(server):
+    """Test that /pods, /events and /summary answer only callers presenting the secret."""
+    for path in ("/pods", "/events", "/summary"):
+        assert get(server + path)[0] == 401
+        assert get(server + path, "wrong")[0] == 401
+
+    status, body = get(server + "/pods?app=web", "s3cret")
+    assert status == 200
+    assert [p["metadata"]["name"] for p in body["items"]] == ["a"]
+
+
+def test_serve_requires_a_secret():
+    """Test that the query server is never started without a shared secret."""
+    with pytest.raises(ValueError, match="shared secret"):
+        serve(ClusterStateCache(client=None), "", port=0)
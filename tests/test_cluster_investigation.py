@@ -0,0 +1,73 @@
+"""
+Tests for the set-based service queries of the cluster investigation tool.
+"""
+
+import os
+import subprocess
+
+import pytest
+
+from tools.kubernetes_tools import KubernetesToolDefinitions
+
+FAKE_KUBECTL = """#!/bin/bash
+echo "$*" >> "$KUBECTL_LOG"
+case "$*" in
+  "get pods --all-namespaces -l"*)
+    echo "NAMESPACE NAME READY STATUS RESTARTS AGE IP NODE NOMINATED READINESS APP"
+    for app in web api db; do
+      echo "prod $app-6d4cf-x1 1/1 Running 0 1d 10.0.0.1 n1 <none> <none> $app"
+    done ;;
+  "get services --all-namespaces")
+    echo "NAMESPACE NAME TYPE CLUSTER-IP EXTERNAL-IP PORT(S) AGE"
+    echo "prod web ClusterIP 10.1.0.1 <none> 80/TCP 1d"
+    echo "prod api ClusterIP 10.1.0.2 <none> 80/TCP 1d" ;;
+esac
+"""
+
+
+@pytest.fixture
+def run_investigation(tmp_path):
+    (tmp_path / "kubectl").write_text(FAKE_KUBECTL)
+    (tmp_path / "kubectl").chmod(0o755)
+    script = KubernetesToolDefinitions.kubectl_cluster_investigation()["content"]
+
+    def run(services):
+        log = tmp_path / f"calls-{len(services)}.log"
+        env = {
+            **os.environ,
+            "PATH": f"{tmp_path}:{os.environ['PATH']}",
+            "KUBECTL_LOG": str(log),
+            "AFFECTED_SERVICES": services,
+        }
+        result = subprocess.run(
+            ["bash", "-c", script], capture_output=True, text=True, env=env, check=True
+        )
+        return result.stdout, log.read_text().splitlines()
+
+    return run
+
+
+def test_call_count_does_not_grow_with_services(run_investigation):
+    """Test that one pods query and one services listing cover every affected service."""
+    _, one = run_investigation("web")
+    _, many = run_investigation(", ".join(f"svc{i}" for i in range(15)) + ",web")
+
+    assert len(many) == len(one)
+    selector_calls = [call for call in many if call.startswith("get pods --all-namespaces -l")]
+    assert selector_calls == [
+        "get pods --all-namespaces -l app in ("
+        + ",".join(f"svc{i}" for i in range(15))
+        + ",web) -o wide -L app"
+    ]
+
+
+def test_results_are_filtered_per_service(run_investigation):
+    """Test that each service reports only its own pods and service entry."""
+    output, _ = run_investigation("web, db")
+    web = output.split("🔍 Investigating service: web")[1].split("🔍 Investigating service:")[0]
+    db = output.split("🔍 Investigating service: db")[1].split("4️⃣")[0]
+
+    assert "web-6d4cf-x1" in web and "api-6d4cf-x1" not in web
+    assert "prod web ClusterIP" in web
+    assert "db-6d4cf-x1" in db
+    assert "Service db not found" in db
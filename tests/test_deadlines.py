@@ -0,0 +1,110 @@
+"""
+Tests for the deadline planner.
+"""
+
+import pytest
+
+from workflows.deadlines import DeadlinePlanner, StepBudget
+
+
+def step(name, cost, depends=None, **keys):
+    return dict(name=name, expected_cost=cost, depends=depends or [], **keys)
+
+
+def worst_case_path(planned):
+    """Longest chain of dependent steps counting every retry."""
+    finish = {}
+    for s in planned:
+        start = max((finish[name] for name in s.get("depends") or []), default=0)
+        finish[s["name"]] = start + s["timeout"] * (s["retries"] + 1)
+    return max(finish.values())
+
+
+def test_select_raises_when_required_floors_exceed_deadline():
+    """Test that required floors longer than the deadline fail with a clear error."""
+    steps = [step("alert", 3, min_timeout=60), step("investigate", 180, ["alert"])]
+    with pytest.raises(ValueError, match="240s on the critical path, more than the 120s deadline"):
+        DeadlinePlanner(120).select(steps)
+
+
+def test_select_floor_uses_min_timeout_and_expected_cost():
+    """Test that a step's floor is the largest of its cost, MIN_TIMEOUT and min_timeout."""
+    planner = DeadlinePlanner(60)
+    assert planner.floor(step("a", 1)) == DeadlinePlanner.MIN_TIMEOUT
+    assert planner.floor(step("a", 1, min_timeout=30)) == 30
+    assert planner.floor(step("a", 40.5, min_timeout=30)) == 41
+
+
+def test_select_drops_optional_steps_until_floors_fit():
+    """Test that optional steps whose floors would overrun the deadline are dropped."""
+    steps = [
+        step("alert", 3, min_timeout=30),
+        step("notify", 3, ["alert"], min_timeout=30, optional=True),
+        step("enrich", 2, ["notify"], optional=True),
+        step("cache", 1, ["alert"], optional=True),
+        step("results", 3, ["notify"], min_timeout=30),
+    ]
+    selected = [s["name"] for s in DeadlinePlanner(70).select(steps)]
+    # notify would need 90s on the path, enrich builds on it, cache fits
+    assert selected == ["alert", "cache", "results"]
+
+
+def test_select_does_not_sum_parallel_branches():
+    """Test that parallel branches are checked along the longest one only."""
+    steps = [
+        step("start", 5),
+        step("alert", 3, ["start"], min_timeout=60),
+        step("investigate", 180, ["start"]),
+        step("results", 3, ["alert", "investigate"], min_timeout=30),
+    ]
+    # In sequence the floors need 275s; the critical path needs 215s
+    assert len(DeadlinePlanner(220).select(steps)) == 4
+
+
+def test_allocate_fits_worst_case_within_deadline():
+    """Test that the worst case of every chain, retries included, fits in the deadline."""
+    steps = [
+        step("validate", 2),
+        step("alert", 3, ["validate"], min_timeout=60),
+        step("notify", 3, ["alert"], min_timeout=30),
+        step("investigate", 180, ["validate"], min_timeout=180),
+        step("results", 3, ["investigate", "notify"], min_timeout=30),
+    ]
+    for deadline in (220, 300, 900, 3600):
+        planner = DeadlinePlanner(deadline, step_timeouts={"investigate": 600})
+        planned = planner.plan(steps)
+        assert worst_case_path(planned) <= deadline
+        for s, definition in zip(planned, steps):
+            assert s["timeout"] >= planner.floor(definition)
+
+
+def test_allocate_keeps_step_timeout_when_share_allows():
+    """Test that a configured step timeout is kept and the rest of the share buys retries."""
+    steps = [step("investigate", 180, min_timeout=180), step("results", 3, ["investigate"])]
+    budgets = DeadlinePlanner(3600, step_timeouts={"investigate": 600}).allocate(steps)
+    assert budgets["investigate"] == StepBudget(timeout=600, retries=3)
+    assert budgets["results"].timeout == 6
+
+
+def test_allocate_gives_off_critical_path_steps_their_floor():
+    """Test that off-critical-path steps take no share of the deadline."""
+    steps = [
+        step("alert", 3, min_timeout=30),
+        step("flush", 900, ["alert"], min_timeout=930, off_critical_path=True),
+    ]
+    budgets = DeadlinePlanner(60).allocate(steps)
+    assert budgets["flush"] == StepBudget(timeout=930, retries=0)
+    assert budgets["alert"].worst_case <= 60
+
+
+def test_plan_rewires_dependencies_around_dropped_steps():
+    """Test that steps depending on a dropped step depend on its dependencies instead."""
+    steps = [
+        step("alert", 3, min_timeout=30),
+        step("notify", 3, ["alert"], min_timeout=30, optional=True),
+        step("results", 3, ["notify"], min_timeout=30),
+    ]
+    planned = DeadlinePlanner(60).plan(steps)
+    assert [s["name"] for s in planned] == ["alert", "results"]
+    assert planned[1]["depends"] == ["alert"]
+    assert not {"expected_cost", "min_timeout", "optional"}.intersection(planned[0])
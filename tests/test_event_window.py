@@ -0,0 +1,91 @@
+"""
+Tests for windowed, paged event retrieval.
+"""
+
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from tools.event_window import format_events, windowed_events
+
+NOW = 1_700_000_000
+
+
+def stamp(seconds_ago):
+    return datetime.fromtimestamp(NOW - seconds_ago, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def event(name, seconds_ago, field="lastTimestamp"):
+    item = {
+        "metadata": {"name": name, "namespace": "prod", "creationTimestamp": stamp(7200)},
+        "involvedObject": {"kind": "Pod", "name": name},
+        "type": "Warning",
+        "reason": "BackOff",
+        "message": f" {name} restarting ",
+    }
+    if field == "series":
+        item["series"] = {"lastObservedTime": stamp(seconds_ago)[:-1] + ".123456Z"}
+    else:
+        item[field] = stamp(seconds_ago)
+    return item
+
+
+class FakeClient:
+    """Serves events in fixed-size pages and records the list parameters."""
+
+    def __init__(self, items, page_size):
+        self.items = items
+        self.page_size = page_size
+        self.params = None
+
+    def pages(self, path, **params):
+        self.path, self.params = path, params
+        for start in range(0, len(self.items), self.page_size):
+            yield {"items": self.items[start : start + self.page_size]}
+
+
+def test_keeps_newest_events_of_the_window_newest_first():
+    """Test that only the newest top events inside the window are returned, in order."""
+    ages = list(range(0, 7200, 60))
+    random.Random(5).shuffle(ages)
+    client = FakeClient([event(f"pod-{age}", age) for age in ages], page_size=25)
+
+    result = windowed_events(client, window=3600, top=5, now=NOW, page_size=25)
+
+    assert [e["object"] for e in result.events] == [f"Pod/pod-{age}" for age in range(0, 300, 60)]
+    assert result.matched == 61
+    assert (result.scanned, result.pages) == (120, 5)
+    assert result.events[0]["message"] == "pod-0 restarting"
+
+
+def test_type_and_namespace_are_filtered_server_side():
+    """Test that the type filter is a field selector and namespaces narrow the path."""
+    client = FakeClient([], page_size=10)
+    windowed_events(client, namespace="prod", now=NOW, page_size=10)
+    assert client.path == "/api/v1/namespaces/prod/events"
+    assert client.params == {"limit": 10, "fieldSelector": "type=Warning"}
+
+    windowed_events(client, event_type=None, now=NOW)
+    assert client.path == "/api/v1/events"
+    assert client.params["fieldSelector"] is None
+
+
+def test_event_time_falls_back_to_series_and_event_time():
+    """Test that events without lastTimestamp use their series or event time."""
+    client = FakeClient(
+        [event("a", 30, field="series"), event("b", 60, field="eventTime"), event("c", 90)],
+        page_size=10,
+    )
+    result = windowed_events(client, window=120, now=NOW)
+    assert [e["object"] for e in result.events] == ["Pod/a", "Pod/b", "Pod/c"]
+
+
+def test_rejects_empty_top_and_reports_empty_window():
+    """Test that top must be positive and an empty window says so."""
+    with pytest.raises(ValueError, match="top"):
+        windowed_events(FakeClient([], 10), top=0)
+
+    result = windowed_events(FakeClient([event("old", 7200)], 10), window=3600, now=NOW)
+    assert result.events == []
+    assert "No events found in the window" in format_events(result)
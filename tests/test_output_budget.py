@@ -0,0 +1,66 @@
+"""
+Tests for the output budget guard command.
+"""
+
+import subprocess
+
+import pytest
+
+from workflows.output_budget import OutputBudget
+
+
+def run_guard(budget, incident_id, output):
+    """Run the guard command with the workflow templates filled in."""
+    command = budget.guard_command()
+    command = command.replace("${incident_id}", incident_id)
+    command = command.replace(f"${{{budget.output}}}", output)
+    return subprocess.run(["bash", "-c", command], capture_output=True, text=True, check=True)
+
+
+@pytest.fixture
+def budget(tmp_path):
+    return OutputBudget("cluster_health", max_bytes=2048, artifact_dir=str(tmp_path / "artifacts"))
+
+
+def test_output_within_budget_passes_through(budget):
+    """Test that a small output flows downstream unchanged."""
+    result = run_guard(budget, "INC-1", "all pods healthy")
+    assert result.stdout == "all pods healthy\n"
+
+
+def test_oversized_output_is_digested(budget, tmp_path):
+    """Test that an oversized output is stored whole and replaced by a bounded digest."""
+    output = "## Pods\n" + "\n".join(f"pod-{i} CrashLoopBackOff" for i in range(500))
+    result = run_guard(budget, "INC-1", output)
+
+    artifact = tmp_path / "artifacts" / "INC-1" / "cluster_health.txt"
+    assert artifact.read_text() == output + "\n"
+    assert "Output truncated" in result.stdout
+    assert "## Pods" in result.stdout
+    assert len(result.stdout.encode()) < len(output)
+
+
+def test_quotes_in_output_do_not_break_the_shell(budget):
+    """Test that agent text with quotes, backticks and $ is passed through literally."""
+    output = 'it\'s `broken` and costs $HOME "dollars"'
+    assert run_guard(budget, "INC-1", output).stdout == output + "\n"
+
+
+@pytest.mark.parametrize(
+    "incident_id, directory",
+    [
+        ("../../escape", "_._.._escape"),
+        ("/etc", "_etc"),
+        ("..", "_."),
+        ("INC 7; rm -rf /", "INC_7__rm_-rf__"),
+        ("", "unknown"),
+    ],
+)
+def test_incident_id_cannot_escape_artifact_dir(budget, tmp_path, incident_id, directory):
+    """Test that the incident ID is sanitized before it names the artifact directory."""
+    run_guard(budget, incident_id, "x" * 4096)
+
+    artifacts = tmp_path / "artifacts"
+    assert [path.name for path in artifacts.iterdir()] == [directory]
+    assert (artifacts / directory / "cluster_health.txt").exists()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["artifacts"]
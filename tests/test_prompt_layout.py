@@ -0,0 +1,76 @@
+"""
+Tests for the static-prefix prompt layout and its token report.
+"""
+
+import pytest
+
+from agents.service_validator import ServiceValidationAgent
+from core.config import IncidentConfig
+from workflows.incident_response import IncidentResponseWorkflow
+from workflows.prompt_layout import (
+    MIN_CACHEABLE_TOKENS,
+    VARIABLE,
+    PromptLayout,
+    estimate_tokens,
+    prompt_report,
+)
+
+
+def make_config(incident_id, title, services):
+    return IncidentConfig(
+        incident_id=incident_id,
+        incident_title=title,
+        incident_severity="high",
+        incident_body=f"{title} since the last deploy",
+        incident_url=f"https://example.com/{incident_id}",
+        affected_services=services,
+        slack_channel_id="C1",
+    )
+
+
+@pytest.fixture
+def configs():
+    return [
+        make_config("INC-1", "Checkout errors", "checkout-api"),
+        make_config("INC-2", "Payments latency", "payment-service,ledger"),
+    ]
+
+
+def test_workflow_prompt_prefixes_are_identical_across_incidents(configs):
+    """Test that every workflow prompt prefix is static and incident values stay in the suffix."""
+    first, second = (IncidentResponseWorkflow(c).get_prompt_layouts() for c in configs)
+    for a, b in zip(first, second):
+        assert a.name == b.name
+        assert a.prefix == b.prefix, a.name
+        assert not VARIABLE.search(a.prefix), a.name
+        assert a.render().startswith(a.prefix.rstrip())
+
+
+def test_agent_instructions_keep_incident_fields_in_the_suffix(configs):
+    """Test that the validation agent prompt puts the incident after static instructions."""
+    first, second = (ServiceValidationAgent(c).get_instructions_layout() for c in configs)
+    assert first.prefix == second.prefix
+    assert "Checkout errors" in first.suffix and "Checkout errors" not in first.prefix
+    assert ServiceValidationAgent(configs[0])._get_agent_instructions() == first.render()
+
+
+def test_report_counts_cacheable_tokens_up_to_the_first_variable():
+    """Test that a variable inside a prefix ends the cacheable part and eligibility needs length."""
+    static = "x" * (4 * MIN_CACHEABLE_TOKENS)
+    good, bad = prompt_report(
+        [
+            PromptLayout("good", static, "• ${incident_id}"),
+            PromptLayout("bad", "ID ${incident_id}\n" + static, ""),
+        ]
+    )
+    assert good["cacheable_tokens"] == good["prefix_tokens"] == MIN_CACHEABLE_TOKENS
+    assert good["cache_eligible"]
+    assert bad["cacheable_tokens"] == 1
+    assert not bad["cache_eligible"]
+    assert good["prefix_sha256"] != bad["prefix_sha256"]
+
+
+def test_estimate_counts_bytes_not_characters():
+    """Test that multi-byte characters raise the token estimate."""
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("🔍🔍") == 2
@@ -0,0 +1,115 @@
+"""
+Tests for re-trigger idempotency keys, the re-trigger workflow and the relay.
+"""
+
+import subprocess
+
+import pytest
+
+from core.config import IncidentConfig
+from core.retrigger import RetriggerRelay
+from tools.workflow_tools import DUPLICATE_CLAIM, claim_command, retrigger_key
+from workflows.incident_response import IncidentResponseWorkflow
+
+
+def make_config(**overrides):
+    return IncidentConfig(
+        incident_id="INC-1",
+        incident_title="Checkout errors",
+        incident_severity="high",
+        incident_body="5xx on checkout",
+        incident_url="https://example.com/INC-1",
+        slack_channel_id="C1",
+        **overrides,
+    )
+
+
+class FakeIncident:
+    """Records re-trigger submissions instead of calling the Kubiya API."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.submitted = []
+
+    def create_retrigger(self, **overrides):
+        return overrides
+
+    def execute_workflow_stream(self, workflow):
+        if self.error:
+            raise self.error
+        self.submitted.append(workflow)
+        yield "data: accepted"
+
+
+@pytest.fixture
+def relay():
+    relay = RetriggerRelay(make_config(), "s3cret")
+    relay.incident = FakeIncident()
+    return relay
+
+
+def run_claim(tmp_path, incident_id, services):
+    command = claim_command(str(tmp_path / "claims"))
+    command = command.replace("${incident_id}", incident_id).replace(
+        "${affected_services}", services
+    )
+    result = subprocess.run(["bash", "-c", command], capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+@pytest.mark.parametrize("services", ["api", "Web, api,api", "web\tapi  db"])
+def test_shell_claim_key_matches_python_key(tmp_path, services):
+    """Test that the runner claim computes the same key as retrigger_key."""
+    assert run_claim(tmp_path, "INC-1", services) == retrigger_key("INC-1", services)
+
+
+def test_shell_claim_reports_duplicates(tmp_path):
+    """Test that a second claim of the same incident and services is a duplicate."""
+    run_claim(tmp_path, "INC-1", "api,web")
+    assert run_claim(tmp_path, "INC-1", "WEB api") == DUPLICATE_CLAIM
+
+
+def test_retrigger_workflow_is_keyed_by_the_claim():
+    """Test that the re-trigger workflow caches under an execution ID carrying the key."""
+    workflow = IncidentResponseWorkflow(make_config()).create_retrigger_workflow().to_dict()
+    steps = {step["name"]: step for step in workflow["steps"]}
+
+    assert workflow["params"]["incident_source"] == "agent-validated"
+    assert "execution_id" not in workflow["params"]
+    assert steps["claim-retrigger"]["output"] == "retrigger_key"
+    assert "/retrigger-${retrigger_key}" in steps["restore-parent-alert"]["command"]
+
+
+def test_relay_collapses_duplicate_requests(relay):
+    """Test that repeats with reordered services are answered as duplicates."""
+    first = relay.submit({"incident_id": "INC-1", "affected_services": "web,api"})
+    second = relay.submit({"incident_id": "INC-1", "affected_services": "API, web"})
+
+    key = retrigger_key("INC-1", "api,web")
+    assert first == {
+        "status": "submitted",
+        "idempotency_key": key,
+        "execution_id": f"retrigger-{key}",
+    }
+    assert second["status"] == "duplicate"
+    assert second["execution_id"] == first["execution_id"]
+    assert len(relay.incident.submitted) == 1
+    assert relay.incident.submitted[0]["affected_services"] == "api,web"
+
+
+def test_relay_releases_key_after_failed_submission(relay):
+    """Test that a failed submission does not block the retry."""
+    relay.incident.error = RuntimeError("API Error 503")
+    failed = relay.submit({"incident_id": "INC-1", "affected_services": "api"})
+    assert failed["status"] == "failed"
+
+    relay.incident.error = None
+    retried = relay.submit({"incident_id": "INC-1", "affected_services": "api"})
+    assert retried["status"] == "submitted"
+
+
+def test_relay_rejects_requests_without_the_secret(relay):
+    """Test that requests without the shared secret are refused before submission."""
+    status, _ = relay.route({"incident_id": "INC-1", "affected_services": "api"}, {})
+    assert status == 401
+    assert relay.incident.submitted == []
@@ -0,0 +1,89 @@
+"""
+Tests for fuzzy service-name matching.
+"""
+
+import random
+
+import pytest
+
+from tools.service_matcher import ServiceMatcher, _distance, _pattern, edit_distance
+
+SERVICES = [
+    ("prod", "checkout-api"),
+    ("prod", "checkout-worker"),
+    ("staging", "checkout-api"),
+    ("prod", "payments-gateway"),
+    ("prod", "payment-ledger"),
+    ("prod", "inventory"),
+    ("staging", "user-profile"),
+]
+
+
+def reference_distance(a, b):
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        previous, row[0] = row[0], i
+        for j, y in enumerate(b, 1):
+            previous, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, previous + (x != y))
+    return row[-1]
+
+
+@pytest.fixture
+def matcher():
+    return ServiceMatcher(SERVICES)
+
+
+def test_edit_distance_matches_dynamic_programming():
+    """Test that the bit-parallel distance agrees with the textbook algorithm."""
+    rng = random.Random(3)
+    for _ in range(500):
+        a = "".join(rng.choices("abc-", k=rng.randint(0, 12)))
+        b = "".join(rng.choices("abc-", k=rng.randint(0, 12)))
+        assert edit_distance(a, b) == reference_distance(a, b)
+
+
+def test_distance_limit_stops_early():
+    """Test that a bounded distance reports limit + 1 once it must exceed the limit."""
+    query = "checkout"
+    assert _distance(_pattern(query), len(query), "inventory-service", limit=2) == 3
+    assert _distance(_pattern(query), len(query), "checkouts", limit=2) == 1
+
+
+def test_exact_match_ranks_first_with_all_namespaces(matcher):
+    """Test that an exact name scores 1.0 and lists every namespace it exists in."""
+    best = matcher.match("Checkout-API")[0]
+    assert (best.name, best.score, best.distance) == ("checkout-api", 1.0, 0)
+    assert best.namespaces == ["prod", "staging"]
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("chekout-api", "checkout-api"),
+        ("checkuot-worker", "checkout-worker"),
+        ("payments-gatway", "payments-gateway"),
+        ("inventroy", "inventory"),
+    ],
+)
+def test_misspellings_rank_intended_service_first(matcher, query, expected):
+    """Test that typos and swapped characters still suggest the intended service."""
+    assert matcher.match(query)[0].name == expected
+
+
+def test_partial_names_rank_above_typos(matcher):
+    """Test that a name containing the query ranks above names that are merely close."""
+    names = [match.name for match in matcher.match("ledger")]
+    assert names[0] == "payment-ledger"
+
+
+def test_namespace_filter_and_k(matcher):
+    """Test that suggestions are limited to the namespace and to k results."""
+    matches = matcher.match("checkout", namespace="staging")
+    assert [match.name for match in matches] == ["checkout-api"]
+    assert matches[0].namespaces == ["staging"]
+    assert len(matcher.match("checkout", k=1)) == 1
+
+
+def test_blank_query_has_no_suggestions(matcher):
+    """Test that a blank query returns nothing."""
+    assert matcher.match("  ") == []
@@ -0,0 +1,84 @@
+"""
+Tests for deterministic service pre-validation.
+"""
+
+import pytest
+
+from tools.service_inventory import ServiceInventory
+from tools.service_resolver import pod_owner, prevalidate, split_services, text_candidates
+
+SERVICES = [
+    "prod/payment-service",
+    "prod/checkout-api",
+    "prod/checkout-worker",
+    "prod/user-profile",
+    "prod/user-profiles",
+    "prod/inventory",
+    "prod/api",
+    "default/kubernetes",
+    "kube-system/kube-dns",
+]
+
+
+@pytest.fixture
+def inventory():
+    inventory = ServiceInventory(client=None)
+    inventory.entries["services"] = {
+        key: {"labels": {}, "type": "ClusterIP", "cluster_ip": "", "ports": []} for key in SERVICES
+    }
+    return inventory
+
+
+@pytest.fixture
+def names(inventory):
+    return {record.name.lower(): record.name for record in inventory.services()}
+
+
+def test_split_services_deduplicates_in_order():
+    """Test that affected_services splits on commas and whitespace, keeping the first order."""
+    assert split_services(" checkout-api, inventory\tcheckout-api ") == [
+        "checkout-api",
+        "inventory",
+    ]
+    assert split_services("") == []
+
+
+def test_pod_names_belong_to_their_service(names):
+    """Test that ReplicaSet pods and StatefulSet ordinals resolve to the service."""
+    assert pod_owner("checkout-api-7d9f8c6b5-xkqvz", names) == "checkout-api"
+    assert pod_owner("inventory-0", names) == "inventory"
+    assert pod_owner("checkout-gateway", names) is None
+
+
+def test_text_mentions_prefer_longest_run_and_skip_generic_words(names):
+    """Test that word runs match hyphenated names and generic words are no mentions."""
+    mentioned, unknown = text_candidates(
+        "Payment service timeouts from the API behind checkout_worker; user-profle 500s",
+        names,
+    )
+    assert mentioned == ["payment-service", "checkout-worker"]
+    assert unknown == ["user-profle"]
+
+
+def test_provided_services_resolve_exact_and_fuzzy(inventory):
+    """Test that provided names resolve by exact name and by a clear fuzzy winner."""
+    result = prevalidate(inventory, provided="inventory, chekout-worker")
+    assert result["decision"] == "resolved"
+    assert result["services"] == ["inventory", "checkout-worker"]
+    assert [r["status"] for r in result["resolutions"]] == ["exact", "fuzzy"]
+
+
+def test_close_runner_up_routes_to_the_agent(inventory):
+    """Test that a misspelling between two similar services is ambiguous."""
+    result = prevalidate(inventory, provided="user-profils")
+    assert result["decision"] == "ambiguous"
+    assert result["services"] == []
+    assert set(result["resolutions"][0]["alternatives"][:2]) == {"user-profile", "user-profiles"}
+
+
+def test_text_without_application_services_is_unresolved(inventory):
+    """Test that cluster plumbing named in prose does not resolve to a service."""
+    result = prevalidate(inventory, title="Kubernetes API errors", body="kube-dns lookups fail")
+    assert result["source"] == "text"
+    assert result["decision"] == "unresolved"
+    assert result["services"] == []
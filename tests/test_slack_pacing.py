@@ -0,0 +1,121 @@
+"""
+Tests for the Slack posting, fan-out and pacing shell functions.
+"""
+
+import json
+import subprocess
+import time
+import uuid
+
+import pytest
+
+from workflows.step_library import StepLibrary
+
+FAKE_CURL = r"""#!/bin/bash
+while [ $# -gt 0 ]; do
+  case "$1" in
+    -D) headers=$2; shift ;;
+    -d) payload=${2#@}; shift ;;
+  esac
+  shift
+done
+channel=$(sed -n 's/.*"channel": *"\([^"]*\)".*/\1/p' "$payload")
+echo "$channel" >> "$FAKE_SLACK_LOG"
+: > "$headers"
+case "$channel" in
+  *-broken) echo '<html><body>Service Unavailable</body></html>' ;;
+  *-limited)
+    if [ "$(grep -c -- "$channel" "$FAKE_SLACK_LOG")" -lt 2 ]; then
+      printf 'Retry-After: 1\r\n' > "$headers"
+      echo '{"ok":false,"error":"ratelimited"}'
+    else
+      echo '{"ok":true,"channel":"'"$channel"'","ts":"1.2"}'
+    fi ;;
+  *) echo '{"ok":true,"channel":"'"$channel"'","ts":"1.2"}' ;;
+esac
+"""
+
+
+@pytest.fixture
+def slack(tmp_path):
+    """Run a step library command against a fake Slack API."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    curl = bin_dir / "curl"
+    curl.write_text(FAKE_CURL)
+    curl.chmod(0o755)
+    log = tmp_path / "slack.log"
+
+    def run(command):
+        env = {"PATH": f"{bin_dir}:/usr/bin:/bin", "FAKE_SLACK_LOG": str(log)}
+        script = StepLibrary.default().link(command)
+        return subprocess.run(
+            ["bash", "-c", script], capture_output=True, text=True, env=env, cwd=tmp_path
+        )
+
+    run.log = log
+    return run
+
+
+def channel(suffix=""):
+    """Return a channel name not paced by any earlier test run."""
+    return f"C{uuid.uuid4().hex[:12]}{suffix}"
+
+
+def fanout_command(channels):
+    return (
+        """printf '{"channel": "@@FANOUT_CHANNEL@@", "text": "alert"}' > payload.json\n"""
+        f'slack_fanout xoxb-test payload.json "{",".join(channels)}"\n'
+    )
+
+
+def test_post_fails_on_html_error_page(slack):
+    """Test that a 5xx HTML page is reported as a failed post."""
+    result = slack(
+        f"""printf '{{"channel": "{channel("-broken")}"}}' > p.json\nslack_post xoxb-test p.json\n"""
+    )
+    assert result.returncode == 1
+    assert "⚠️ Slack chat.postMessage returned an error" in result.stderr
+
+
+def test_fanout_delivers_other_channels_after_a_failure(slack, tmp_path):
+    """Test that one channel's failure does not affect another channel."""
+    ok, broken = channel(), channel("-broken")
+    result = slack(fanout_command([ok, broken]))
+
+    assert result.returncode == 0
+    assert json.loads(result.stdout)["channel"] == ok
+    report = json.loads((tmp_path / "payload.json.report.json").read_text())
+    assert (report["delivered"], report["failed"]) == (1, 1)
+    assert {c["channel"]: c["ok"] for c in report["channels"]} == {ok: True, broken: False}
+
+
+def test_fanout_fails_when_first_channel_is_not_delivered(slack):
+    """Test that the step fails when the primary channel was not delivered."""
+    assert slack(fanout_command([channel("-broken"), channel()])).returncode == 1
+
+
+def test_fanout_retries_after_rate_limit(slack):
+    """Test that a rate-limited send is retried after Retry-After and delivered."""
+    limited = channel("-limited")
+    started = time.monotonic()
+    result = slack(fanout_command([limited]))
+
+    assert result.returncode == 0
+    assert slack.log.read_text().split() == [limited, limited]
+    assert time.monotonic() - started >= 1
+
+
+def test_pace_spaces_posts_per_channel(slack):
+    """Test that posts to one channel are a second apart and other channels are not held."""
+    busy, other = channel(), channel()
+    result = slack(
+        f"a=$(date +%s%N); slack_pace {busy}; slack_pace {other}\n"
+        f"slack_pace {busy}; b=$(date +%s%N)\n"
+        f"slack_pace {other}; c=$(date +%s%N)\n"
+        "echo $(( (b - a) / 1000000 )) $(( (c - b) / 1000000 ))\n"
+    )
+    busy_ms, other_ms = map(int, result.stdout.split())
+
+    assert 800 <= busy_ms < 1500
+    assert other_ms < 300
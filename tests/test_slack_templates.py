@@ -0,0 +1,85 @@
+"""
+Tests for JSON-safe rendering of the compiled Block Kit templates.
+"""
+
+import json
+import subprocess
+
+import pytest
+
+from utils.slack_templates import CompiledTemplate, SlackBlockKitTemplates
+from workflows.step_library import StepLibrary
+
+NASTY = 'DB "primary" down\\ again\n50% of {requests} fail\t— it\'s $HOME'
+
+TEMPLATE = CompiledTemplate(
+    "test",
+    {
+        "channel": "{channel}",
+        "text": "🚨 {title}",
+        "blocks": [
+            {"type": "section", "text": {"type": "mrkdwn", "text": "*{title}* ({sev|low})"}}
+        ],
+    },
+)
+
+
+def run_shell(command, **substitutions):
+    """Run a linked step command after substituting workflow references, as the engine would."""
+    for reference, value in substitutions.items():
+        command = command.replace("${" + reference + "}", value)
+    command = StepLibrary.default().link(command) + "cat payload.json\n"
+    result = subprocess.run(["bash", "-c", command], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def test_render_escapes_values_into_valid_json():
+    """Test that quotes, backslashes, newlines and braces in values keep the payload valid."""
+    payload = TEMPLATE.render(channel="C1", title=NASTY)
+    assert payload["text"] == f"🚨 {NASTY}"
+    assert payload["blocks"][0]["text"]["text"] == f"*{NASTY}* (low)"
+
+
+def test_render_requires_values_without_default():
+    """Test that a placeholder without default and without value is an error."""
+    with pytest.raises(ValueError, match="missing values: title"):
+        TEMPLATE.render_json(channel="C1")
+
+
+def test_shell_command_escapes_workflow_references_on_the_runner(tmp_path, monkeypatch):
+    """Test that ${...} values substituted by the engine are escaped by the step."""
+    monkeypatch.chdir(tmp_path)
+    command = TEMPLATE.shell_command("payload.json", channel="C1", title="${incident_title}")
+    payload = run_shell(command, incident_title=NASTY)
+    assert payload["blocks"][0]["text"]["text"] == f"*{NASTY}* (low)"
+
+
+def test_shell_command_escapes_shell_variables(tmp_path, monkeypatch):
+    """Test that $NAME values are piped into the payload without shell expansion of their text."""
+    monkeypatch.chdir(tmp_path)
+    command = f"SEV=''\nTITLE=$(cat << 'EOF'\n{NASTY}\nEOF\n)\n" + TEMPLATE.shell_command(
+        "payload.json", channel="C1", title="$TITLE", sev="$SEV"
+    )
+    payload = run_shell(command)
+    assert payload["text"] == f"🚨 {NASTY}"
+    assert payload["blocks"][0]["text"]["text"].endswith("(low)")
+
+
+def test_incident_alert_renders_from_workflow_references(tmp_path, monkeypatch):
+    """Test that the incident alert step payload stays valid for hostile incident fields."""
+    monkeypatch.chdir(tmp_path)
+    fields = {
+        name: "${" + name + "}"
+        for name in (
+            "incident_title",
+            "incident_id",
+            "incident_severity",
+            "incident_priority",
+            "incident_body",
+            "incident_url",
+        )
+    }
+    alert = SlackBlockKitTemplates.incident_alert_blocks(**fields, channel="C1")
+    payload = run_shell(alert.shell_command("payload.json"), **{k: NASTY for k in fields})
+    assert payload["channel"] == "C1"
+    assert payload["text"].endswith(NASTY)
@@ -0,0 +1,40 @@
+"""
+Tests for linking step library functions into step commands.
+"""
+
+import subprocess
+
+import pytest
+
+from workflows.step_library import StepLibrary
+
+
+def test_link_includes_called_functions_and_their_callees():
+    """Test that a step carries the functions it calls and those they call in turn."""
+    library = StepLibrary.default()
+    command = library.link(library.header("notify") + 'lifecycle_stage "$T" C1 1.2 INC-1 h s 0\n')
+
+    for name in ("step_preamble", "lifecycle_stage", "slack_post", "json_escape"):
+        assert f"{name}() {{" in command
+    assert "slack_fanout() {" not in command
+    assert "# Usage" not in command
+
+
+def test_link_leaves_commands_without_library_calls_unchanged():
+    """Test that a command calling no library function is not modified."""
+    assert StepLibrary.default().link('echo "ok"\n') == 'echo "ok"\n'
+
+
+def test_linked_command_runs_without_other_steps():
+    """Test that a linked step runs on its own, with no file left by another step."""
+    library = StepLibrary.default()
+    command = library.link(library.header("select") + "printf 'a\\nb' | clip_text 100\n")
+    result = subprocess.run(["bash", "-c", command], capture_output=True, text=True, check=True)
+    assert result.stdout.splitlines()[0] == "🔍 DEBUG: select step starting"
+    assert result.stdout.splitlines()[-1] == "a b"
+
+
+def test_register_rejects_workflow_expansions():
+    """Test that functions using ${...} are rejected, as the engine would substitute them."""
+    with pytest.raises(ValueError, match="must not use"):
+        StepLibrary().register("broken", 'broken() { echo "${HOME}"; }')
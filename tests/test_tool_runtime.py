@@ -0,0 +1,58 @@
+"""
+Tests for the in-process tool server.
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from tools.tool_runtime import PythonToolRuntime, serve
+
+
+@pytest.fixture
+def server():
+    runtime = PythonToolRuntime({"resolver_help": ("service_resolver", ["--help"])})
+    routes = {"/echo": lambda args, headers: (200, args)}
+    server = serve(runtime, "s3cret", port=0, routes=routes)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.runtime = runtime
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, secret=None):
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers["Authorization"] = f"Bearer {secret}"
+    request = urllib.request.Request(url, data=b"{}", headers=headers, method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_tool_calls_require_the_shared_secret(server):
+    """Test that /tools/<name> runs nothing for callers without the secret."""
+    assert post(f"{server.url}/tools/resolver_help") == 401
+    assert post(f"{server.url}/tools/resolver_help", "wrong") == 401
+    assert server.runtime.calls == 0
+
+    assert post(f"{server.url}/tools/resolver_help", "s3cret") == 200
+    assert server.runtime.calls == 1
+
+
+def test_extra_routes_check_their_own_credentials(server):
+    """Test that extra routes such as /retrigger are handed the request as is."""
+    assert post(f"{server.url}/echo") == 200
+
+
+def test_serve_requires_a_secret():
+    """Test that the tool server is never started without a shared secret."""
+    with pytest.raises(ValueError, match="shared secret"):
+        serve(PythonToolRuntime({}), "", port=0)
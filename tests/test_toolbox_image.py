@@ -0,0 +1,41 @@
+"""
+Tests for requiring the toolbox image only when workflows are submitted.
+"""
+
+import pytest
+
+from core.config import IncidentConfig
+from core.workflow import IncidentWorkflow
+from tools import kubernetes_tools
+
+
+@pytest.fixture
+def incident():
+    config = IncidentConfig(
+        incident_id="INC-1",
+        incident_title="Checkout errors",
+        incident_severity="high",
+        incident_body="5xx on checkout",
+        incident_url="https://example.com/INC-1",
+        kubiya_api_key="key",
+    )
+    return IncidentWorkflow(config)
+
+
+def test_workflow_and_agent_build_without_toolbox_image(incident, monkeypatch):
+    """Test that exporting works while INCIDENT_TOOLBOX_IMAGE is unset."""
+    monkeypatch.setattr(kubernetes_tools, "TOOLBOX_IMAGE", "")
+    assert incident.to_dict()["steps"]
+    assert incident.create_service_validation_agent()["tools"]
+
+
+def test_submission_requires_toolbox_image(incident, monkeypatch):
+    """Test that a workflow with container tool steps is not submitted without an image."""
+    monkeypatch.setattr(kubernetes_tools, "TOOLBOX_IMAGE", "")
+    workflow = incident.create_incident_response()
+    with pytest.raises(ValueError, match=kubernetes_tools.TOOLBOX_IMAGE_ENV):
+        incident._prepare_request(workflow, {})
+
+    monkeypatch.setattr(kubernetes_tools, "TOOLBOX_IMAGE", "registry/toolbox:1")
+    _, _, payload = incident._prepare_request(incident.create_incident_response(), {})
+    assert payload["steps"]
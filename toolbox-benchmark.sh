@@ -0,0 +1,159 @@
+#!/bin/bash
+# Startup-time comparison of the Kubernetes tool containers before and after the toolbox image
+set -e
+
+echo "⏱️  Comparing tool container startup times..."
+
+# Colors for output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m' # No Color
+
+# Configuration
+TOOLBOX_IMAGE="${INCIDENT_TOOLBOX_IMAGE:-}"
+RUNS=5
+COLD=false
+RECORD=""
+
+while [[ $# -gt 0 ]]; do
+    case $1 in
+        --runs|-r)
+            RUNS="$2"
+            shift 2
+            ;;
+        --image|-i)
+            TOOLBOX_IMAGE="$2"
+            shift 2
+            ;;
+        --cold)
+            COLD=true
+            shift
+            ;;
+        --record)
+            RECORD="$2"
+            shift 2
+            ;;
+        --help|-h)
+            echo "Usage: $0 [OPTIONS]"
+            echo "Options:"
+            echo "  --runs, -r N         Warm runs per tool (default: 5)"
+            echo "  --image, -i IMAGE    Toolbox image (default: \$INCIDENT_TOOLBOX_IMAGE)"
+            echo "  --cold               Also time the first run after removing the registry images (includes the pull)"
+            echo "  --record FILE        Append the results as a dated Markdown table to FILE"
+            echo "  --help, -h           Show this help message"
+            exit 0
+            ;;
+        *)
+            echo -e "${RED}Unknown option: $1${NC}"
+            exit 1
+            ;;
+    esac
+done
+
+if [ -z "$TOOLBOX_IMAGE" ]; then
+    echo -e "${RED}❌ No toolbox image; set INCIDENT_TOOLBOX_IMAGE or pass --image${NC}"
+    exit 1
+fi
+
+if ! docker image inspect "$TOOLBOX_IMAGE" >/dev/null 2>&1 && ! docker pull -q "$TOOLBOX_IMAGE" >/dev/null 2>&1; then
+    echo -e "${RED}❌ Toolbox image $TOOLBOX_IMAGE not found; build it with ./docker-build.sh --toolbox${NC}"
+    exit 1
+fi
+
+# Startup work each tool did before any investigation, with the image it ran on.
+# Python tools import the stdlib modules used by tools/kube_client.py.
+PYTHON_STARTUP='python -c "import json, ssl, subprocess, urllib.request"'
+# Kept on one line: each TOOLS entry is read as a single line
+HELM_STARTUP_BEFORE='apk add --no-cache curl >/dev/null && curl -sLO "https://dl.k8s.io/release/$(curl -L -s https://dl.k8s.io/release/stable.txt)/bin/linux/amd64/kubectl" && chmod +x kubectl && mv kubectl /usr/local/bin/ && helm version --short'
+
+TOOLS=(
+    "kubectl_get_services|python:3.11-slim|$PYTHON_STARTUP|$PYTHON_STARTUP"
+    "validate_service_exists|python:3.11-slim|$PYTHON_STARTUP|$PYTHON_STARTUP"
+    "kubectl_cluster_investigation|bitnami/kubectl:latest|kubectl version --client|kubectl version --client"
+    "kubectl_cluster_snapshot|python:3.11-slim|$PYTHON_STARTUP|$PYTHON_STARTUP"
+    "helm_deployments_check|alpine/helm:latest|$HELM_STARTUP_BEFORE|$PYTHON_STARTUP"
+)
+
+# Seconds taken by one container run of a startup command
+time_run() {
+    local image="$1" command="$2" start end
+    start=$(date +%s.%N)
+    docker run --rm --entrypoint sh "$image" -c "$command" >/dev/null 2>&1 || return 1
+    end=$(date +%s.%N)
+    awk -v start="$start" -v end="$end" 'BEGIN { printf "%.2f", end - start }'
+}
+
+# Median of warm runs (image already pulled)
+median_run() {
+    local image="$1" command="$2" times=() i
+    docker image inspect "$image" >/dev/null 2>&1 || docker pull -q "$image" >/dev/null
+    for ((i = 0; i < RUNS; i++)); do
+        times+=("$(time_run "$image" "$command" || echo failed)")
+    done
+    printf '%s\n' "${times[@]}" | sort -n | sed -n "$(((RUNS + 1) / 2))p"
+}
+
+# First run after removing a registry image, so the pull is included
+cold_run() {
+    local image="$1" command="$2"
+    docker pull -q "$image" >/dev/null 2>&1 || { echo "n/a"; return; }
+    docker rmi -f "$image" >/dev/null 2>&1 || true
+    local start end
+    start=$(date +%s.%N)
+    docker pull -q "$image" >/dev/null 2>&1
+    time_run "$image" "$command" >/dev/null || { echo "failed"; return; }
+    end=$(date +%s.%N)
+    awk -v start="$start" -v end="$end" 'BEGIN { printf "%.2f", end - start }'
+}
+
+echo -e "${BLUE}📦 Toolbox image: $TOOLBOX_IMAGE${NC}"
+echo -e "${BLUE}🔁 Warm runs per tool: $RUNS (median reported)${NC}"
+echo ""
+
+printf "%-32s %-24s %12s %12s" "TOOL" "BEFORE IMAGE" "BEFORE (s)" "AFTER (s)"
+[ "$COLD" = true ] && printf " %12s %12s" "BEFORE COLD" "AFTER COLD"
+printf "\n"
+
+ROWS=()
+for entry in "${TOOLS[@]}"; do
+    IFS='|' read -r tool before_image before_command after_command <<< "$entry"
+    before=$(median_run "$before_image" "$before_command")
+    after=$(median_run "$TOOLBOX_IMAGE" "$after_command")
+    printf "%-32s %-24s %12s %12s" "$tool" "$before_image" "$before" "$after"
+    row="| $tool | $before_image | $before | $after |"
+    if [ "$COLD" = true ]; then
+        # A locally built toolbox cannot be pulled again, so only registry images are timed cold
+        before_cold=$(cold_run "$before_image" "$before_command")
+        after_cold=$(cold_run "$TOOLBOX_IMAGE" "$after_command")
+        printf " %12s %12s" "$before_cold" "$after_cold"
+        row="$row $before_cold | $after_cold |"
+    fi
+    printf "\n"
+    ROWS+=("$row")
+done
+
+# Dated record of the run, so numbers from different hosts and images can be compared later
+if [ -n "$RECORD" ]; then
+    {
+        echo ""
+        echo "### $(date -u +%Y-%m-%dT%H:%M:%SZ) on $(uname -sm), Docker $(docker version --format '{{.Server.Version}}' 2>/dev/null || echo unknown)"
+        echo ""
+        echo "Toolbox image \`$TOOLBOX_IMAGE\`, median of $RUNS warm runs in seconds."
+        echo ""
+        if [ "$COLD" = true ]; then
+            echo "| Tool | Before image | Before | After | Before cold | After cold |"
+            echo "|------|--------------|--------|-------|-------------|------------|"
+        else
+            echo "| Tool | Before image | Before | After |"
+            echo "|------|--------------|--------|-------|"
+        fi
+        printf '%s\n' "${ROWS[@]}"
+    } >> "$RECORD"
+    echo -e "${BLUE}📝 Results appended to $RECORD${NC}"
+fi
+
+echo ""
+echo -e "${GREEN}✅ Startup comparison complete${NC}"
+echo -e "${YELLOW}💡 BEFORE times helm_deployments_check including its apk install and kubectl download${NC}"
@@ -0,0 +1,383 @@
+"""
+Watch-based in-memory cluster state cache for long-running deployments.
+
+Each resource kind is listed once and then followed with continuous watches
+resumed from the last seen ``resourceVersion``, informer style. A kind is
+re-listed only when its version has expired. Events are retained for a bounded
+time and count. Investigation queries (snapshot summaries, pods by app label,
+recent warnings) are answered from memory instead of re-listing the cluster,
+so concurrent incidents against one cluster add no API server load.
+
+Run with ``kubiya-incident cluster-cache --port 8787`` and point the tools at it
+with ``INCIDENT_CLUSTER_CACHE_URL`` (see ``kube_client.query_cluster_cache``).
+Queries must carry the shared secret of ``INCIDENT_RETRIGGER_SECRET`` as a
+bearer token; only ``/healthz`` is open, for probes.
+"""
+
+import heapq
+import json
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from .cluster_snapshot import METRICS_RESOURCES, SNAPSHOT_RESOURCES, ClusterSnapshot, summarize
+from .event_window import EVENT_WINDOW, TOP_EVENTS, event_summary, event_time
+from .kube_client import KubeAPIError, KubeClient, bearer_authorized
+
+CACHE_RESOURCES = {**SNAPSHOT_RESOURCES, "endpoints": "/api/v1/endpoints"}
+# Server-side watch timeout; kept below the client read timeout so idle watches end cleanly
+WATCH_SECONDS = 25
+EVENT_RETENTION = 6 * 3600
+MAX_EVENTS = 50000
+PRUNE_INTERVAL = 60
+RETRY_DELAY = 5
+# Consecutive failures back off exponentially up to this many seconds
+MAX_RETRY_DELAY = 60
+# A kind without a completed list or watch for this long is reported stale by /healthz
+STALE_AFTER = 4 * WATCH_SECONDS + MAX_RETRY_DELAY
+
+
+class _WatchExpired(Exception):
+    """The resourceVersion to resume from is no longer available."""
+
+
+def _key(obj: Dict[str, Any]) -> str:
+    """Get the ``namespace/name`` key of an API object."""
+    return f"{obj['metadata'].get('namespace', '')}/{obj['metadata']['name']}"
+
+
+def _trim(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop the bookkeeping fields no investigation query reads."""
+    metadata = obj.get("metadata") or {}
+    metadata.pop("managedFields", None)
+    (metadata.get("annotations") or {}).pop(
+        "kubectl.kubernetes.io/last-applied-configuration", None
+    )
+    return obj
+
+
+class ClusterStateCache:
+    """Informer-style cache of nodes, pods, services, endpoints and events."""
+
+    def __init__(
+        self,
+        client: KubeClient,
+        event_retention: int = EVENT_RETENTION,
+        max_events: int = MAX_EVENTS,
+        watch_seconds: int = WATCH_SECONDS,
+    ):
+        """Initialize an empty cache; call ``start`` to list and watch the cluster.
+
+        Args:
+            client: Kubernetes API client
+            event_retention: Events last seen longer ago than this many seconds are dropped
+            max_events: Maximum events retained; the least recently updated are dropped first
+            watch_seconds: Server-side timeout of each watch request
+        """
+        self.client = client
+        self.event_retention = event_retention
+        self.max_events = max_events
+        self.watch_seconds = watch_seconds
+
+        self.stores: Dict[str, "OrderedDict[str, Dict[str, Any]]"] = {
+            kind: OrderedDict() for kind in CACHE_RESOURCES
+        }
+        self.versions: Dict[str, str] = {}
+        self.relists: Dict[str, int] = {kind: 0 for kind in CACHE_RESOURCES}
+        self.events_applied = 0
+        self.errors: Dict[str, str] = {}
+        self.progress_at: Dict[str, float] = {kind: time.time() for kind in CACHE_RESOURCES}
+        self._pruned_at = 0.0
+
+        self._lock = threading.Lock()
+        self._synced = {kind: threading.Event() for kind in CACHE_RESOURCES}
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> "ClusterStateCache":
+        """Start one list-and-watch thread per resource kind."""
+        for kind in CACHE_RESOURCES:
+            thread = threading.Thread(
+                target=self._run, args=(kind,), name=f"informer-{kind}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self) -> None:
+        """Stop watching; threads exit when their current watch request ends."""
+        self._stop.set()
+
+    def wait_synced(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every kind has completed its initial list.
+
+        Returns:
+            Whether all kinds are synced
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for synced in self._synced.values():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not synced.wait(remaining):
+                return False
+        return True
+
+    def _run(self, kind: str) -> None:
+        """List a kind, then keep watching it, re-listing only when the version expires.
+
+        No failure ends the thread: every error is recorded and retried with
+        exponential backoff.
+        """
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                if kind not in self.versions:
+                    self._relist(kind)
+                self._watch(kind)
+                self.errors.pop(kind, None)
+                self.progress_at[kind] = time.time()
+                failures = 0
+                continue
+            except _WatchExpired:
+                self.versions.pop(kind, None)
+                continue
+            except KubeAPIError as e:
+                self.errors[kind] = str(e)
+                if e.status == 410:
+                    self.versions.pop(kind, None)
+            except Exception as e:
+                # A malformed object must not kill the informer; relist from scratch
+                self.errors[kind] = f"{type(e).__name__}: {e}"
+                self.versions.pop(kind, None)
+            failures += 1
+            self._stop.wait(min(RETRY_DELAY * 2 ** (failures - 1), MAX_RETRY_DELAY))
+
+    def unhealthy(self) -> Dict[str, str]:
+        """Get the kinds whose informer is not synced, has died or has stopped making progress."""
+        now = time.time()
+        alive = {thread.name[len("informer-") :]: thread.is_alive() for thread in self._threads}
+        problems = {}
+        for kind in CACHE_RESOURCES:
+            if self._threads and not alive.get(kind, False):
+                problems[kind] = "informer thread died"
+            elif not self._synced[kind].is_set():
+                problems[kind] = "not synced"
+            elif now - self.progress_at[kind] > STALE_AFTER:
+                problems[kind] = f"stale for {int(now - self.progress_at[kind])}s"
+        return problems
+
+    def _relist(self, kind: str) -> None:
+        """Replace a kind with a full paged listing."""
+        items, version = self.client.list(CACHE_RESOURCES[kind])
+        if kind == "events":
+            # Oldest first, matching the eviction order of watched updates
+            items.sort(key=lambda e: event_time(e) or 0)
+        store = OrderedDict((_key(item), _trim(item)) for item in items)
+        with self._lock:
+            self.stores[kind] = store
+            self.versions[kind] = version
+            self.relists[kind] += 1
+            if kind == "events":
+                self._prune_events()
+        self._synced[kind].set()
+        self.progress_at[kind] = time.time()
+
+    def _watch(self, kind: str) -> None:
+        """Apply watch events of a kind from its last resourceVersion until the watch ends."""
+        for event in self.client.watch(
+            CACHE_RESOURCES[kind],
+            resourceVersion=self.versions[kind],
+            timeoutSeconds=self.watch_seconds,
+            allowWatchBookmarks="true",
+        ):
+            if self._stop.is_set():
+                return
+            obj = event.get("object") or {}
+            kind_of_change = event.get("type")
+            if kind_of_change == "ERROR":
+                # 410 Gone: the version was compacted away and a relist is required
+                raise _WatchExpired(obj.get("message", "watch error"))
+
+            with self._lock:
+                store = self.stores[kind]
+                if kind_of_change in ("ADDED", "MODIFIED"):
+                    key = _key(obj)
+                    store[key] = _trim(obj)
+                    store.move_to_end(key)
+                    if kind == "events":
+                        while len(store) > self.max_events:
+                            store.popitem(last=False)
+                        if time.time() - self._pruned_at > PRUNE_INTERVAL:
+                            self._prune_events()
+                elif kind_of_change == "DELETED":
+                    store.pop(_key(obj), None)
+                self.versions[kind] = obj.get("metadata", {}).get(
+                    "resourceVersion", self.versions[kind]
+                )
+                self.events_applied += kind_of_change != "BOOKMARK"
+
+    def _prune_events(self) -> None:
+        """Drop expired events, then the least recently updated beyond ``max_events`` (lock held)."""
+        store = self.stores["events"]
+        self._pruned_at = time.time()
+        cutoff = self._pruned_at - self.event_retention
+        for key in [k for k, e in store.items() if (event_time(e) or 0) < cutoff]:
+            del store[key]
+        while len(store) > self.max_events:
+            store.popitem(last=False)
+
+    def snapshot(self, include_metrics: bool = True) -> ClusterSnapshot:
+        """Get the cached nodes, pods, services and events as a cluster snapshot.
+
+        Args:
+            include_metrics: Also fetch node and pod metrics, which cannot be watched
+        """
+        start = time.monotonic()
+        with self._lock:
+            items = {kind: list(self.stores[kind].values()) for kind in SNAPSHOT_RESOURCES}
+            errors = dict(self.errors)
+        if include_metrics:
+            for kind, path in METRICS_RESOURCES.items():
+                try:
+                    items[kind] = self.client.get(path).get("items") or []
+                except KubeAPIError:
+                    items[kind] = []
+        return ClusterSnapshot(items, errors, time.time(), time.monotonic() - start)
+
+    def summary(
+        self, services: Optional[List[str]] = None, event_window: int = EVENT_WINDOW
+    ) -> Dict[str, Any]:
+        """Get the investigation summary of ``cluster_snapshot.summarize`` from memory."""
+        return summarize(self.snapshot(), services, event_window=event_window)
+
+    def pods(
+        self, app: Optional[str] = None, namespace: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Get cached pods, optionally by ``app`` label and namespace."""
+        with self._lock:
+            pods = list(self.stores["pods"].values())
+        return [
+            pod
+            for pod in pods
+            if (app is None or (pod["metadata"].get("labels") or {}).get("app") == app)
+            and (namespace is None or pod["metadata"].get("namespace") == namespace)
+        ]
+
+    def events(
+        self,
+        window: int = EVENT_WINDOW,
+        top: int = TOP_EVENTS,
+        event_type: Optional[str] = "Warning",
+    ) -> Dict[str, Any]:
+        """Get the newest events of a time window, in the ``event_window`` result shape."""
+        if top < 1:
+            raise ValueError("top must be at least 1")
+        cutoff = time.time() - window
+        with self._lock:
+            events = list(self.stores["events"].values())
+
+        heap: List[Any] = []
+        matched = 0
+        for i, event in enumerate(events):
+            when = event_time(event)
+            if when is None or when < cutoff or (event_type and event.get("type") != event_type):
+                continue
+            matched += 1
+            if len(heap) < top:
+                heapq.heappush(heap, (when, i, event))
+            elif when > heap[0][0]:
+                heapq.heapreplace(heap, (when, i, event))
+        return {
+            "events": [event_summary(event, when) for when, _, event in sorted(heap, reverse=True)],
+            "matched": matched,
+            "scanned": len(events),
+            "pages": 0,
+            "window": window,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Get object counts, resume versions and relist counts per kind."""
+        with self._lock:
+            return {
+                "synced": {kind: synced.is_set() for kind, synced in self._synced.items()},
+                "objects": {kind: len(store) for kind, store in self.stores.items()},
+                "versions": dict(self.versions),
+                "relists": dict(self.relists),
+                "events_applied": self.events_applied,
+                "errors": dict(self.errors),
+                "unhealthy": self.unhealthy(),
+            }
+
+
+def _handler(cache: ClusterStateCache, secret: str):
+    """Build the HTTP request handler class serving a cache to holders of the secret."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            query = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+            try:
+                if url.path == "/healthz":
+                    body = cache.stats()
+                    status = 503 if body["unhealthy"] else 200
+                elif not bearer_authorized(self.headers, secret):
+                    status, body = 401, {"error": "missing or invalid shared secret"}
+                elif url.path == "/summary":
+                    services = [
+                        s
+                        for s in query.get("services", "").split(",")
+                        if s.strip() and s.strip() != "all"
+                    ]
+                    status, body = 200, cache.summary(
+                        services, int(query.get("event_window", EVENT_WINDOW))
+                    )
+                elif url.path == "/events":
+                    status, body = 200, cache.events(
+                        int(query.get("window", EVENT_WINDOW)),
+                        int(query.get("top", TOP_EVENTS)),
+                        query.get("type", "Warning") or None,
+                    )
+                elif url.path == "/pods":
+                    status, body = 200, {
+                        "items": cache.pods(query.get("app"), query.get("namespace"))
+                    }
+                else:
+                    status, body = 404, {"error": f"unknown path {url.path}"}
+            except ValueError as e:
+                status, body = 400, {"error": str(e)}
+
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(
+    cache: ClusterStateCache, secret: str, host: str = "127.0.0.1", port: int = 8787
+) -> ThreadingHTTPServer:
+    """Create the HTTP server answering investigation queries from a cache.
+
+    Args:
+        cache: Started cluster state cache
+        secret: Shared secret callers send as ``Authorization: Bearer <secret>``
+        host: Bind address
+        port: Bind port
+
+    Returns:
+        The server; call ``serve_forever`` to handle requests
+
+    Raises:
+        ValueError: If the secret is empty
+    """
+    if not secret:
+        raise ValueError("The cluster cache requires a shared secret")
+    return ThreadingHTTPServer((host, port), _handler(cache, secret))
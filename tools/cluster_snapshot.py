@@ -0,0 +1,371 @@
+"""
+Bulk cluster snapshot collector for incident investigation.
+
+Nodes, pods, services and events are fetched as JSON in one request each,
+all in parallel, and the anomaly summary is computed locally. This replaces
+a series of human-formatted kubectl listings parsed with awk, each a full
+API server round trip.
+
+Run as ``python -m incident_tools.cluster_snapshot --services a,b`` inside a
+tool container, or import ``collect_snapshot`` and ``summarize`` directly.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .event_window import event_summary, event_time
+from .kube_client import CLUSTER_CACHE_URL_ENV, KubeAPIError, KubeClient, query_cluster_cache
+
+# One bulk list request per resource kind
+SNAPSHOT_RESOURCES = {
+    "nodes": "/api/v1/nodes",
+    "pods": "/api/v1/pods",
+    "services": "/api/v1/services",
+    "events": "/api/v1/events",
+}
+# Only warnings are reported, so other events are filtered out server-side
+RESOURCE_PARAMS = {"events": {"fieldSelector": "type=Warning"}}
+METRICS_RESOURCES = {
+    "node_metrics": "/apis/metrics.k8s.io/v1beta1/nodes",
+    "pod_metrics": "/apis/metrics.k8s.io/v1beta1/pods",
+}
+
+RESTART_THRESHOLD = 5
+EVENT_WINDOW = 3600
+MAX_ITEMS = 20
+
+
+class ClusterSnapshot(NamedTuple):
+    """Items of every collected resource kind, keyed by kind."""
+
+    items: Dict[str, List[Dict[str, Any]]]
+    errors: Dict[str, str]
+    collected_at: float
+    duration: float
+
+
+def collect_snapshot(
+    client: KubeClient, include_metrics: bool = True, max_workers: int = 6
+) -> ClusterSnapshot:
+    """Fetch all snapshot resources in parallel.
+
+    Args:
+        client: Kubernetes API client
+        include_metrics: Also fetch node and pod metrics (skipped quietly when absent)
+        max_workers: Maximum concurrent requests
+
+    Returns:
+        The collected snapshot; kinds that failed are listed in ``errors``
+    """
+    resources = dict(SNAPSHOT_RESOURCES)
+    if include_metrics:
+        resources.update(METRICS_RESOURCES)
+
+    start = time.monotonic()
+    items: Dict[str, List[Dict[str, Any]]] = {}
+    errors: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            kind: executor.submit(client.get, path, **RESOURCE_PARAMS.get(kind, {}))
+            for kind, path in resources.items()
+        }
+        for kind, future in futures.items():
+            try:
+                items[kind] = future.result().get("items") or []
+            except KubeAPIError as e:
+                items[kind] = []
+                # A cluster without metrics-server is not an error worth reporting
+                if kind not in METRICS_RESOURCES:
+                    errors[kind] = str(e)
+
+    return ClusterSnapshot(items, errors, time.time(), time.monotonic() - start)
+
+
+def _quantity(value: str) -> float:
+    """Convert a CPU (cores) or memory (bytes) quantity string to a number."""
+    suffixes = {
+        "n": 1e-9,
+        "u": 1e-6,
+        "m": 1e-3,
+        "Ki": 2**10,
+        "Mi": 2**20,
+        "Gi": 2**30,
+        "Ti": 2**40,
+        "k": 1e3,
+        "M": 1e6,
+        "G": 1e9,
+        "T": 1e12,
+    }
+    for suffix in sorted(suffixes, key=len, reverse=True):
+        if value.endswith(suffix):
+            return float(value[: -len(suffix)]) * suffixes[suffix]
+    return float(value)
+
+
+def _pod_summary(pod: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a pod to the fields shown in the investigation summary."""
+    statuses = pod.get("status", {}).get("containerStatuses") or []
+    waiting = [
+        s["state"]["waiting"].get("reason", "Waiting")
+        for s in statuses
+        if (s.get("state") or {}).get("waiting")
+    ]
+    return {
+        "namespace": pod["metadata"].get("namespace", ""),
+        "name": pod["metadata"]["name"],
+        "phase": pod.get("status", {}).get("phase", "Unknown"),
+        "restarts": sum(s.get("restartCount", 0) for s in statuses),
+        "reason": ", ".join(waiting) or pod.get("status", {}).get("reason", ""),
+        "node": pod.get("spec", {}).get("nodeName", ""),
+    }
+
+
+def summarize(
+    snapshot: ClusterSnapshot,
+    services: Optional[List[str]] = None,
+    restart_threshold: int = RESTART_THRESHOLD,
+    event_window: int = EVENT_WINDOW,
+    max_items: int = MAX_ITEMS,
+) -> Dict[str, Any]:
+    """Compute the anomaly summary of a snapshot.
+
+    Args:
+        snapshot: Collected snapshot
+        services: Affected service names to report on (pods matched by ``app`` label)
+        restart_threshold: Restart count above which a running pod is reported
+        event_window: Only events from the last this many seconds are reported
+        max_items: Maximum entries per list in the summary
+
+    Returns:
+        JSON-serializable summary
+    """
+    items = snapshot.items
+    pods = [_pod_summary(p) for p in items.get("pods", [])]
+
+    nodes = []
+    for node in items.get("nodes", []):
+        conditions = {
+            c["type"]: c["status"] for c in node.get("status", {}).get("conditions") or []
+        }
+        pressure = [t for t, s in conditions.items() if t != "Ready" and s == "True"]
+        nodes.append(
+            {
+                "name": node["metadata"]["name"],
+                "ready": conditions.get("Ready") == "True",
+                "unschedulable": bool(node.get("spec", {}).get("unschedulable")),
+                "pressure": pressure,
+            }
+        )
+
+    cutoff = snapshot.collected_at - event_window
+    warnings = []
+    for event in items.get("events", []):
+        when = event_time(event)
+        if event.get("type") != "Warning" or when is None or when < cutoff:
+            continue
+        warnings.append(event_summary(event, when))
+    warnings.sort(key=lambda e: e["time"], reverse=True)
+
+    wanted = {s.strip() for s in services or [] if s.strip()}
+    service_namespaces: Dict[str, List[str]] = {name: [] for name in wanted}
+    for service in items.get("services", []):
+        name = service["metadata"]["name"]
+        if name in wanted:
+            service_namespaces[name].append(service["metadata"].get("namespace", ""))
+    service_pods: Dict[str, List[Dict[str, Any]]] = {name: [] for name in wanted}
+    for pod, raw in zip(pods, items.get("pods", [])):
+        app = (raw["metadata"].get("labels") or {}).get("app")
+        if app in wanted:
+            service_pods[app].append(pod)
+
+    service_report = {}
+    for name in sorted(wanted):
+        service_report[name] = {
+            "found": bool(service_namespaces[name]),
+            "namespaces": sorted(service_namespaces[name]),
+            "pods": len(service_pods[name]),
+            "unhealthy_pods": [
+                p
+                for p in service_pods[name]
+                if p["phase"] != "Running" or p["restarts"] > restart_threshold
+            ][:max_items],
+        }
+
+    high_restarts = sorted(
+        (p for p in pods if p["phase"] == "Running" and p["restarts"] > restart_threshold),
+        key=lambda p: p["restarts"],
+        reverse=True,
+    )
+    failed = [p for p in pods if p["phase"] not in ("Running", "Succeeded")]
+
+    node_usage = sorted(
+        (
+            {
+                "name": m["metadata"]["name"],
+                "cpu_cores": round(_quantity(m["usage"]["cpu"]), 3),
+                "memory_mib": round(_quantity(m["usage"]["memory"]) / 2**20),
+            }
+            for m in items.get("node_metrics", [])
+        ),
+        key=lambda n: n["memory_mib"],
+        reverse=True,
+    )
+    pod_usage = sorted(
+        (
+            {
+                "namespace": m["metadata"].get("namespace", ""),
+                "name": m["metadata"]["name"],
+                "memory_mib": round(
+                    sum(_quantity(c["usage"]["memory"]) for c in m.get("containers", [])) / 2**20
+                ),
+            }
+            for m in items.get("pod_metrics", [])
+        ),
+        key=lambda p: p["memory_mib"],
+        reverse=True,
+    )
+
+    return {
+        "collected_at": snapshot.collected_at,
+        "collection_seconds": round(snapshot.duration, 3),
+        "errors": snapshot.errors,
+        "nodes": {
+            "total": len(nodes),
+            "not_ready": [n for n in nodes if not n["ready"]],
+            "unschedulable": [n["name"] for n in nodes if n["unschedulable"]],
+            "pressure": [n for n in nodes if n["pressure"]],
+        },
+        "namespaces": len({p["namespace"] for p in pods}),
+        "pods": {
+            "total": len(pods),
+            "by_phase": {
+                phase: sum(1 for p in pods if p["phase"] == phase)
+                for phase in sorted({p["phase"] for p in pods})
+            },
+            "high_restarts_total": len(high_restarts),
+            "high_restarts": high_restarts[:max_items],
+            "failed_or_pending_total": len(failed),
+            "failed_or_pending": failed[:max_items],
+        },
+        "services": service_report,
+        "warning_events": {"total": len(warnings), "recent": warnings[:max_items]},
+        "top_nodes": node_usage[:max_items],
+        "top_pods": pod_usage[:10],
+    }
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    """Render a summary as the text report returned to the agent."""
+    lines = ["🔍 KUBERNETES CLUSTER SNAPSHOT", "=============================="]
+    lines.append(f"Collected in {summary['collection_seconds']}s")
+    for kind, error in summary["errors"].items():
+        lines.append(f"⚠️ {kind} unavailable: {error}")
+
+    nodes = summary["nodes"]
+    lines += [
+        "",
+        "1️⃣ CLUSTER OVERVIEW",
+        f"📊 Nodes: {nodes['total']}, not ready: {len(nodes['not_ready'])}",
+    ]
+    lines += [f"  ❌ {n['name']} not ready" for n in nodes["not_ready"]]
+    lines += [f"  ⚠️ {n['name']}: {', '.join(n['pressure'])}" for n in nodes["pressure"]]
+    lines += [f"  🚫 {name} unschedulable" for name in nodes["unschedulable"]]
+    lines.append(f"📊 Namespaces with pods: {summary['namespaces']}")
+
+    pods = summary["pods"]
+    phases = ", ".join(f"{phase}={count}" for phase, count in pods["by_phase"].items())
+    lines += ["", "2️⃣ POD HEALTH ANALYSIS", f"📊 Pods: {pods['total']} ({phases})"]
+    lines.append(f"🔍 Pods with high restart counts: {pods['high_restarts_total']}")
+    lines += [
+        f"  {p['namespace']}/{p['name']}: {p['restarts']} restarts {p['reason']}".rstrip()
+        for p in pods["high_restarts"]
+    ]
+    lines.append(f"🔍 Failed/Pending pods: {pods['failed_or_pending_total']}")
+    lines += [
+        f"  {p['namespace']}/{p['name']}: {p['phase']} {p['reason']}".rstrip()
+        for p in pods["failed_or_pending"]
+    ]
+
+    if summary["services"]:
+        lines += ["", "3️⃣ SERVICE-SPECIFIC INVESTIGATION"]
+        for name, report in summary["services"].items():
+            where = f"in {', '.join(report['namespaces'])}" if report["found"] else "not found"
+            lines.append(f"🔍 {name}: service {where}; {report['pods']} pods (app={name})")
+            lines += [
+                f"  ⚠️ {p['namespace']}/{p['name']}: {p['phase']}, {p['restarts']} restarts {p['reason']}".rstrip()
+                for p in report["unhealthy_pods"]
+            ]
+
+    events = summary["warning_events"]
+    lines += ["", "4️⃣ RECENT EVENTS", f"🔍 Warning events in window: {events['total']}"]
+    for event in events["recent"]:
+        stamp = datetime.fromtimestamp(event["time"], timezone.utc).strftime("%H:%M:%S")
+        lines.append(
+            f"  {stamp} {event['namespace']} {event['object']} {event['reason']} (x{event['count']}): {event['message']}"
+        )
+
+    lines += ["", "5️⃣ RESOURCE UTILIZATION"]
+    if not summary["top_nodes"] and not summary["top_pods"]:
+        lines.append("Metrics server not available")
+    lines += [
+        f"  node {n['name']}: {n['cpu_cores']} cores, {n['memory_mib']} MiB"
+        for n in summary["top_nodes"]
+    ]
+    lines += [
+        f"  pod {p['namespace']}/{p['name']}: {p['memory_mib']} MiB" for p in summary["top_pods"]
+    ]
+
+    lines += ["", "✅ Cluster snapshot completed"]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Collect a snapshot and print the anomaly summary."""
+    parser = argparse.ArgumentParser(description="Bulk Kubernetes cluster snapshot")
+    parser.add_argument("--services", default="", help="Comma-separated affected services")
+    parser.add_argument(
+        "--event-window", type=int, default=EVENT_WINDOW, help="Event window in seconds"
+    )
+    parser.add_argument("--no-metrics", action="store_true", help="Skip the metrics API")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="Output format")
+    parser.add_argument(
+        "--cache-url",
+        default=os.getenv(CLUSTER_CACHE_URL_ENV, ""),
+        help="Answer from a running cluster state cache instead of listing the cluster",
+    )
+    args = parser.parse_args(argv)
+
+    services = [s for s in args.services.split(",") if s.strip() and s.strip() != "all"]
+    summary = None
+    if args.cache_url:
+        try:
+            summary = query_cluster_cache(
+                args.cache_url,
+                "/summary",
+                services=",".join(services),
+                event_window=args.event_window,
+            )
+        except KubeAPIError as e:
+            print(
+                f"⚠️ Cluster cache unavailable, listing the cluster directly: {e}", file=sys.stderr
+            )
+    if summary is None:
+        snapshot = collect_snapshot(KubeClient.from_env(), include_metrics=not args.no_metrics)
+        summary = summarize(snapshot, services, event_window=args.event_window)
+
+    if args.format == "json":
+        print(json.dumps(summary, indent=2))
+    else:
+        print(format_summary(summary))
+    # Only fail when the core listings could not be collected at all
+    return 1 if all(kind in summary["errors"] for kind in ("nodes", "pods")) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+Windowed, paged event retrieval for incident investigation.
+
+Events are listed page by page with a server-side ``type`` field selector and
+filtered to a real time window while streaming. Only the newest ``top`` events
+are kept, in a bounded heap, so memory stays flat however many events the
+cluster holds and nothing is sorted beyond what is shown.
+
+Run as ``python -m incident_tools.event_window --window 3600 --top 20`` inside a
+tool container, or import ``windowed_events`` directly.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .kube_client import (
+    CLUSTER_CACHE_URL_ENV,
+    DEFAULT_PAGE_SIZE,
+    KubeAPIError,
+    KubeClient,
+    query_cluster_cache,
+)
+
+EVENT_WINDOW = 3600
+TOP_EVENTS = 20
+EVENT_TYPE = "Warning"
+
+
+class EventWindow(NamedTuple):
+    """Newest events within a time window, newest first."""
+
+    events: List[Dict[str, Any]]
+    matched: int
+    scanned: int
+    pages: int
+    window: int
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Parse a Kubernetes RFC 3339 timestamp to epoch seconds."""
+    if not value:
+        return None
+    try:
+        # Drop MicroTime fractions; API server timestamps are always UTC
+        stamp = datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")
+        return stamp.replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def event_time(event: Dict[str, Any]) -> Optional[float]:
+    """Get the most recent occurrence time of an event."""
+    return parse_time(
+        event.get("lastTimestamp")
+        or (event.get("series") or {}).get("lastObservedTime")
+        or event.get("eventTime")
+        or event["metadata"].get("creationTimestamp")
+    )
+
+
+def event_summary(event: Dict[str, Any], when: float) -> Dict[str, Any]:
+    """Reduce an event to the fields shown in investigation reports."""
+    involved = event.get("involvedObject", {})
+    return {
+        "time": when,
+        "namespace": event["metadata"].get("namespace", ""),
+        "object": f"{involved.get('kind', '')}/{involved.get('name', '')}",
+        "type": event.get("type", ""),
+        "reason": event.get("reason", ""),
+        "message": (event.get("message") or "").strip(),
+        "count": event.get("count") or 1,
+    }
+
+
+def windowed_events(
+    client: KubeClient,
+    window: int = EVENT_WINDOW,
+    top: int = TOP_EVENTS,
+    event_type: Optional[str] = EVENT_TYPE,
+    namespace: Optional[str] = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    now: Optional[float] = None,
+) -> EventWindow:
+    """Get the newest events of a time window without holding the full event list.
+
+    Args:
+        client: Kubernetes API client
+        window: Only events from the last this many seconds are kept
+        top: Maximum number of events returned
+        event_type: Server-side ``type`` filter, e.g. ``"Warning"``; ``None`` for all types
+        namespace: Only list events of this namespace
+        page_size: Events per API page
+        now: Reference time for the window (defaults to the current time)
+
+    Returns:
+        The newest ``top`` events in the window plus match and scan counts
+    """
+    if top < 1:
+        raise ValueError("top must be at least 1")
+
+    path = f"/api/v1/namespaces/{namespace}/events" if namespace else "/api/v1/events"
+    selector = f"type={event_type}" if event_type else None
+    cutoff = (time.time() if now is None else now) - window
+
+    # Min-heap of (time, sequence, summary): the root is the oldest event kept
+    heap: List[Any] = []
+    matched = scanned = pages = 0
+    for page in client.pages(path, limit=page_size, fieldSelector=selector):
+        pages += 1
+        for event in page.get("items") or []:
+            scanned += 1
+            when = event_time(event)
+            if when is None or when < cutoff:
+                continue
+            matched += 1
+            if len(heap) < top:
+                heapq.heappush(heap, (when, scanned, event_summary(event, when)))
+            elif when > heap[0][0]:
+                heapq.heapreplace(heap, (when, scanned, event_summary(event, when)))
+
+    events = [entry[2] for entry in sorted(heap, reverse=True)]
+    return EventWindow(events, matched, scanned, pages, window)
+
+
+def format_events(result: EventWindow, event_type: Optional[str] = EVENT_TYPE) -> str:
+    """Render an event window as report lines."""
+    label = f"{event_type} events" if event_type else "Events"
+    # Results from the cluster cache are scanned in memory, without pages
+    scanned = (
+        f"scanned {result.scanned} in {result.pages} pages"
+        if result.pages
+        else f"{result.scanned} cached"
+    )
+    lines = [
+        f"🔍 {label} in the last {result.window // 60} minutes: {result.matched} (showing {len(result.events)}, {scanned})"
+    ]
+    for event in result.events:
+        stamp = datetime.fromtimestamp(event["time"], timezone.utc).strftime("%H:%M:%S")
+        lines.append(
+            f"  {stamp} {event['namespace']} {event['object']} {event['reason']} (x{event['count']}): {event['message']}"
+        )
+    if not result.matched:
+        lines.append("No events found in the window")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print the newest events of a time window."""
+    parser = argparse.ArgumentParser(description="Windowed Kubernetes event retrieval")
+    parser.add_argument("--window", type=int, default=EVENT_WINDOW, help="Time window in seconds")
+    parser.add_argument("--top", type=int, default=TOP_EVENTS, help="Maximum events shown")
+    parser.add_argument("--type", default=EVENT_TYPE, help="Event type filter; empty for all types")
+    parser.add_argument("--namespace", default="", help="Only events of this namespace")
+    parser.add_argument(
+        "--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="Events per API page"
+    )
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="Output format")
+    parser.add_argument(
+        "--cache-url",
+        default=os.getenv(CLUSTER_CACHE_URL_ENV, ""),
+        help="Answer from a running cluster state cache instead of listing events",
+    )
+    args = parser.parse_args(argv)
+
+    result = None
+    # The cache holds events of all namespaces; namespaced queries go to the API server
+    if args.cache_url and not args.namespace:
+        try:
+            result = EventWindow(
+                **query_cluster_cache(
+                    args.cache_url, "/events", window=args.window, top=args.top, type=args.type
+                )
+            )
+        except KubeAPIError as e:
+            print(f"⚠️ Cluster cache unavailable, listing events directly: {e}", file=sys.stderr)
+    if result is None:
+        try:
+            result = windowed_events(
+                KubeClient.from_env(),
+                window=args.window,
+                top=args.top,
+                event_type=args.type or None,
+                namespace=args.namespace or None,
+                page_size=args.page_size,
+            )
+        except KubeAPIError as e:
+            print(f"❌ Events unavailable: {e}", file=sys.stderr)
+            return 1
+
+    if args.format == "json":
+        print(json.dumps(result._asdict(), indent=2))
+    else:
+        print(format_events(result, args.type or None))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,651 @@
+"""
+Fake Kubernetes API server for scale benchmarks.
+
+Serves synthetic nodes, pods, services, endpoints, events, namespaces, Helm
+release secrets and metrics at a configurable scale and per-request latency.
+It supports the parts of the API the investigation tools use: discovery, pod logs,
+``limit``/``continue`` paging, label and field selectors, watches and the
+metrics API. Every response is counted, so a benchmark can report the
+requests and bytes a tool cost.
+"""
+
+import base64
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+RESOURCE_VERSION = "1000"
+# (resource, namespaced, list kind) served under /api/v1
+CORE_RESOURCES = [
+    ("nodes", False, "NodeList"),
+    ("namespaces", False, "NamespaceList"),
+    ("pods", True, "PodList"),
+    ("services", True, "ServiceList"),
+    ("endpoints", True, "EndpointsList"),
+    ("events", True, "EventList"),
+    ("secrets", True, "SecretList"),
+]
+METRICS_GROUP = "metrics.k8s.io/v1beta1"
+METRICS_RESOURCES = [("nodes", False, "NodeMetricsList"), ("pods", True, "PodMetricsList")]
+
+_WORDS = [
+    "checkout",
+    "payment",
+    "user",
+    "cart",
+    "search",
+    "catalog",
+    "auth",
+    "order",
+    "billing",
+    "inventory",
+    "shipping",
+    "review",
+    "profile",
+    "gateway",
+    "notify",
+    "ledger",
+    "pricing",
+    "session",
+    "media",
+    "report",
+]
+_SUFFIXES = ["api", "svc", "worker", "service", "db", "cache", "consumer", "grpc", "web", "job"]
+_REASONS = ["BackOff", "Unhealthy", "FailedScheduling", "OOMKilling", "FailedMount", "NodeNotReady"]
+_LOG_LINES = [
+    "INFO request completed method=GET path=/api/v1/items/{n} status=200 duration_ms={n}",
+    "INFO cache hit ratio={n}% entries={n}",
+    "DEBUG heartbeat ok seq={n}",
+    "ERROR failed to connect to postgres at 10.0.3.4:5432: connection refused",
+    "WARN upstream request timed out after {n}ms request_id=4f1c{n}a9e2b7d",
+    "ERROR request failed method=POST path=/checkout status=503 trace_id=0x{n}ff",
+    "Traceback (most recent call last):",
+    "ValueError: invalid literal for int() with base 10: 'abc{n}'",
+]
+
+
+def _stamp(seconds: float) -> str:
+    """Format epoch seconds as a Kubernetes timestamp."""
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _split_selector(selector: str) -> List[str]:
+    """Split a selector on commas outside parentheses."""
+    parts, depth, current = [], 0, ""
+    for char in selector:
+        depth += char == "("
+        depth -= char == ")"
+        if char == "," and not depth:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def label_matcher(selector: str) -> Callable[[Dict[str, str]], bool]:
+    """Compile a label selector (``=``, ``!=``, ``in``, ``notin`` and existence) to a predicate."""
+    checks = []
+    for term in _split_selector(selector or ""):
+        found = re.match(r"^([\w./-]+)\s+(in|notin)\s+\((.*)\)$", term)
+        if found:
+            key, op, values = (
+                found.group(1),
+                found.group(2),
+                {v.strip() for v in found.group(3).split(",")},
+            )
+            checks.append(lambda labels, k=key, o=op, v=values: (labels.get(k) in v) == (o == "in"))
+        elif "!=" in term:
+            key, value = term.split("!=", 1)
+            checks.append(lambda labels, k=key.strip(), v=value.strip(): labels.get(k) != v)
+        elif "=" in term:
+            key, value = term.replace("==", "=").split("=", 1)
+            checks.append(lambda labels, k=key.strip(), v=value.strip(): labels.get(k) == v)
+        elif term.startswith("!"):
+            checks.append(lambda labels, k=term[1:].strip(): k not in labels)
+        else:
+            checks.append(lambda labels, k=term: k in labels)
+    return lambda labels: all(check(labels) for check in checks)
+
+
+def field_matcher(selector: str) -> Callable[[Dict[str, Any]], bool]:
+    """Compile a field selector (``=``, ``==`` and ``!=`` on dotted paths) to a predicate."""
+    checks = []
+    for term in _split_selector(selector or ""):
+        negate = "!=" in term
+        path, value = re.split(r"!=|==|=", term, maxsplit=1)
+
+        def check(obj, path=path.strip().split("."), value=value.strip(), negate=negate):
+            for part in path:
+                obj = obj.get(part, "") if isinstance(obj, dict) else ""
+            return (str(obj) == value) != negate
+
+        checks.append(check)
+    return lambda obj: all(check(obj) for check in checks)
+
+
+class FakeKubeAPI:
+    """Synthetic cluster served over HTTP with request and byte counters."""
+
+    def __init__(
+        self,
+        nodes: int = 50,
+        pods: int = 10000,
+        services: int = 2000,
+        events: int = 20000,
+        helm_releases: int = 20,
+        namespaces: int = 40,
+        latency: float = 0.0,
+        watch_hold: float = 1.0,
+        seed: int = 7,
+    ):
+        """Generate the synthetic cluster.
+
+        Args:
+            nodes: Number of nodes
+            pods: Number of pods
+            services: Number of services (each with an endpoints object)
+            events: Number of events, spread over the last 24 hours
+            helm_releases: Number of Helm release secrets
+            namespaces: Number of namespaces objects are spread over
+            latency: Seconds added to every request
+            watch_hold: Maximum seconds a watch request is held open
+            seed: Random seed for reproducible data
+        """
+        self.latency = latency
+        self.watch_hold = watch_hold
+        self.store: Dict[str, List[Dict[str, Any]]] = {}
+        self._encoded: Dict[str, List[bytes]] = {}
+        self._selections: Dict[Tuple[str, Optional[str], str, str], List[int]] = {}
+        self._generate(
+            nodes, pods, services, events, helm_releases, namespaces, random.Random(seed)
+        )
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.paths: Dict[str, int] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.url = ""
+
+    def _generate(
+        self,
+        nodes: int,
+        pods: int,
+        services: int,
+        events: int,
+        releases: int,
+        namespaces: int,
+        rng: random.Random,
+    ) -> None:
+        """Build every resource kind and pre-encode its items."""
+        now = time.time()
+        namespace_names = [f"team-{i}" for i in range(namespaces)]
+        node_names = [f"node-{i}" for i in range(nodes)]
+
+        service_names, seen = [], set()
+        for i in range(services):
+            namespace = namespace_names[i % namespaces]
+            name = "-".join(rng.sample(_WORDS, rng.randint(1, 2)) + [rng.choice(_SUFFIXES)])
+            if (namespace, name) in seen:
+                name = f"{name}-{i}"
+            seen.add((namespace, name))
+            service_names.append((namespace, name))
+
+        store: Dict[str, List[Dict[str, Any]]] = {
+            "namespaces": [
+                {
+                    "metadata": {"name": name, "creationTimestamp": _stamp(now - 86400 * 30)},
+                    "status": {"phase": "Active"},
+                }
+                for name in namespace_names
+            ],
+            "nodes": [
+                {
+                    "metadata": {
+                        "name": name,
+                        "labels": {"kubernetes.io/hostname": name},
+                        "creationTimestamp": _stamp(now - 86400 * 60),
+                    },
+                    "spec": {"unschedulable": i % 97 == 5},
+                    "status": {
+                        "conditions": [
+                            {"type": "Ready", "status": "False" if i % 53 == 7 else "True"},
+                            {
+                                "type": "MemoryPressure",
+                                "status": "True" if i % 41 == 3 else "False",
+                            },
+                        ],
+                        "nodeInfo": {"kubeletVersion": "v1.30.4"},
+                    },
+                }
+                for i, name in enumerate(node_names)
+            ],
+            "services": [],
+            "endpoints": [],
+            "pods": [],
+            "events": [],
+            "secrets": [],
+        }
+
+        for i, (namespace, name) in enumerate(service_names):
+            store["services"].append(
+                {
+                    "metadata": {
+                        "namespace": namespace,
+                        "name": name,
+                        "labels": {"app": name},
+                        "creationTimestamp": _stamp(now - 86400),
+                    },
+                    "spec": {
+                        "type": "ClusterIP",
+                        "clusterIP": f"10.96.{i // 250 % 256}.{i % 250}",
+                        "ports": [{"port": 80, "protocol": "TCP"}],
+                        "selector": {"app": name},
+                    },
+                }
+            )
+            ready = rng.randint(0, 3)
+            store["endpoints"].append(
+                {
+                    "metadata": {"namespace": namespace, "name": name},
+                    "subsets": [
+                        {
+                            "addresses": [{"ip": f"10.244.{i % 256}.{j}"} for j in range(ready)],
+                            "notReadyAddresses": [{"ip": "10.244.255.1"}] if ready == 0 else [],
+                        }
+                    ],
+                }
+            )
+
+        for i in range(pods):
+            namespace, app = (
+                service_names[i % len(service_names)] if service_names else ("default", "app")
+            )
+            phase = rng.choices(["Running", "Pending", "Failed", "Succeeded"], [94, 3, 2, 1])[0]
+            restarts = rng.choice([0] * 20 + [1, 2, 7, 15])
+            waiting = (
+                {"waiting": {"reason": "CrashLoopBackOff"}} if restarts > 5 else {"running": {}}
+            )
+            store["pods"].append(
+                {
+                    "metadata": {
+                        "namespace": namespace,
+                        "name": f"{app}-{i:06d}",
+                        "labels": {"app": app, "pod-template-hash": "5d8f7c"},
+                        "creationTimestamp": _stamp(now - rng.uniform(0, 86400 * 7)),
+                    },
+                    "spec": {
+                        "nodeName": node_names[i % len(node_names)] if node_names else "",
+                        "containers": [{"name": "app", "image": f"{app}:1.0"}],
+                    },
+                    "status": {
+                        "phase": phase,
+                        "podIP": f"10.244.{i // 250 % 256}.{i % 250}",
+                        "containerStatuses": [
+                            {
+                                "name": "app",
+                                "ready": phase == "Running",
+                                "restartCount": restarts,
+                                "state": waiting,
+                            }
+                        ],
+                    },
+                }
+            )
+
+        for i in range(events):
+            pod = (
+                store["pods"][rng.randrange(len(store["pods"]))]
+                if store["pods"]
+                else {"metadata": {"namespace": "default", "name": "pod"}}
+            )
+            warning = rng.random() < 0.3
+            seen = now - rng.uniform(0, 86400)
+            store["events"].append(
+                {
+                    "metadata": {
+                        "namespace": pod["metadata"]["namespace"],
+                        "name": f"{pod['metadata']['name']}.{i:x}",
+                        "creationTimestamp": _stamp(seen - 60),
+                    },
+                    "involvedObject": {
+                        "kind": "Pod",
+                        "namespace": pod["metadata"]["namespace"],
+                        "name": pod["metadata"]["name"],
+                    },
+                    "type": "Warning" if warning else "Normal",
+                    "reason": (
+                        rng.choice(_REASONS)
+                        if warning
+                        else rng.choice(["Pulled", "Created", "Started", "Scheduled"])
+                    ),
+                    "message": (
+                        "Back-off restarting failed container" if warning else "Container started"
+                    ),
+                    "count": rng.randint(1, 40),
+                    "firstTimestamp": _stamp(seen - 60),
+                    "lastTimestamp": _stamp(seen),
+                    "source": {"component": "kubelet"},
+                }
+            )
+
+        for i in range(releases):
+            namespace, app = (
+                service_names[i % len(service_names)] if service_names else ("default", "app")
+            )
+            deployed = now - rng.uniform(0, 86400 * 2)
+            status = "failed" if i % 9 == 4 else "deployed"
+            release = {
+                "name": app,
+                "namespace": namespace,
+                "version": 1,
+                "info": {
+                    "first_deployed": _stamp(deployed),
+                    "last_deployed": _stamp(deployed),
+                    "status": status,
+                    "description": "Install complete",
+                },
+                "chart": {"metadata": {"name": app, "version": "1.0.0", "appVersion": "1.0"}},
+                "config": {},
+                "manifest": "",
+            }
+            data = base64.b64encode(gzip.compress(json.dumps(release).encode())).decode()
+            store["secrets"].append(
+                {
+                    "metadata": {
+                        "namespace": namespace,
+                        "name": f"sh.helm.release.v1.{app}.v1",
+                        "labels": {"owner": "helm", "name": app, "status": status, "version": "1"},
+                    },
+                    "type": "helm.sh/release.v1",
+                    "data": {"release": base64.b64encode(data.encode()).decode()},
+                }
+            )
+
+        store["node_metrics"] = [
+            {
+                "metadata": {"name": name},
+                "usage": {"cpu": f"{rng.randint(100, 3900)}m", "memory": f"{rng.randint(1, 30)}Gi"},
+            }
+            for name in node_names
+        ]
+        store["pod_metrics"] = [
+            {
+                "metadata": {
+                    "namespace": pod["metadata"]["namespace"],
+                    "name": pod["metadata"]["name"],
+                },
+                "containers": [
+                    {
+                        "name": "app",
+                        "usage": {
+                            "cpu": f"{rng.randint(1, 900)}m",
+                            "memory": f"{rng.randint(10, 2000)}Mi",
+                        },
+                    }
+                ],
+            }
+            for pod in store["pods"]
+            if pod["status"]["phase"] == "Running"
+        ]
+
+        self.store = store
+        self._encoded = {
+            kind: [json.dumps(item).encode() for item in items] for kind, items in store.items()
+        }
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve the cluster in a background thread.
+
+        Returns:
+            Base URL of the server
+        """
+        self._server = _Server((host, port), _handler(self))
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.url = f"http://{host}:{self._server.server_address[1]}"
+        return self.url
+
+    def stop(self) -> None:
+        """Stop serving."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def reset_stats(self) -> None:
+        """Zero the request and byte counters."""
+        with self._lock:
+            self.requests = 0
+            self.bytes_sent = 0
+            self.paths = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the request count, bytes sent and requests per path since the last reset."""
+        with self._lock:
+            return {"requests": self.requests, "bytes": self.bytes_sent, "paths": dict(self.paths)}
+
+    def write_kubeconfig(self, path: str) -> str:
+        """Write a kubeconfig pointing kubectl and helm at the server.
+
+        Returns:
+            The kubeconfig path
+        """
+        config = {
+            "apiVersion": "v1",
+            "kind": "Config",
+            "clusters": [{"name": "fake", "cluster": {"server": self.url}}],
+            "users": [{"name": "fake", "user": {"token": "fake"}}],
+            "contexts": [{"name": "fake", "context": {"cluster": "fake", "user": "fake"}}],
+            "current-context": "fake",
+        }
+        with open(path, "w") as f:
+            json.dump(config, f)
+        return path
+
+    def _count(self, path: str, sent: int) -> None:
+        """Record one served request."""
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += sent
+            self.paths[path] = self.paths.get(path, 0) + 1
+
+    def _route(self, path: str) -> Optional[Tuple[str, Optional[str], str]]:
+        """Resolve a collection path to (kind, namespace, list kind)."""
+        for prefix, resources, metrics in (
+            ("/api/v1", CORE_RESOURCES, False),
+            (f"/apis/{METRICS_GROUP}", METRICS_RESOURCES, True),
+        ):
+            if not path.startswith(prefix + "/"):
+                continue
+            parts = path[len(prefix) + 1 :].split("/")
+            namespace = None
+            if len(parts) == 3 and parts[0] == "namespaces":
+                namespace, parts = parts[1], parts[2:]
+            for resource, namespaced, list_kind in resources:
+                if parts == [resource] and (namespaced or namespace is None):
+                    return (
+                        (f"{resource[:-1]}_metrics" if metrics else resource),
+                        namespace,
+                        list_kind,
+                    )
+        return None
+
+    def _discovery(self, path: str) -> Optional[Dict[str, Any]]:
+        """Get the discovery document of a path, if it is one."""
+        if path == "/version":
+            return {
+                "major": "1",
+                "minor": "30",
+                "gitVersion": "v1.30.4-fake",
+                "platform": "linux/amd64",
+            }
+        if path == "/api":
+            return {"kind": "APIVersions", "versions": ["v1"], "serverAddressByClientCIDRs": []}
+        if path == "/apis":
+            version = {"groupVersion": METRICS_GROUP, "version": "v1beta1"}
+            return {
+                "kind": "APIGroupList",
+                "apiVersion": "v1",
+                "groups": [
+                    {"name": "metrics.k8s.io", "versions": [version], "preferredVersion": version}
+                ],
+            }
+        for group, resources, kind_of in (
+            ("v1", CORE_RESOURCES, "/api/v1"),
+            (METRICS_GROUP, METRICS_RESOURCES, f"/apis/{METRICS_GROUP}"),
+        ):
+            if path == kind_of:
+                return {
+                    "kind": "APIResourceList",
+                    "apiVersion": "v1",
+                    "groupVersion": group,
+                    "resources": [
+                        {
+                            "name": resource,
+                            "singularName": resource[:-1],
+                            "namespaced": namespaced,
+                            "kind": list_kind[:-4],
+                            "verbs": ["get", "list", "watch"],
+                        }
+                        for resource, namespaced, list_kind in resources
+                    ],
+                }
+        return None
+
+    def _logs(self, namespace: str, pod: str, query: Dict[str, str]) -> bytes:
+        """Generate a pod log honoring ``tailLines`` and ``limitBytes``."""
+        rng = random.Random(f"{namespace}/{pod}")
+        # One pod in five is noisy
+        errors = 0.3 if rng.random() < 0.2 else 0.02
+        now = time.time()
+        lines = []
+        for i in range(int(query.get("tailLines") or 1000)):
+            template = rng.choice(_LOG_LINES[3:] if rng.random() < errors else _LOG_LINES[:3])
+            stamp = datetime.fromtimestamp(now - i, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            lines.append(f"{stamp} {template.format(n=rng.randint(1, 9999))}")
+        body = "\n".join(reversed(lines)).encode() + b"\n"
+        limit = int(query.get("limitBytes") or 0)
+        return body[:limit] if limit else body
+
+    def _select(self, kind: str, namespace: Optional[str], labels: str, fields: str) -> List[int]:
+        """Get the indices of the items matching a query; the data is static, so results are kept."""
+        key = (kind, namespace, labels, fields)
+        with self._lock:
+            if key in self._selections:
+                return self._selections[key]
+        label_match, field_match = label_matcher(labels), field_matcher(fields)
+        selected = [
+            i
+            for i, item in enumerate(self.store[kind])
+            if (namespace is None or item["metadata"].get("namespace") == namespace)
+            and label_match(item["metadata"].get("labels") or {})
+            and field_match(item)
+        ]
+        with self._lock:
+            self._selections[key] = selected
+        return selected
+
+    def _list(
+        self, kind: str, namespace: Optional[str], list_kind: str, query: Dict[str, str]
+    ) -> bytes:
+        """Encode one page of a filtered collection."""
+        encoded = self._encoded[kind]
+        selected = self._select(
+            kind, namespace, query.get("labelSelector", ""), query.get("fieldSelector", "")
+        )
+
+        start = int(query.get("continue") or 0)
+        limit = int(query.get("limit") or 0)
+        end = start + limit if limit else len(selected)
+        metadata = {"resourceVersion": RESOURCE_VERSION}
+        if end < len(selected):
+            metadata["continue"] = str(end)
+            metadata["remainingItemCount"] = len(selected) - end
+        head = json.dumps({"kind": list_kind, "apiVersion": "v1", "metadata": metadata})[
+            :-1
+        ].encode()
+        return head + b',"items":[' + b",".join(encoded[i] for i in selected[start:end]) + b"]}"
+
+
+class _Server(ThreadingHTTPServer):
+    """Threaded server whose listen backlog absorbs bursts of concurrent tool requests."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def _handler(api: FakeKubeAPI):
+    """Build the HTTP request handler class serving a fake cluster."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if api.latency:
+                time.sleep(api.latency)
+            url = urllib.parse.urlparse(self.path)
+            query = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+            path = url.path.rstrip("/")
+
+            found = re.fullmatch(r"/api/v1/namespaces/([^/]+)/pods/([^/]+)/log", path)
+            if found:
+                self._send(
+                    path, 200, api._logs(found.group(1), found.group(2), query), "text/plain"
+                )
+                return
+            route = api._route(path)
+            if route and query.get("watch") in ("1", "true"):
+                self._watch(path, query)
+                return
+            if route:
+                self._send(path, 200, api._list(*route, query))
+                return
+            document = api._discovery(path)
+            if document is not None:
+                self._send(path, 200, json.dumps(document).encode())
+                return
+            status = {
+                "kind": "Status",
+                "apiVersion": "v1",
+                "status": "Failure",
+                "reason": "NotFound",
+                "code": 404,
+                "message": f"the server could not find the requested resource ({path})",
+            }
+            self._send(path, 404, json.dumps(status).encode())
+
+        def _send(self, path: str, code: int, body: bytes, content_type: str = "application/json"):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            api._count(path, len(body))
+
+        def _watch(self, path: str, query: Dict[str, str]):
+            # Nothing changes in the fake cluster: send a bookmark and hold the watch open
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            bookmark = {
+                "type": "BOOKMARK",
+                "object": {"kind": "Status", "metadata": {"resourceVersion": RESOURCE_VERSION}},
+            }
+            line = json.dumps(bookmark).encode() + b"\n"
+            self.wfile.write(line)
+            self.wfile.flush()
+            time.sleep(min(api.watch_hold, float(query.get("timeoutSeconds") or api.watch_hold)))
+            api._count(path, len(line))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
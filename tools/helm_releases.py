@@ -0,0 +1,205 @@
+"""
+Helm release check read straight from Helm's release secrets.
+
+Helm 3 stores every release revision as a ``helm.sh/release.v1`` secret
+labeled ``owner=helm``. One labeled listing finds all releases, only the
+latest revision of each is decoded, and the recent, failed and per-status
+views are derived locally, so neither the helm binary nor jq is needed and
+the cluster is listed once instead of once per view.
+
+Run as ``python -m incident_tools.helm_releases --since 6`` inside a tool
+container, or import ``list_releases`` directly.
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .kube_client import KubeAPIError, KubeClient
+
+RELEASE_SELECTOR = "owner=helm"
+RECENT_HOURS = 6
+MAX_LISTED = 100
+_GZIP_MAGIC = b"\x1f\x8b"
+_TIMESTAMP = re.compile(r"^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.\d+)?(Z|[+-]\d\d:\d\d)?$")
+
+
+class HelmRelease(NamedTuple):
+    """Latest revision of one Helm release."""
+
+    name: str
+    namespace: str
+    revision: int
+    status: str
+    chart: str
+    app_version: str
+    updated: Optional[float]
+
+
+def parse_deployed(value: Optional[str]) -> Optional[float]:
+    """Parse a Helm deployment timestamp, which may carry nanoseconds and a UTC offset."""
+    found = _TIMESTAMP.match(value or "")
+    if not found:
+        return None
+    stamp = datetime.strptime(found.group(1), "%Y-%m-%dT%H:%M:%S")
+    offset = found.group(2) or "Z"
+    if offset != "Z":
+        sign = -1 if offset[0] == "-" else 1
+        stamp -= sign * timedelta(hours=int(offset[1:3]), minutes=int(offset[4:6]))
+    return stamp.replace(tzinfo=timezone.utc).timestamp()
+
+
+def decode_release(secret: Dict[str, Any]) -> Dict[str, Any]:
+    """Decode the release record of a Helm release secret.
+
+    The secret data is base64 (Kubernetes) of base64 (Helm) of the optionally
+    gzipped release JSON.
+
+    Raises:
+        ValueError: If the secret does not hold a decodable release
+    """
+    payload = base64.b64decode(base64.b64decode((secret.get("data") or {}).get("release", "")))
+    if payload[:2] == _GZIP_MAGIC:
+        try:
+            payload = gzip.decompress(payload)
+        except OSError as e:
+            raise ValueError(f"corrupt release payload: {e}")
+    return json.loads(payload)
+
+
+def list_releases(client: KubeClient, namespace: Optional[str] = None) -> List[HelmRelease]:
+    """Get the latest revision of every Helm release with one secret listing.
+
+    Args:
+        client: Kubernetes API client
+        namespace: Only releases of this namespace
+
+    Returns:
+        Releases ordered by namespace and name
+    """
+    path = f"/api/v1/namespaces/{namespace}/secrets" if namespace else "/api/v1/secrets"
+    secrets, _ = client.list(path, labelSelector=RELEASE_SELECTOR)
+
+    latest: Dict[tuple, tuple] = {}
+    for secret in secrets:
+        labels = secret["metadata"].get("labels") or {}
+        key = (secret["metadata"].get("namespace", ""), labels.get("name", ""))
+        revision = int(labels.get("version") or 0)
+        if key not in latest or revision > latest[key][0]:
+            latest[key] = (revision, secret)
+
+    releases = []
+    for (release_namespace, name), (revision, secret) in sorted(latest.items()):
+        try:
+            release = decode_release(secret)
+        except ValueError:
+            release = {}
+        info = release.get("info") or {}
+        chart = (release.get("chart") or {}).get("metadata") or {}
+        releases.append(
+            HelmRelease(
+                name,
+                release_namespace,
+                revision,
+                info.get("status")
+                or (secret["metadata"].get("labels") or {}).get("status", "unknown"),
+                f"{chart['name']}-{chart.get('version', '')}" if chart.get("name") else "",
+                chart.get("appVersion", ""),
+                parse_deployed(info.get("last_deployed")),
+            )
+        )
+    return releases
+
+
+def _stamp(updated: Optional[float]) -> str:
+    """Render a deployment time like ``helm list``."""
+    if updated is None:
+        return "unknown"
+    return datetime.fromtimestamp(updated, timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+
+
+def format_releases(
+    releases: List[HelmRelease],
+    since_hours: float = RECENT_HOURS,
+    limit: int = MAX_LISTED,
+    now: Optional[float] = None,
+) -> str:
+    """Render the release listing, recent and failed releases and a status summary."""
+    cutoff = (time.time() if now is None else now) - since_hours * 3600
+    lines = ["🔍 HELM DEPLOYMENTS ANALYSIS", "=============================", ""]
+
+    lines.append(f"📋 All Helm releases: {len(releases)}")
+    if releases:
+        lines.append(
+            f"{'NAME':<32} {'NAMESPACE':<20} {'REVISION':>8}  {'UPDATED':<23} {'STATUS':<12} CHART"
+        )
+        for release in releases[:limit]:
+            lines.append(
+                f"{release.name:<32} {release.namespace:<20} {release.revision:>8}  "
+                f"{_stamp(release.updated):<23} {release.status:<12} {release.chart} {release.app_version}".rstrip()
+            )
+        if len(releases) > limit:
+            lines.append(f"... {len(releases) - limit} more")
+
+    recent = sorted(
+        (r for r in releases if r.updated is not None and r.updated > cutoff),
+        key=lambda r: -r.updated,
+    )
+    lines.extend(["", f"🔍 Recent Helm deployments (last {since_hours:g} hours):"])
+    lines.extend(
+        f"  {r.name} ({r.namespace}) - {_stamp(r.updated)} - {r.status}" for r in recent[:limit]
+    )
+    if not recent:
+        lines.append("No recent deployments found")
+
+    failed = [r for r in releases if r.status == "failed"]
+    lines.extend(["", "🔍 Failed Helm releases:"])
+    lines.extend(
+        f"  {r.name} ({r.namespace}) - revision {r.revision} - {_stamp(r.updated)}"
+        for r in failed[:limit]
+    )
+    if not failed:
+        lines.append("No failed releases")
+
+    statuses: Dict[str, int] = {}
+    for release in releases:
+        statuses[release.status] = statuses.get(release.status, 0) + 1
+    lines.extend(["", "📊 Helm release status summary:"])
+    lines.extend(f"  {status}: {count} releases" for status, count in sorted(statuses.items()))
+
+    lines.extend(["", "✅ Helm analysis completed"])
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print the Helm release analysis."""
+    parser = argparse.ArgumentParser(description="Helm release check from release secrets")
+    parser.add_argument("--since", type=float, default=RECENT_HOURS, help="Hours counted as recent")
+    parser.add_argument("--namespace", default="", help="Only releases of this namespace")
+    parser.add_argument(
+        "--limit", type=int, default=MAX_LISTED, help="Maximum releases listed per section"
+    )
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="Output format")
+    args = parser.parse_args(argv)
+
+    try:
+        releases = list_releases(KubeClient.from_env(), args.namespace or None)
+    except KubeAPIError as e:
+        print(f"❌ Helm releases unavailable: {e}")
+        return 1
+
+    if args.format == "json":
+        print(json.dumps([release._asdict() for release in releases], indent=2))
+    else:
+        print(format_releases(releases, args.since, args.limit))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""
+Minimal Kubernetes API client for in-container investigation tools.
+
+Standard library only, so the tool modules can be shipped into a plain Python
+tool image. Requests go straight to the API server with the pod's service
+account, or through ``kubectl get --raw`` when running outside the cluster.
+"""
+
+import hmac
+import http.client
+import json
+import os
+import ssl
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+SERVICE_ACCOUNT_DIR = "/var/run/secrets/kubernetes.io/serviceaccount"
+KUBERNETES_API_ENV = "KUBERNETES_API"
+# Base URL of a running cluster state cache (tools/cluster_cache.py)
+CLUSTER_CACHE_URL_ENV = "INCIDENT_CLUSTER_CACHE_URL"
+# Shared secret the cluster cache, the tool server and its /retrigger relay require
+SHARED_SECRET_ENV = "INCIDENT_RETRIGGER_SECRET"
+DEFAULT_TIMEOUT = 30
+DEFAULT_PAGE_SIZE = 500
+# Projected service account tokens rotate; the mounted file is re-read this often (seconds)
+TOKEN_REFRESH = 60
+
+
+class KubeAPIError(Exception):
+    """Kubernetes API request failure."""
+
+    def __init__(self, path: str, status: Optional[int], message: str):
+        super().__init__(f"GET {path} failed ({status or 'no status'}): {message}")
+        self.path = path
+        self.status = status
+
+
+class KubeClient:
+    """Read-only Kubernetes API client with request and byte counters."""
+
+    def __init__(
+        self,
+        server: Optional[str] = None,
+        token: Optional[str] = None,
+        ca_file: Optional[str] = None,
+        kubectl: str = "kubectl",
+        timeout: float = DEFAULT_TIMEOUT,
+        token_file: Optional[str] = None,
+    ):
+        """Initialize the client.
+
+        Args:
+            server: API server URL; without one, requests go through ``kubectl get --raw``
+            token: Bearer token for the API server
+            ca_file: CA bundle used to verify the API server certificate
+            kubectl: kubectl binary used when no server is given
+            timeout: Per-request timeout in seconds
+            token_file: File the bearer token is re-read from every ``TOKEN_REFRESH`` seconds
+        """
+        self.server = server.rstrip("/") if server else None
+        self.token = token
+        self.token_file = token_file
+        self._token_read_at = 0.0
+        self.kubectl = kubectl
+        self.timeout = timeout
+        self._context = None
+        if self.server and self.server.startswith("https://"):
+            self._context = ssl.create_default_context(cafile=ca_file)
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.bytes_received = 0
+
+    @classmethod
+    def from_env(cls, timeout: float = DEFAULT_TIMEOUT) -> "KubeClient":
+        """Create a client for the current environment.
+
+        ``KUBERNETES_API`` (plus optional ``KUBERNETES_TOKEN``) selects an explicit
+        server. Inside a pod the service account is used, and anywhere else the
+        client falls back to kubectl and its kubeconfig.
+        """
+        server = os.getenv(KUBERNETES_API_ENV)
+        if server:
+            return cls(server, token=os.getenv("KUBERNETES_TOKEN"), timeout=timeout)
+
+        host = os.getenv("KUBERNETES_SERVICE_HOST")
+        token_file = os.path.join(SERVICE_ACCOUNT_DIR, "token")
+        if host and os.path.exists(token_file):
+            port = os.getenv("KUBERNETES_SERVICE_PORT", "443")
+            return cls(
+                f"https://{host}:{port}",
+                ca_file=os.path.join(SERVICE_ACCOUNT_DIR, "ca.crt"),
+                timeout=timeout,
+                token_file=token_file,
+            )
+        return cls(timeout=timeout)
+
+    def get(self, path: str, **params: Any) -> Dict[str, Any]:
+        """GET an API path and decode the JSON response.
+
+        Args:
+            path: API path such as ``/api/v1/pods``
+            **params: Query parameters; ``None`` values are omitted
+
+        Returns:
+            Decoded response body
+        """
+        query = urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+        target = f"{path}?{query}" if query else path
+        body = self._get_raw(target)
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += len(body)
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise KubeAPIError(path, None, f"invalid JSON response: {e}")
+
+    def get_text(self, path: str, **params: Any) -> str:
+        """GET an API path that returns plain text, such as pod logs.
+
+        Args:
+            path: API path such as ``/api/v1/namespaces/default/pods/web-0/log``
+            **params: Query parameters; ``None`` values are omitted
+
+        Returns:
+            Response body decoded as UTF-8 (invalid bytes replaced)
+        """
+        query = urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+        body = self._get_raw(f"{path}?{query}" if query else path, accept="*/*")
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += len(body)
+        return body.decode(errors="replace")
+
+    def pages(
+        self, path: str, limit: int = DEFAULT_PAGE_SIZE, **params: Any
+    ) -> Iterator[Dict[str, Any]]:
+        """List a collection in pages using ``limit`` and ``continue``.
+
+        Args:
+            path: API collection path such as ``/api/v1/services``
+            limit: Items per page
+            **params: Additional query parameters such as ``fieldSelector``
+
+        Yields:
+            List responses, one per page
+        """
+        token = None
+        while True:
+            page = self.get(path, limit=limit, **{"continue": token}, **params)
+            yield page
+            token = page.get("metadata", {}).get("continue")
+            if not token:
+                return
+
+    def list(
+        self, path: str, limit: int = DEFAULT_PAGE_SIZE, **params: Any
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """List every item of a collection page by page.
+
+        Returns:
+            Tuple of the items and the collection ``resourceVersion`` to watch from
+        """
+        items: List[Dict[str, Any]] = []
+        version = ""
+        for page in self.pages(path, limit, **params):
+            items.extend(page.get("items") or [])
+            version = page.get("metadata", {}).get("resourceVersion", version)
+        return items, version
+
+    def watch(self, path: str, **params: Any) -> Iterator[Dict[str, Any]]:
+        """Stream watch events of an API path until the server ends the watch.
+
+        Args:
+            path: API collection path such as ``/api/v1/services``
+            **params: Query parameters, typically ``resourceVersion`` and ``timeoutSeconds``
+
+        Yields:
+            Watch events with ``type`` and ``object`` keys
+        """
+        params = {"watch": "1", **params}
+        query = urllib.parse.urlencode({k: v for k, v in params.items() if v is not None})
+        target = f"{path}?{query}"
+        with self._lock:
+            self.requests += 1
+
+        for line in self._stream_lines(target):
+            with self._lock:
+                self.bytes_received += len(line)
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    raise KubeAPIError(path, None, f"invalid watch event: {e}")
+
+    def _stream_lines(self, target: str) -> Iterator[bytes]:
+        """Stream the response body of a path with query string line by line."""
+        if not self.server:
+            try:
+                process = subprocess.Popen(
+                    [self.kubectl, "get", "--raw", target],
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                )
+            except OSError as e:
+                raise KubeAPIError(target, None, str(e))
+            try:
+                yield from process.stdout
+            finally:
+                process.stdout.close()
+                if process.wait() != 0:
+                    raise KubeAPIError(
+                        target, None, process.stderr.read().decode(errors="replace").strip()
+                    )
+            return
+
+        with self._open(target) as response:
+            try:
+                yield from response
+            except (OSError, http.client.HTTPException) as e:
+                # Socket timeouts, resets and truncated chunked bodies (IncompleteRead)
+                raise KubeAPIError(target, None, f"{type(e).__name__}: {e}")
+
+    def _bearer_token(self) -> Optional[str]:
+        """Get the bearer token, re-reading the token file once it is ``TOKEN_REFRESH`` old."""
+        if self.token_file and time.monotonic() - self._token_read_at >= TOKEN_REFRESH:
+            try:
+                with open(self.token_file) as f:
+                    token = f.read().strip()
+            except OSError:
+                # Keep the previous token until the file is readable again
+                token = self.token
+            with self._lock:
+                self.token = token
+                self._token_read_at = time.monotonic()
+        return self.token
+
+    def _open(self, target: str, accept: str = "application/json"):
+        """Open an HTTP request to the API server."""
+        request = urllib.request.Request(self.server + target)
+        request.add_header("Accept", accept)
+        token = self._bearer_token()
+        if token:
+            request.add_header("Authorization", f"Bearer {token}")
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout, context=self._context)
+        except urllib.error.HTTPError as e:
+            raise KubeAPIError(target, e.code, e.read().decode(errors="replace")[:200])
+        except (urllib.error.URLError, OSError, http.client.HTTPException) as e:
+            raise KubeAPIError(target, None, str(e))
+
+    def _get_raw(self, target: str, accept: str = "application/json") -> bytes:
+        """Fetch the raw response body of a path with query string."""
+        if not self.server:
+            try:
+                result = subprocess.run(
+                    [self.kubectl, "get", "--raw", target],
+                    capture_output=True,
+                    timeout=self.timeout,
+                )
+            except (OSError, subprocess.TimeoutExpired) as e:
+                raise KubeAPIError(target, None, str(e))
+            if result.returncode != 0:
+                raise KubeAPIError(target, None, result.stderr.decode(errors="replace").strip())
+            return result.stdout
+
+        try:
+            with self._open(target, accept) as response:
+                return response.read()
+        except (urllib.error.URLError, OSError, http.client.HTTPException) as e:
+            raise KubeAPIError(target, None, str(e))
+
+
+def bearer_authorized(headers: Mapping[str, str], secret: str) -> bool:
+    """Tell whether request headers carry ``Authorization: Bearer <secret>``; never without a secret."""
+    presented = (headers.get("Authorization") or "").encode()
+    return bool(secret) and hmac.compare_digest(presented, f"Bearer {secret}".encode())
+
+
+def query_cluster_cache(url: str, path: str, timeout: float = 10, **params: Any) -> Dict[str, Any]:
+    """Query a running cluster state cache instead of the API server.
+
+    The request carries the shared secret from ``INCIDENT_RETRIGGER_SECRET``.
+
+    Args:
+        url: Base URL of the cache, e.g. ``http://cluster-cache:8787``
+        path: Query path such as ``/summary`` or ``/events``
+        timeout: Request timeout in seconds
+        **params: Query parameters
+
+    Returns:
+        Decoded JSON response
+    """
+    target = f"{url.rstrip('/')}{path}?{urllib.parse.urlencode(params)}"
+    request = urllib.request.Request(
+        target, headers={"Authorization": f"Bearer {os.getenv(SHARED_SECRET_ENV, '')}"}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        raise KubeAPIError(path, getattr(e, "code", None), str(e))
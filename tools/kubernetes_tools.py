@@ -2,7 +2,132 @@
 Kubernetes tools for service validation and cluster investigation.
 """
 
-from typing import Any, Dict, List
+import os
+import shlex
+from typing import Any, Dict, List, Tuple
+
+from .kube_client import SHARED_SECRET_ENV
+
+# Python tool modules are baked into the toolbox image as this package
+TOOL_PACKAGE = "incident_tools"
+TOOL_PACKAGE_ROOT = "/opt"
+# Modules of this directory copied into the package; keep in sync with Dockerfile.toolbox
+TOOL_MODULES = (
+    "kube_client",
+    "event_window",
+    "service_matcher",
+    "service_inventory",
+    "service_resolver",
+    "cluster_snapshot",
+    "log_sampler",
+    "helm_releases",
+)
+# Built from Dockerfile.toolbox (Python plus pinned kubectl, helm and jq) and pushed to a
+# registry the runners can pull from; there is no public default
+TOOLBOX_IMAGE_ENV = "INCIDENT_TOOLBOX_IMAGE"
+TOOLBOX_IMAGE = os.getenv(TOOLBOX_IMAGE_ENV, "")
+# Running cluster state cache (tools/cluster_cache.py); empty lists the cluster directly
+CLUSTER_CACHE_URL = os.getenv("INCIDENT_CLUSTER_CACHE_URL", "")
+# Tools querying the cluster cache are given the shared secret it requires
+CACHE_SECRETS = [SHARED_SECRET_ENV] if CLUSTER_CACHE_URL else []
+# Running in-process tool server (tools/tool_runtime.py); empty keeps the container tools
+TOOL_SERVER_URL = os.getenv("INCIDENT_TOOL_SERVER_URL", "")
+# Persists the service inventory across tool calls so it is listed once per TTL
+SERVICE_INVENTORY_VOLUME = {"name": "incident-tools-cache", "path": "/var/cache/incident-tools"}
+
+# Tools implemented by a Python module: (module, argv), with "$VAR" items filled from the tool args.
+# The container scripts and the in-process runtime both run them from here.
+PYTHON_TOOLS: Dict[str, Tuple[str, List[str]]] = {
+    "kubectl_get_services": ("service_inventory", ["list", "--pattern", "$SERVICE_PATTERN"]),
+    "validate_service_exists": (
+        "service_inventory",
+        ["validate", "$SERVICE_NAME", "--namespace", "$NAMESPACE"],
+    ),
+    "kubectl_cluster_snapshot": (
+        "cluster_snapshot",
+        ["--services", "$AFFECTED_SERVICES", "--cache-url", CLUSTER_CACHE_URL],
+    ),
+    "kubectl_log_sample": ("log_sampler", ["--services", "$AFFECTED_SERVICES"]),
+    "helm_deployments_check": ("helm_releases", ["--since", "6"]),
+    "prevalidate_services": (
+        "service_resolver",
+        [
+            "--title",
+            "$INCIDENT_TITLE",
+            "--body",
+            "$INCIDENT_BODY",
+            "--services",
+            "$AFFECTED_SERVICES",
+            "--format",
+            "step",
+        ],
+    ),
+}
+
+
+def require_toolbox_image() -> str:
+    """Get the toolbox image the container tools run on.
+
+    Raises:
+        ValueError: If ``INCIDENT_TOOLBOX_IMAGE`` is not set
+    """
+    if not TOOLBOX_IMAGE:
+        raise ValueError(
+            f"{TOOLBOX_IMAGE_ENV} is not set; build the toolbox with ./docker-build.sh --toolbox, "
+            "push it to a registry your runners can pull from and set its reference"
+        )
+    return TOOLBOX_IMAGE
+
+
+def require_tool_images(tools: List[Dict[str, Any]]) -> None:
+    """Check that the container tools about to run have an image to run on.
+
+    Definitions are built and exported without an image; call this where
+    they are submitted.
+
+    Raises:
+        ValueError: If a container tool has no image because ``INCIDENT_TOOLBOX_IMAGE`` is not set
+    """
+    if any(tool.get("type") == "docker" and not tool.get("image") for tool in tools):
+        require_toolbox_image()
+
+
+def python_tool_script(name: str) -> str:
+    """Get the container script running a ``PYTHON_TOOLS`` entry."""
+    module, argv = PYTHON_TOOLS[name]
+    command = " ".join(f'"{item}"' if item.startswith("$") else shlex.quote(item) for item in argv)
+    return f"""#!/bin/sh
+set -e
+cd {TOOL_PACKAGE_ROOT}
+python -m {TOOL_PACKAGE}.{module} {command}
+            """
+
+
+def in_process_tool(tool: Dict[str, Any], server_url: str = TOOL_SERVER_URL) -> Dict[str, Any]:
+    """Turn a Python-backed container tool into an HTTP tool served by the in-process tool server.
+
+    The call sends the shared secret the server requires, read from the
+    ``INCIDENT_RETRIGGER_SECRET`` secret.
+
+    Args:
+        tool: Container tool definition whose name is in ``PYTHON_TOOLS``
+        server_url: Base URL of the tool server
+
+    Returns:
+        HTTP tool definition with the same name, description and arg templates
+    """
+    return {
+        "name": tool["name"],
+        "description": tool["description"],
+        "type": "http",
+        "url": f"{server_url.rstrip('/')}/tools/{tool['name']}",
+        "method": "POST",
+        "headers": {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {{{{{SHARED_SECRET_ENV}}}}}",
+        },
+        "body": dict(tool.get("args", {})),
+    }
 
 
 class KubernetesToolDefinitions:
@@ -15,36 +140,10 @@ class KubernetesToolDefinitions:
             "name": "kubectl_get_services",
             "description": "Get all services in the Kubernetes cluster to validate service names and discover available services",
             "type": "docker",
-            "image": "bitnami/kubectl:latest",
-            "content": """#!/bin/bash
-set -e
-
-echo "🔍 KUBERNETES SERVICES DISCOVERY"
-echo "================================="
-
-# Get all services with detailed information
-echo "📋 All services across all namespaces:"
-kubectl get services --all-namespaces -o wide --show-labels
-
-echo ""
-echo "📊 Service summary by namespace:"
-kubectl get services --all-namespaces --no-headers | awk '{print $1}' | sort | uniq -c | sort -nr
-
-# Search for specific pattern if provided
-if [ -n "$SERVICE_PATTERN" ]; then
-    echo ""
-    echo "🔍 Searching for services matching pattern: '$SERVICE_PATTERN'"
-    kubectl get services --all-namespaces | grep -i "$SERVICE_PATTERN" || echo "❌ No services found matching pattern: $SERVICE_PATTERN"
-
-    echo ""
-    echo "🔍 Similar service names (fuzzy search):"
-    kubectl get services --all-namespaces --no-headers | awk '{print $2}' | grep -i "$(echo $SERVICE_PATTERN | cut -c1-3)" || echo "No similar services found"
-fi
-
-echo ""
-echo "✅ Services discovery completed"
-            """,
+            "image": TOOLBOX_IMAGE,
+            "content": python_tool_script("kubectl_get_services"),
             "args": {"SERVICE_PATTERN": "{{service_pattern}}"},
+            "with_volumes": [SERVICE_INVENTORY_VOLUME],
         }
 
     @staticmethod
@@ -54,65 +153,10 @@ echo "✅ Services discovery completed"
             "name": "validate_service_exists",
             "description": "Validate if a specific service exists in the Kubernetes cluster",
             "type": "docker",
-            "image": "bitnami/kubectl:latest",
-            "content": """#!/bin/bash
-set -e
-
-echo "🔍 VALIDATING SERVICE: $SERVICE_NAME"
-echo "===================================="
-
-NAMESPACE=${NAMESPACE:-default}
-FOUND=false
-
-# Check in specified namespace first
-echo "🔍 Checking namespace: $NAMESPACE"
-if kubectl get service "$SERVICE_NAME" -n "$NAMESPACE" 2>/dev/null; then
-    echo "✅ Service '$SERVICE_NAME' found in namespace '$NAMESPACE'"
-    FOUND=true
-
-    # Get detailed service information
-    echo ""
-    echo "📋 Service details:"
-    kubectl describe service "$SERVICE_NAME" -n "$NAMESPACE"
-
-    echo ""
-    echo "🔗 Service endpoints:"
-    kubectl get endpoints "$SERVICE_NAME" -n "$NAMESPACE" 2>/dev/null || echo "No endpoints found"
-else
-    echo "❌ Service '$SERVICE_NAME' not found in namespace '$NAMESPACE'"
-fi
-
-# If not found in specified namespace, search all namespaces
-if [ "$FOUND" = "false" ]; then
-    echo ""
-    echo "🔍 Searching across all namespaces..."
-    ALL_MATCHES=$(kubectl get services --all-namespaces --no-headers | grep "$SERVICE_NAME" || true)
-
-    if [ -n "$ALL_MATCHES" ]; then
-        echo "✅ Found matching services:"
-        echo "$ALL_MATCHES"
-        FOUND=true
-    else
-        echo "❌ Service '$SERVICE_NAME' not found in any namespace"
-
-        # Suggest similar services
-        echo ""
-        echo "💡 Similar service names found:"
-        kubectl get services --all-namespaces --no-headers | awk '{print $1 ":" $2}' | grep -i "$(echo $SERVICE_NAME | cut -c1-3)" | head -5 || echo "No similar services found"
-    fi
-fi
-
-if [ "$FOUND" = "true" ]; then
-    echo ""
-    echo "✅ Service validation successful"
-    exit 0
-else
-    echo ""
-    echo "❌ Service validation failed"
-    exit 1
-fi
-            """,
+            "image": TOOLBOX_IMAGE,
+            "content": python_tool_script("validate_service_exists"),
             "args": {"SERVICE_NAME": "{{service_name}}", "NAMESPACE": "{{namespace:default}}"},
+            "with_volumes": [SERVICE_INVENTORY_VOLUME],
         }
 
     @staticmethod
@@ -122,7 +166,7 @@ fi
             "name": "kubectl_cluster_investigation",
             "description": "Perform comprehensive Kubernetes cluster investigation for incident analysis",
             "type": "docker",
-            "image": "bitnami/kubectl:latest",
+            "image": TOOLBOX_IMAGE,
             "content": """#!/bin/bash
 set -e
 
@@ -157,25 +201,42 @@ echo "3️⃣ SERVICE-SPECIFIC INVESTIGATION"
 echo "=================================="
 if [ "$SERVICES" != "all" ]; then
     IFS=',' read -ra SERVICE_ARRAY <<< "$SERVICES"
+    SERVICE_SET=""
     for service in "${SERVICE_ARRAY[@]}"; do
         service=$(echo "$service" | xargs)  # trim whitespace
+        [ -n "$service" ] && SERVICE_SET="${SERVICE_SET:+$SERVICE_SET,}$service"
+    done
+
+    # One set-based selector query and one service listing, filtered locally per service
+    PODS=$(kubectl get pods --all-namespaces -l "app in ($SERVICE_SET)" -o wide -L app 2>/dev/null || true)
+    SERVICE_LISTING=$(kubectl get services --all-namespaces 2>/dev/null || true)
+
+    IFS=',' read -ra SERVICE_ARRAY <<< "$SERVICE_SET"
+    for service in "${SERVICE_ARRAY[@]}"; do
         echo ""
         echo "🔍 Investigating service: $service"
 
-        # Find pods for this service
-        kubectl get pods --all-namespaces -l app=$service -o wide 2>/dev/null || echo "No pods found with label app=$service"
+        # Pods for this service (the app label is the last column)
+        SERVICE_PODS=$(echo "$PODS" | awk -v app="$service" 'NR > 1 && $NF == app')
+        if [ -n "$SERVICE_PODS" ]; then
+            echo "$PODS" | head -1
+            echo "$SERVICE_PODS"
+        else
+            echo "No pods found with label app=$service"
+        fi
 
         # Check service endpoints
-        kubectl get services --all-namespaces | grep "$service" || echo "Service $service not found"
+        echo "$SERVICE_LISTING" | grep -- "$service" || echo "Service $service not found"
     done
 fi
 
 echo ""
 echo "4️⃣ RECENT EVENTS"
 echo "================="
-echo "🔍 Recent cluster events (last 1 hour):"
-kubectl get events --all-namespaces --sort-by='.lastTimestamp' | tail -20
-
+"""
+            + f"""(cd {TOOL_PACKAGE_ROOT} && python -m {TOOL_PACKAGE}.event_window --window 3600 --top 20 --cache-url "{CLUSTER_CACHE_URL}") || echo "Events not available"
+"""
+            + """
 echo ""
 echo "5️⃣ RESOURCE UTILIZATION"
 echo "========================"
@@ -190,55 +251,80 @@ echo ""
 echo "✅ Cluster investigation completed"
             """,
             "args": {"AFFECTED_SERVICES": "{{affected_services}}"},
+            **({"secrets": CACHE_SECRETS} if CACHE_SECRETS else {}),
+        }
+
+    @staticmethod
+    def kubectl_cluster_snapshot() -> Dict[str, Any]:
+        """Cluster investigation from one parallel bulk JSON snapshot."""
+        return {
+            "name": "kubectl_cluster_snapshot",
+            "description": "Investigate the Kubernetes cluster from a single parallel snapshot of nodes, pods, services and events, with anomalies summarized locally",
+            "type": "docker",
+            "image": TOOLBOX_IMAGE,
+            "content": python_tool_script("kubectl_cluster_snapshot"),
+            "args": {"AFFECTED_SERVICES": "{{affected_services}}"},
+            **({"secrets": CACHE_SECRETS} if CACHE_SECRETS else {}),
+        }
+
+    @staticmethod
+    def kubectl_log_sample() -> Dict[str, Any]:
+        """Sample service logs in parallel and summarize error signatures."""
+        return {
+            "name": "kubectl_log_sample",
+            "description": "Sample recent logs of the affected services' pods in parallel (byte-capped) and return deduplicated error signatures with counts",
+            "type": "docker",
+            "image": TOOLBOX_IMAGE,
+            "content": python_tool_script("kubectl_log_sample"),
+            "args": {"AFFECTED_SERVICES": "{{affected_services}}"},
         }
 
     @staticmethod
     def helm_deployments_check() -> Dict[str, Any]:
-        """Check recent Helm deployments."""
+        """Check recent Helm deployments from the release secrets."""
         return {
             "name": "helm_deployments_check",
             "description": "Check recent Helm deployments that might be related to the incident",
             "type": "docker",
-            "image": "alpine/helm:latest",
-            "content": """#!/bin/bash
-set -e
-
-echo "🔍 HELM DEPLOYMENTS ANALYSIS"
-echo "============================="
-
-# Install kubectl in helm image
-apk add --no-cache curl
-curl -LO "https://dl.k8s.io/release/$(curl -L -s https://dl.k8s.io/release/stable.txt)/bin/linux/amd64/kubectl"
-chmod +x kubectl
-mv kubectl /usr/local/bin/
-
-echo "📋 All Helm releases:"
-helm list --all-namespaces
-
-echo ""
-echo "🔍 Recent Helm deployments (last 6 hours):"
-helm list --all-namespaces --date --output json | jq -r '.[] | select(.updated | strptime("%Y-%m-%d %H:%M:%S.%f %z") > (now - 6*3600)) | "\\(.name) (\\(.namespace)) - \\(.updated) - \\(.status)"' 2>/dev/null || echo "No recent deployments found or jq not available"
-
-echo ""
-echo "🔍 Failed Helm releases:"
-helm list --all-namespaces --failed
-
-echo ""
-echo "📊 Helm release status summary:"
-helm list --all-namespaces --output json | jq -r 'group_by(.status) | .[] | "\\(.[0].status): \\(length) releases"' 2>/dev/null || echo "Status summary not available"
-
-echo ""
-echo "✅ Helm analysis completed"
-            """,
+            "image": TOOLBOX_IMAGE,
+            "content": python_tool_script("helm_deployments_check"),
             "args": {},
         }
 
+    @staticmethod
+    def prevalidate_services() -> Dict[str, Any]:
+        """Resolve an incident's services without the validation agent (workflow step tool)."""
+        return {
+            "name": "prevalidate_services",
+            "description": "Resolve the incident's services from the provided list or the title and body by exact and fuzzy match against the service inventory; prints the decision and the resolved services as decision:services",
+            "type": "docker",
+            "image": TOOLBOX_IMAGE,
+            "content": python_tool_script("prevalidate_services"),
+            "args": {
+                "INCIDENT_TITLE": "{{incident_title}}",
+                "INCIDENT_BODY": "{{incident_body}}",
+                "AFFECTED_SERVICES": "{{affected_services}}",
+            },
+            "with_volumes": [SERVICE_INVENTORY_VOLUME],
+        }
+
     @classmethod
     def get_all_tools(cls) -> List[Dict[str, Any]]:
-        """Get all Kubernetes tools for agent configuration."""
-        return [
+        """Get all Kubernetes tools for agent configuration.
+
+        With ``INCIDENT_TOOL_SERVER_URL`` set, the Python-backed tools call the
+        in-process tool server instead of starting a container per call.
+        """
+        tools = [
             cls.kubectl_get_services(),
             cls.validate_service_exists(),
             cls.kubectl_cluster_investigation(),
+            cls.kubectl_cluster_snapshot(),
+            cls.kubectl_log_sample(),
             cls.helm_deployments_check(),
         ]
+        if TOOL_SERVER_URL:
+            tools = [
+                in_process_tool(tool) if tool["name"] in PYTHON_TOOLS else tool for tool in tools
+            ]
+        return tools
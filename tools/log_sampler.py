@@ -0,0 +1,348 @@
+"""
+Parallel, bounded log sampling with error-signature extraction.
+
+Pods of the affected services are found with one set-based label selector
+query, and their recent logs are fetched concurrently. Every fetch carries a
+server-side ``limitBytes``: the per-pod cap or a fair share of the shared
+budget, whichever is smaller. Neither a single noisy pod nor the sample as
+a whole can exceed its byte cap. All error patterns are combined into one
+regex and run in a single pass over each log.
+Matching lines are normalized (timestamps, ids, numbers and addresses
+removed) into deduplicated signatures with counts, so the agent gets compact
+evidence instead of raw log dumps.
+
+Run as ``python -m incident_tools.log_sampler --services a,b`` inside a tool
+container, or import ``sample_logs`` directly.
+"""
+
+import argparse
+import json
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .kube_client import KubeAPIError, KubeClient
+
+POD_BYTES = 64 * 1024
+TOTAL_BYTES = 1024 * 1024
+TAIL_LINES = 500
+SINCE_SECONDS = 3600
+MAX_PODS = 40
+MAX_WORKERS = 8
+MAX_SIGNATURES = 15
+
+# Checked in one pass; a line is classified by the earliest pattern it contains
+ERROR_PATTERNS = {
+    "panic": r"panic:|goroutine \d+ \[running\]|SIGSEGV",
+    "oom": r"(?i:out ?of ?memory|oomkill(?:ed)?|cannot allocate memory|java\.lang\.OutOfMemoryError)",
+    "exception": r"Traceback \(most recent call last\)|\b[A-Z]\w*(?:Exception|Error)\b",
+    "timeout": r"(?i:timed? ?out|deadline exceeded)",
+    "connection": r"(?i:connection refused|connection reset|econnrefused|econnreset|no route to host|broken pipe)",
+    "http_5xx": r"(?i:status(?:[ _]?code)?[=: \"]+|HTTP/\d(?:\.\d)?\"? )5\d\d\b",
+    "error": r"\b(?:ERROR|FATAL|CRITICAL|SEVERE)\b|(?i:level[=:]\s*\"?(?:error|fatal|crit))",
+}
+LINE_PATTERN = re.compile(
+    r"^.*?(?:"
+    + "|".join(f"(?P<{name}>{pattern})" for name, pattern in ERROR_PATTERNS.items())
+    + r").*$",
+    re.MULTILINE,
+)
+
+# Variable parts removed from matching lines so repeats collapse into one signature
+_NORMALIZE = [
+    (re.compile(r"^\S*\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d\S*\s*"), ""),
+    (
+        re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I),
+        "<uuid>",
+    ),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b[0-9a-f]{12,}\b", re.I), "<hex>"),
+    (re.compile(r"\"[^\"]{24,}\"|'[^']{24,}'"), "<str>"),
+    (re.compile(r"\d+"), "<n>"),
+    (re.compile(r"\s+"), " "),
+]
+SIGNATURE_LENGTH = 160
+
+
+class LogSignature(NamedTuple):
+    """A deduplicated error line shape with where it was seen."""
+
+    category: str
+    signature: str
+    count: int
+    pods: List[str]
+    example: str
+
+
+class LogSample(NamedTuple):
+    """Result of one log sampling run."""
+
+    signatures: List[LogSignature]
+    pods_found: int
+    containers_sampled: int
+    bytes_fetched: int
+    truncated: int
+    skipped: int
+    errors: Dict[str, str]
+
+
+def signature(line: str) -> str:
+    """Normalize a log line into its deduplication signature."""
+    for pattern, replacement in _NORMALIZE:
+        line = pattern.sub(replacement, line)
+    return line.strip()[:SIGNATURE_LENGTH]
+
+
+def extract_signatures(
+    text: str, source: str, found: Dict[Tuple[str, str], Dict[str, Any]]
+) -> None:
+    """Add the error signatures of one log to ``found`` in a single regex pass.
+
+    Args:
+        text: Log text
+        source: Pod (or pod/container) the log came from
+        found: Signatures keyed by (category, signature), updated in place
+    """
+    for match in LINE_PATTERN.finditer(text):
+        line = match.group(0)
+        key = (match.lastgroup, signature(line))
+        entry = found.get(key)
+        if entry is None:
+            found[key] = {"count": 1, "pods": {source}, "example": line.strip()[:300]}
+        else:
+            entry["count"] += 1
+            entry["pods"].add(source)
+
+
+class _ByteBudget:
+    """Shared byte budget drawn on by concurrent log fetches."""
+
+    def __init__(self, total: int, parts: int):
+        self.remaining = total
+        self.parts = parts
+        self._lock = threading.Lock()
+
+    def take(self, wanted: int) -> int:
+        """Reserve up to ``wanted`` bytes, at most a fair share of what is left; returns the bytes granted."""
+        with self._lock:
+            granted = min(wanted, self.remaining // max(1, self.parts))
+            self.parts -= 1
+            self.remaining -= granted
+            return granted
+
+    def give_back(self, unused: int) -> None:
+        """Return reserved bytes a fetch did not use."""
+        with self._lock:
+            self.remaining += unused
+
+
+def _pick_pods(pods: List[Dict[str, Any]], max_pods: int) -> List[Dict[str, Any]]:
+    """Choose up to ``max_pods`` pods, round-robin across apps, unhealthy pods first."""
+
+    def unhealthy(pod: Dict[str, Any]) -> bool:
+        statuses = pod.get("status", {}).get("containerStatuses") or []
+        return pod.get("status", {}).get("phase") != "Running" or any(
+            s.get("restartCount", 0) or not s.get("ready", True) for s in statuses
+        )
+
+    by_app: Dict[str, List[Dict[str, Any]]] = {}
+    for pod in sorted(pods, key=lambda p: not unhealthy(p)):
+        by_app.setdefault((pod["metadata"].get("labels") or {}).get("app", ""), []).append(pod)
+
+    picked: List[Dict[str, Any]] = []
+    queues = list(by_app.values())
+    while queues and len(picked) < max_pods:
+        for queue in list(queues):
+            picked.append(queue.pop(0))
+            if not queue:
+                queues.remove(queue)
+            if len(picked) >= max_pods:
+                break
+    return picked
+
+
+def sample_logs(
+    client: KubeClient,
+    services: List[str],
+    namespace: Optional[str] = None,
+    pod_bytes: int = POD_BYTES,
+    total_bytes: int = TOTAL_BYTES,
+    tail_lines: int = TAIL_LINES,
+    since_seconds: int = SINCE_SECONDS,
+    max_pods: int = MAX_PODS,
+    max_workers: int = MAX_WORKERS,
+) -> LogSample:
+    """Sample recent logs of the services' pods and extract error signatures.
+
+    Args:
+        client: Kubernetes API client
+        services: Service names, matched against the pods' ``app`` label
+        namespace: Only sample pods of this namespace
+        pod_bytes: Byte cap per container log
+        total_bytes: Byte cap for the whole sample
+        tail_lines: Lines fetched from the end of each log
+        since_seconds: Only log lines from the last this many seconds
+        max_pods: Maximum pods sampled, spread across services
+        max_workers: Maximum concurrent log fetches
+
+    Returns:
+        Signatures ranked by count, plus sampling statistics
+    """
+    services = [s.strip() for s in services if s.strip()]
+    if not services:
+        raise ValueError("At least one service is required")
+    if pod_bytes < 1 or total_bytes < 1:
+        raise ValueError("Byte caps must be positive")
+
+    path = f"/api/v1/namespaces/{namespace}/pods" if namespace else "/api/v1/pods"
+    pods = client.get(path, labelSelector=f"app in ({','.join(services)})").get("items") or []
+    targets = [
+        (pod["metadata"]["namespace"], pod["metadata"]["name"], container["name"])
+        for pod in _pick_pods(pods, max_pods)
+        for container in pod.get("spec", {}).get("containers") or []
+    ]
+
+    budget = _ByteBudget(total_bytes, len(targets))
+    stats = {"bytes": 0, "truncated": 0, "skipped": 0, "sampled": 0}
+    errors: Dict[str, str] = {}
+    lock = threading.Lock()
+
+    def fetch(target: Tuple[str, str, str]) -> Optional[Tuple[str, str]]:
+        pod_namespace, pod, container = target
+        granted = budget.take(pod_bytes)
+        if not granted:
+            with lock:
+                stats["skipped"] += 1
+            return None
+        try:
+            text = client.get_text(
+                f"/api/v1/namespaces/{pod_namespace}/pods/{pod}/log",
+                container=container,
+                tailLines=tail_lines,
+                sinceSeconds=since_seconds,
+                limitBytes=granted,
+            )
+        except KubeAPIError as e:
+            budget.give_back(granted)
+            with lock:
+                errors[f"{pod_namespace}/{pod}/{container}"] = str(e)[:200]
+            return None
+        size = len(text.encode())
+        budget.give_back(max(0, granted - size))
+        with lock:
+            stats["bytes"] += size
+            stats["sampled"] += 1
+            stats["truncated"] += size >= granted
+        return f"{pod_namespace}/{pod}", text
+
+    found: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for result in executor.map(fetch, targets):
+            if result:
+                extract_signatures(result[1], result[0], found)
+
+    signatures = [
+        LogSignature(category, text, entry["count"], sorted(entry["pods"]), entry["example"])
+        for (category, text), entry in found.items()
+    ]
+    signatures.sort(key=lambda s: (-s.count, -len(s.pods), s.signature))
+    return LogSample(
+        signatures,
+        len(pods),
+        stats["sampled"],
+        stats["bytes"],
+        stats["truncated"],
+        stats["skipped"],
+        errors,
+    )
+
+
+def format_sample(
+    sample: LogSample, services: List[str], max_signatures: int = MAX_SIGNATURES
+) -> str:
+    """Render a log sample as the compact report returned to the agent."""
+    lines = [
+        f"🪵 LOG SAMPLE: {', '.join(services)}",
+        "================================",
+        f"📊 Pods matched: {sample.pods_found}, containers sampled: {sample.containers_sampled}, "
+        f"{sample.bytes_fetched / 1024:.1f} KiB fetched ({sample.truncated} logs hit the per-pod cap"
+        f"{f', {sample.skipped} skipped by the total cap' if sample.skipped else ''})",
+    ]
+    for source, error in list(sample.errors.items())[:5]:
+        lines.append(f"⚠️ {source}: {error}")
+
+    lines += ["", f"🔍 Error signatures: {len(sample.signatures)}"]
+    for entry in sample.signatures[:max_signatures]:
+        pods = ", ".join(entry.pods[:3]) + (
+            f" +{len(entry.pods) - 3} more" if len(entry.pods) > 3 else ""
+        )
+        lines.append(f"  [{entry.category}] x{entry.count} in {len(entry.pods)} pods ({pods})")
+        lines.append(f"    {entry.example}")
+    if len(sample.signatures) > max_signatures:
+        lines.append(f"  … {len(sample.signatures) - max_signatures} more signatures")
+    if not sample.signatures:
+        lines.append("No error patterns found in the sampled logs")
+
+    lines += ["", "✅ Log sampling completed"]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Sample the services' logs and print the error signatures."""
+    parser = argparse.ArgumentParser(description="Parallel bounded Kubernetes log sampling")
+    parser.add_argument(
+        "--services", required=True, help="Comma-separated services (app label values)"
+    )
+    parser.add_argument("--namespace", default="", help="Only sample pods of this namespace")
+    parser.add_argument(
+        "--pod-bytes", type=int, default=POD_BYTES, help="Byte cap per container log"
+    )
+    parser.add_argument(
+        "--total-bytes", type=int, default=TOTAL_BYTES, help="Byte cap for the whole sample"
+    )
+    parser.add_argument("--tail", type=int, default=TAIL_LINES, help="Lines fetched per log")
+    parser.add_argument(
+        "--since",
+        type=int,
+        default=SINCE_SECONDS,
+        help="Only lines from the last this many seconds",
+    )
+    parser.add_argument("--max-pods", type=int, default=MAX_PODS, help="Maximum pods sampled")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="Output format")
+    args = parser.parse_args(argv)
+
+    services = [s.strip() for s in args.services.split(",") if s.strip() and s.strip() != "all"]
+    if not services:
+        print("⚠️ SKIPPING: No specific services provided for log sampling")
+        return 0
+    try:
+        sample = sample_logs(
+            KubeClient.from_env(),
+            services,
+            namespace=args.namespace or None,
+            pod_bytes=args.pod_bytes,
+            total_bytes=args.total_bytes,
+            tail_lines=args.tail,
+            since_seconds=args.since,
+            max_pods=args.max_pods,
+        )
+    except (KubeAPIError, ValueError) as e:
+        print(f"❌ Log sampling failed: {e}")
+        return 1
+
+    if args.format == "json":
+        print(
+            json.dumps(
+                {**sample._asdict(), "signatures": [s._asdict() for s in sample.signatures]},
+                indent=2,
+            )
+        )
+    else:
+        print(format_sample(sample, services))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,457 @@
+"""
+Service inventory index shared by the service discovery and validation tools.
+
+The inventory holds every service's name, namespace, labels, ports and
+endpoint readiness. It is persisted to a cache file that outlives a single
+tool call. Within its TTL the inventory is answered from the cache. After
+the TTL it is refreshed incrementally by replaying watch events since the
+last seen ``resourceVersion``, and re-listed in full only when that version
+has expired.
+
+Run as ``python -m incident_tools.service_inventory list|suggest|validate`` inside a
+tool container.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .kube_client import KubeAPIError, KubeClient
+from .service_matcher import ServiceMatch, ServiceMatcher
+
+CACHE_DIR_ENV = "INCIDENT_TOOLS_CACHE"
+DEFAULT_CACHE_DIR = "/var/cache/incident-tools"
+DEFAULT_TTL = 300
+WATCH_SECONDS = 1
+INVENTORY_VERSION = 1
+
+RESOURCES = {
+    "services": "/api/v1/services",
+    "endpoints": "/api/v1/endpoints",
+}
+
+
+class ServiceRecord(NamedTuple):
+    """One service in the inventory."""
+
+    name: str
+    namespace: str
+    labels: Dict[str, str]
+    type: str
+    cluster_ip: str
+    ports: List[str]
+    ready_endpoints: int
+    not_ready_endpoints: int
+
+
+class _WatchExpired(Exception):
+    """The resourceVersion to resume from is no longer available."""
+
+
+def _key(obj: Dict[str, Any]) -> str:
+    """Get the ``namespace/name`` key of an API object."""
+    return f"{obj['metadata'].get('namespace', '')}/{obj['metadata']['name']}"
+
+
+def _service_entry(service: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a service object to the fields kept in the inventory."""
+    spec = service.get("spec", {})
+    return {
+        "labels": service["metadata"].get("labels") or {},
+        "type": spec.get("type", "ClusterIP"),
+        "cluster_ip": spec.get("clusterIP", ""),
+        "ports": [f"{p.get('port')}/{p.get('protocol', 'TCP')}" for p in spec.get("ports") or []],
+    }
+
+
+def _endpoint_entry(endpoints: Dict[str, Any]) -> List[int]:
+    """Count the ready and not-ready addresses of an endpoints object."""
+    subsets = endpoints.get("subsets") or []
+    return [
+        sum(len(s.get("addresses") or []) for s in subsets),
+        sum(len(s.get("notReadyAddresses") or []) for s in subsets),
+    ]
+
+
+_ENTRY = {"services": _service_entry, "endpoints": _endpoint_entry}
+# Inventories of this process by cache file (see ``ServiceInventory.from_env``)
+_SHARED: Dict[str, "ServiceInventory"] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+class ServiceInventory:
+    """TTL-cached, incrementally refreshed index of the cluster's services."""
+
+    def __init__(
+        self,
+        client: KubeClient,
+        ttl: int = DEFAULT_TTL,
+        cache_file: Optional[str] = None,
+        watch_seconds: int = WATCH_SECONDS,
+    ):
+        """Initialize the inventory and load the cache file if present.
+
+        Args:
+            client: Kubernetes API client
+            ttl: Seconds the inventory is answered without contacting the API server
+            cache_file: File the inventory is persisted to (None keeps it in memory)
+            watch_seconds: How long an incremental refresh collects watch events
+        """
+        self.client = client
+        self.ttl = ttl
+        self.cache_file = cache_file
+        self.watch_seconds = watch_seconds
+
+        self.entries: Dict[str, Dict[str, Any]] = {kind: {} for kind in RESOURCES}
+        self.versions: Dict[str, str] = {}
+        self.refreshed_at = 0.0
+        self.last_refresh = "empty"
+        self._matcher: Optional[ServiceMatcher] = None
+        # Held by a tool call across its refresh and reads; several tools share one instance
+        self.lock = threading.RLock()
+        self._load()
+
+    @classmethod
+    def from_env(cls, ttl: int = DEFAULT_TTL) -> "ServiceInventory":
+        """Get the inventory cached in ``$INCIDENT_TOOLS_CACHE`` (or the default cache dir).
+
+        One instance per cache file is shared within a process, so in-process
+        tool calls keep the loaded index and match index between calls.
+        """
+        cache_file = os.path.join(os.getenv(CACHE_DIR_ENV, DEFAULT_CACHE_DIR), "services.json")
+        with _SHARED_LOCK:
+            inventory = _SHARED.get(cache_file)
+            if inventory is None:
+                inventory = _SHARED[cache_file] = cls(KubeClient.from_env(), cache_file=cache_file)
+        inventory.ttl = ttl
+        return inventory
+
+    def age(self) -> float:
+        """Seconds since the last refresh."""
+        return time.time() - self.refreshed_at
+
+    def refresh(self, force: bool = False) -> str:
+        """Bring the inventory up to date.
+
+        Args:
+            force: Refresh even when the inventory is within its TTL
+
+        Returns:
+            How the inventory was brought up to date: ``cached``, ``incremental`` or ``full``
+        """
+        with self.lock:
+            return self._refresh(force)
+
+    def _refresh(self, force: bool) -> str:
+        """Refresh with the lock held."""
+        if not force and self.refreshed_at and self.age() < self.ttl:
+            self.last_refresh = "cached"
+            return self.last_refresh
+
+        mode = "full"
+        if len(self.versions) == len(RESOURCES):
+            try:
+                with ThreadPoolExecutor(max_workers=len(RESOURCES)) as executor:
+                    for future in [executor.submit(self._replay, kind) for kind in RESOURCES]:
+                        future.result()
+                mode = "incremental"
+            except (_WatchExpired, KubeAPIError):
+                pass
+
+        if mode == "full":
+            with ThreadPoolExecutor(max_workers=len(RESOURCES)) as executor:
+                for future in [executor.submit(self._relist, kind) for kind in RESOURCES]:
+                    future.result()
+
+        self.refreshed_at = time.time()
+        self.last_refresh = mode
+        self._matcher = None
+        self._save()
+        return mode
+
+    def _relist(self, kind: str) -> None:
+        """Replace a resource kind with a full paged listing."""
+        items, version = self.client.list(RESOURCES[kind])
+        self.entries[kind] = {_key(item): _ENTRY[kind](item) for item in items}
+        self.versions[kind] = version
+
+    def _replay(self, kind: str) -> None:
+        """Apply watch events of a resource kind since its last resourceVersion."""
+        entries = self.entries[kind]
+        for event in self.client.watch(
+            RESOURCES[kind],
+            resourceVersion=self.versions[kind],
+            timeoutSeconds=self.watch_seconds,
+            allowWatchBookmarks="true",
+        ):
+            obj = event.get("object") or {}
+            if event.get("type") == "ERROR":
+                # 410 Gone: the version was compacted away and a relist is required
+                raise _WatchExpired(obj.get("message", "watch error"))
+            if event.get("type") in ("ADDED", "MODIFIED"):
+                entries[_key(obj)] = _ENTRY[kind](obj)
+            elif event.get("type") == "DELETED":
+                entries.pop(_key(obj), None)
+            self.versions[kind] = obj.get("metadata", {}).get(
+                "resourceVersion", self.versions[kind]
+            )
+
+    def _load(self) -> None:
+        """Load the persisted inventory, ignoring a missing or stale cache file."""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != INVENTORY_VERSION:
+            return
+        self.entries = data["entries"]
+        self.versions = data["versions"]
+        self.refreshed_at = data["refreshed_at"]
+
+    def _save(self) -> None:
+        """Persist the inventory atomically; an unwritable cache only costs reuse."""
+        if not self.cache_file:
+            return
+        data = {
+            "version": INVENTORY_VERSION,
+            "entries": self.entries,
+            "versions": self.versions,
+            "refreshed_at": self.refreshed_at,
+        }
+        try:
+            directory = os.path.dirname(self.cache_file)
+            os.makedirs(directory, exist_ok=True)
+            # Unique per writer: tool containers sharing the cache volume can have the same pid
+            fd, partial = tempfile.mkstemp(prefix="services.", suffix=".partial", dir=directory)
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(partial, self.cache_file)
+            except BaseException:
+                os.unlink(partial)
+                raise
+        except OSError:
+            pass
+
+    def _record(self, key: str) -> ServiceRecord:
+        """Build the record of a service key."""
+        namespace, name = key.split("/", 1)
+        entry = self.entries["services"][key]
+        ready, not_ready = self.entries["endpoints"].get(key, [0, 0])
+        return ServiceRecord(
+            name,
+            namespace,
+            entry["labels"],
+            entry["type"],
+            entry["cluster_ip"],
+            entry["ports"],
+            ready,
+            not_ready,
+        )
+
+    def services(self) -> List[ServiceRecord]:
+        """Get every service, ordered by namespace and name."""
+        return [self._record(key) for key in sorted(self.entries["services"])]
+
+    def get(self, name: str, namespace: str) -> Optional[ServiceRecord]:
+        """Get a service by exact name and namespace."""
+        key = f"{namespace}/{name}"
+        return self._record(key) if key in self.entries["services"] else None
+
+    def find(self, name: str) -> List[ServiceRecord]:
+        """Get services with exactly this name in any namespace."""
+        return [
+            self._record(k) for k in sorted(self.entries["services"]) if k.split("/", 1)[1] == name
+        ]
+
+    def search(self, pattern: str) -> List[ServiceRecord]:
+        """Get services whose ``namespace/name`` contains the pattern (case-insensitive)."""
+        pattern = pattern.lower()
+        return [self._record(k) for k in sorted(self.entries["services"]) if pattern in k.lower()]
+
+    def suggest(
+        self, name: str, limit: int = 5, namespace: Optional[str] = None
+    ) -> List[ServiceMatch]:
+        """Suggest services with names similar to ``name``, best first.
+
+        Args:
+            name: Possibly misspelled or partial service name
+            limit: Number of suggestions
+            namespace: Only suggest services in this namespace
+
+        Returns:
+            Ranked suggestions with the namespaces each name exists in
+        """
+        if self._matcher is None:
+            self._matcher = ServiceMatcher(key.split("/", 1) for key in self.entries["services"])
+        return self._matcher.match(name, k=limit, namespace=namespace)
+
+    def namespace_counts(self) -> Dict[str, int]:
+        """Count services per namespace, largest first."""
+        counts: Dict[str, int] = {}
+        for key in self.entries["services"]:
+            namespace = key.split("/", 1)[0]
+            counts[namespace] = counts.get(namespace, 0) + 1
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+
+def format_record(record: ServiceRecord) -> str:
+    """Render a service as one listing line."""
+    labels = ",".join(f"{k}={v}" for k, v in sorted(record.labels.items())) or "<none>"
+    return (
+        f"{record.namespace:<20} {record.name:<40} {record.type:<12} {record.cluster_ip:<16} "
+        f"{','.join(record.ports) or '<none>':<16} {record.ready_endpoints}/"
+        f"{record.ready_endpoints + record.not_ready_endpoints} ready  {labels}"
+    )
+
+
+def format_match(match: ServiceMatch) -> str:
+    """Render a suggestion as one ranked line."""
+    return f"{match.name} (score {match.score:.2f}, {match.distance} edits) in {', '.join(match.namespaces)}"
+
+
+def _describe(inventory: ServiceInventory) -> str:
+    """Describe the inventory freshness."""
+    return (
+        f"📦 Inventory: {len(inventory.entries['services'])} services, "
+        f"{inventory.last_refresh} refresh, {int(inventory.age())}s old"
+    )
+
+
+def list_services(inventory: ServiceInventory, pattern: str = "", limit: int = 500) -> int:
+    """Print the service discovery report."""
+    print("🔍 KUBERNETES SERVICES DISCOVERY")
+    print("=================================")
+    print(_describe(inventory))
+
+    services = inventory.services()
+    print("")
+    print("📋 All services across all namespaces:")
+    for record in services[:limit]:
+        print(format_record(record))
+    if len(services) > limit:
+        print(
+            f"… {len(services) - limit} more services, pass service_pattern to narrow the listing"
+        )
+
+    print("")
+    print("📊 Service summary by namespace:")
+    for namespace, count in inventory.namespace_counts().items():
+        print(f"{count:>7} {namespace}")
+
+    if pattern:
+        print("")
+        print(f"🔍 Searching for services matching pattern: '{pattern}'")
+        matches = inventory.search(pattern)
+        for record in matches:
+            print(format_record(record))
+        if not matches:
+            print(f"❌ No services found matching pattern: {pattern}")
+
+        print("")
+        print("🔍 Similar service names (fuzzy search):")
+        suggestions = inventory.suggest(pattern)
+        for match in suggestions:
+            print(format_match(match))
+        if not suggestions:
+            print("No similar services found")
+
+    print("")
+    print("✅ Services discovery completed")
+    return 0
+
+
+def validate_service(inventory: ServiceInventory, name: str, namespace: str = "default") -> int:
+    """Print the validation report of a service; returns the tool exit code."""
+    print(f"🔍 VALIDATING SERVICE: {name}")
+    print("====================================")
+    print(_describe(inventory))
+
+    print(f"🔍 Checking namespace: {namespace}")
+    record = inventory.get(name, namespace)
+    if record:
+        print(f"✅ Service '{name}' found in namespace '{namespace}'")
+        print("")
+        print("📋 Service details:")
+        print(format_record(record))
+        print("")
+        print("🔗 Service endpoints:")
+        print(f"{record.ready_endpoints} ready, {record.not_ready_endpoints} not ready")
+    else:
+        print(f"❌ Service '{name}' not found in namespace '{namespace}'")
+        print("")
+        print("🔍 Searching across all namespaces...")
+        matches = inventory.find(name) or inventory.search(name)
+        if matches:
+            print("✅ Found matching services:")
+            for match in matches:
+                print(format_record(match))
+        else:
+            print(f"❌ Service '{name}' not found in any namespace")
+            print("")
+            print("💡 Similar service names found:")
+            suggestions = inventory.suggest(name)
+            for match in suggestions:
+                print(format_match(match))
+            if not suggestions:
+                print("No similar services found")
+            print("")
+            print("❌ Service validation failed")
+            return 1
+
+    print("")
+    print("✅ Service validation successful")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Answer a service tool call from the inventory."""
+    parser = argparse.ArgumentParser(description="Cached Kubernetes service inventory")
+    parser.add_argument("--ttl", type=int, default=DEFAULT_TTL, help="Inventory TTL in seconds")
+    parser.add_argument("--refresh", action="store_true", help="Refresh even within the TTL")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="List services")
+    list_parser.add_argument("--pattern", default="", help="Search pattern")
+    list_parser.add_argument("--limit", type=int, default=500, help="Maximum services listed")
+
+    suggest_parser = subparsers.add_parser("suggest", help="Rank services similar to a name")
+    suggest_parser.add_argument("name", help="Possibly misspelled service name")
+    suggest_parser.add_argument("--namespace", help="Only suggest services in this namespace")
+    suggest_parser.add_argument("--limit", type=int, default=5, help="Number of suggestions")
+
+    validate_parser = subparsers.add_parser("validate", help="Validate a service name")
+    validate_parser.add_argument("name", help="Service name")
+    validate_parser.add_argument("--namespace", default="default", help="Namespace checked first")
+
+    args = parser.parse_args(argv)
+    inventory = ServiceInventory.from_env(ttl=args.ttl)
+    with inventory.lock:
+        try:
+            inventory.refresh(force=args.refresh)
+        except KubeAPIError as e:
+            if not inventory.refreshed_at:
+                print(f"❌ Could not list services: {e}")
+                return 1
+            print(f"⚠️ Refresh failed, answering from the cached inventory: {e}")
+
+        if args.command == "list":
+            return list_services(inventory, args.pattern, args.limit)
+        if args.command == "suggest":
+            for match in inventory.suggest(args.name, args.limit, args.namespace):
+                print(format_match(match))
+            return 0
+        return validate_service(inventory, args.name, args.namespace or "default")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+Fuzzy service-name matching for validation suggestions.
+
+Names are indexed by character trigrams. A query gathers candidates that
+share its most selective trigrams, keeps the best by trigram overlap and
+reranks them by edit distance, so misspellings, missing or extra words and swapped
+characters still rank the intended service first.
+"""
+
+import heapq
+import random
+import string
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+NGRAM = 3
+# Candidates reranked by edit distance after trigram filtering
+RERANK_CANDIDATES = 12
+# Posting entries counted per query; the rarest trigrams are counted first
+POSTING_BUDGET = 2048
+MIN_GRAMS = 2
+OVERLAP_SLACK = 2
+
+
+class ServiceMatch(NamedTuple):
+    """A suggested service name with the namespaces it exists in."""
+
+    name: str
+    namespaces: List[str]
+    score: float
+    distance: int
+
+
+def _grams(text: str) -> Set[str]:
+    """Get the padded character trigrams of a name."""
+    padded = f"^{text}$"
+    return {padded[i : i + NGRAM] for i in range(max(1, len(padded) - NGRAM + 1))}
+
+
+def _pattern(query: str) -> Dict[str, int]:
+    """Precompute the per-character match bitmasks of a query for ``_distance``."""
+    masks: Dict[str, int] = {}
+    for i, char in enumerate(query):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def _distance(pattern: Dict[str, int], length: int, text: str, limit: Optional[int] = None) -> int:
+    """Levenshtein distance of a precomputed query to a text (Myers' bit-parallel algorithm).
+
+    With a ``limit``, returns ``limit + 1`` as soon as the distance must exceed it.
+    """
+    if not length:
+        return len(text)
+    if limit is None:
+        limit = length + len(text)
+    remaining = len(text)
+    mask = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive, negative, distance = mask, 0, length
+    get = pattern.get
+    for char in text:
+        eq = get(char, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        ph = negative | ~(xh | positive)
+        mh = positive & xh
+        if ph & last:
+            distance += 1
+        elif mh & last:
+            distance -= 1
+        ph = (ph << 1) | 1
+        positive = ((mh << 1) | ~(xv | ph)) & mask
+        negative = ph & xv
+        remaining -= 1
+        if distance - remaining > limit:
+            return limit + 1
+    return distance
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two strings."""
+    return _distance(_pattern(a), len(a), b)
+
+
+class ServiceMatcher:
+    """Trigram index over service names with edit-distance reranking."""
+
+    def __init__(self, services: Iterable[Tuple[str, str]]):
+        """Build the index.
+
+        Args:
+            services: ``(namespace, name)`` pairs
+        """
+        namespaces: Dict[str, List[str]] = {}
+        for namespace, name in services:
+            namespaces.setdefault(name, []).append(namespace)
+
+        self.names = sorted(namespaces)
+        self.namespaces = [sorted(namespaces[name]) for name in self.names]
+        self._lowered = [name.lower() for name in self.names]
+        self._exact = {name: i for i, name in enumerate(self._lowered)}
+        self._lengths = [len(name) for name in self._lowered]
+
+        self.postings: Dict[str, List[int]] = {}
+        for i, name in enumerate(self._lowered):
+            for gram in _grams(name):
+                self.postings.setdefault(gram, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def match(self, query: str, k: int = 5, namespace: Optional[str] = None) -> List[ServiceMatch]:
+        """Get the top-k service names most similar to a query.
+
+        Args:
+            query: Possibly misspelled or partial service name
+            k: Number of suggestions
+            namespace: Only suggest services present in this namespace
+
+        Returns:
+            Suggestions ranked best first; an exact match scores 1.0
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        # Count shared trigrams using the most selective grams within a posting budget
+        grams = _grams(query)
+        overlap: Counter = Counter()
+        budget = POSTING_BUDGET
+        for used, gram in enumerate(sorted(grams, key=lambda g: len(self.postings.get(g, ())))):
+            postings = self.postings.get(gram, ())
+            if used >= MIN_GRAMS and len(postings) > budget:
+                break
+            overlap.update(postings)
+            budget -= len(postings)
+        exact = self._exact.get(query)
+        if exact is not None:
+            overlap[exact] = len(grams)
+
+        if namespace:
+            overlap = Counter({i: n for i, n in overlap.items() if namespace in self.namespaces[i]})
+
+        # A name within a few edits shares nearly as many trigrams as the best candidate
+        floor = max(overlap.values(), default=0) - OVERLAP_SLACK
+        # Among names sharing as many trigrams, those closest in length come first
+        size, lengths = len(query), self._lengths
+        candidates = heapq.nlargest(
+            RERANK_CANDIDATES,
+            [
+                (shared, -abs(lengths[i] - size), i)
+                for i, shared in overlap.items()
+                if shared >= floor
+            ],
+        )
+
+        pattern = _pattern(query)
+        scored: List[Tuple[float, int, str, int]] = []
+        worst = None
+        for _, _, i in candidates:
+            name = self._lowered[i]
+            partial = query in name or name in query
+            # Once k names are scored, only a closer name can enter the top k
+            distance = _distance(pattern, len(query), name, None if partial else worst)
+            if worst is not None and distance > worst and not partial:
+                continue
+            score = 1 - distance / max(len(query), len(name))
+            if partial:
+                # Partial names ("checkout" for "checkout-api") rank above typos
+                score = max(
+                    score, 0.5 + 0.5 * min(len(query), len(name)) / max(len(query), len(name))
+                )
+            scored.append((score, -distance, self.names[i], i))
+            if len(scored) >= k:
+                worst = sorted(-entry[1] for entry in scored)[k - 1]
+        scored.sort(reverse=True)
+
+        return [
+            ServiceMatch(
+                name,
+                [namespace] if namespace else self.namespaces[i],
+                round(score, 3),
+                -neg_distance,
+            )
+            for score, neg_distance, name, i in scored[:k]
+        ]
+
+
+def benchmark_match(services: int = 50000, queries: int = 1000, seed: int = 7) -> Dict[str, float]:
+    """Measure index build time and query latency on synthetic service names.
+
+    Args:
+        services: Number of synthetic services
+        queries: Number of misspelled queries
+        seed: Random seed for reproducible names
+
+    Returns:
+        Index size, build time, mean and p99 query latency in milliseconds and
+        top-1 accuracy for single-character typos
+    """
+    rng = random.Random(seed)
+    # Pronounceable words joined like real service names, e.g. "kovara-tesu-api"
+    vocabulary = {
+        "".join(
+            rng.choice("bcdfghklmnprstvz") + rng.choice("aeiou") for _ in range(rng.randint(2, 4))
+        )
+        for _ in range(3000)
+    }
+    words = sorted(vocabulary)
+    suffixes = ["api", "svc", "worker", "service", "db", "cache", "consumer", "grpc", "web", "job"]
+    pairs = set()
+    while len(pairs) < services:
+        name = "-".join(rng.sample(words, rng.randint(1, 2)) + [rng.choice(suffixes)])
+        pairs.add((f"team-{rng.randrange(300)}", name))
+    pairs = sorted(pairs)
+
+    start = time.perf_counter()
+    matcher = ServiceMatcher(pairs)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    latencies, hits = [], 0
+    for _ in range(queries):
+        target = rng.choice(pairs)[1]
+        chars = list(target)
+        position = rng.randrange(len(chars))
+        chars[position] = rng.choice(string.ascii_lowercase)
+        query = "".join(chars)
+
+        start = time.perf_counter()
+        result = matcher.match(query, k=5)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += bool(result) and result[0].name == target
+
+    latencies.sort()
+    return {
+        "services": len(pairs),
+        "distinct_names": len(matcher),
+        "build_ms": round(build_ms, 1),
+        "mean_query_ms": round(sum(latencies) / len(latencies), 4),
+        "p99_query_ms": round(latencies[int(len(latencies) * 0.99) - 1], 4),
+        "top1_accuracy": round(hits / queries, 3),
+    }
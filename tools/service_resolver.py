@@ -0,0 +1,275 @@
+"""
+Deterministic service pre-validation for incidents.
+
+Candidate service names are taken from the provided ``affected_services`` list
+or, if none were provided, from the incident title and body. Each candidate
+is resolved against the service inventory: first by exact name, then by fuzzy
+match. A fuzzy match is accepted only when it is both close and clearly ahead
+of the runner-up. Incidents whose candidates all resolve this way proceed
+without the conversational validation agent; only ambiguous or unresolved
+incidents are routed to it.
+
+Run as ``python -m incident_tools.service_resolver --title ... --body ...``
+inside a tool container. With ``--format services`` only the resolved
+comma-separated service list is printed, empty when the agent is needed.
+``--format step`` prints ``<decision>:<services>`` for the workflow step, with
+the decision ``unavailable`` and the services as given when the inventory
+cannot be listed.
+"""
+
+import argparse
+import json
+import re
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .kube_client import KubeAPIError
+from .service_inventory import DEFAULT_TTL, ServiceInventory
+
+# Fuzzy matches are accepted at this score or above...
+AUTO_ACCEPT = 0.85
+# ...when the runner-up scores at least this much lower
+MIN_MARGIN = 0.1
+# Longest run of words matched as one hyphenated name ("payment service api")
+MAX_WINDOW = 4
+# Single words shorter than this are too generic to count as mentions ("api", "db")
+MIN_MENTION_LENGTH = 4
+MAX_CANDIDATES = 20
+# Cluster plumbing that incident prose names without meaning a service ("Kubernetes API errors")
+SYSTEM_NAMESPACES = frozenset({"kube-system", "kube-public", "kube-node-lease"})
+SYSTEM_SERVICES = frozenset({"default/kubernetes"})
+# Single words too generic to count as mentions, even when a service has that name
+GENERIC_WORDS = frozenset("""
+    alert api app backend cache cluster database db default deployment dns frontend gateway
+    ingress k8s kubernetes metrics monitoring network node nodes pod pods production proxy
+    server service services staging web worker
+    """.split())
+
+_WORD = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+_PART = re.compile(r"[-_.]")
+# ReplicaSet hashes, pod suffixes (7d9f8c6b5, xkqvz) and StatefulSet ordinals
+_POD_SUFFIX = re.compile(r"^[a-z0-9]{5,10}$|^\d{1,3}$")
+
+
+class Resolution(NamedTuple):
+    """Outcome of resolving one candidate name."""
+
+    candidate: str
+    status: str  # exact, fuzzy, ambiguous or unknown
+    service: str
+    score: float
+    alternatives: List[str]
+
+    @property
+    def confident(self) -> bool:
+        return self.status in ("exact", "fuzzy")
+
+
+def split_services(value: str) -> List[str]:
+    """Split an ``affected_services`` value into names, keeping their order."""
+    names = [name.strip() for name in re.split(r"[,\s]+", value or "")]
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def pod_owner(word: str, names: Dict[str, str]) -> Optional[str]:
+    """Get the service a pod name belongs to (``payment-svc-7d9f8-x2kq9`` -> ``payment-svc``)."""
+    parts = _PART.split(word)
+    for size in (1, 2):
+        if len(parts) > size and all(_POD_SUFFIX.match(part) for part in parts[-size:]):
+            name = names.get("-".join(parts[:-size]))
+            if name:
+                return name
+    return None
+
+
+def is_system_service(name: str, namespace: str) -> bool:
+    """Tell whether a service is cluster plumbing rather than an application service."""
+    return namespace in SYSTEM_NAMESPACES or f"{namespace}/{name}" in SYSTEM_SERVICES
+
+
+def _mention_word(name: str) -> bool:
+    """Tell whether a single word naming a service counts as a mention of it."""
+    return len(name) >= MIN_MENTION_LENGTH and name.lower() not in GENERIC_WORDS
+
+
+def text_candidates(text: str, names: Dict[str, str]) -> Tuple[List[str], List[str]]:
+    """Find the service names mentioned in free text.
+
+    Runs of whole words are matched as hyphenated names, so "payment service"
+    and "payment_service" both mention ``payment-service``; the longest run
+    wins. Pod names count as mentions of their service. Single generic words
+    ("kubernetes", "cluster") are not mentions.
+
+    Args:
+        text: Incident title and body
+        names: Lowercased service name to service name, without system services
+
+    Returns:
+        Mentioned service names, and service-like words (``user-apii``) that
+        name no service and are left for fuzzy matching
+    """
+    words = _WORD.findall(text.lower())
+    mentioned: List[str] = []
+    unknown: List[str] = []
+    i = 0
+    while i < len(words):
+        for size in range(min(MAX_WINDOW, len(words) - i), 0, -1):
+            name = names.get("-".join(_PART.sub("-", word) for word in words[i : i + size]))
+            if name and (size > 1 or _mention_word(name)):
+                mentioned.append(name)
+                i += size
+                break
+        else:
+            word = words[i]
+            owner = pod_owner(word, names)
+            if owner:
+                mentioned.append(owner)
+            elif "-" in word or "_" in word:
+                unknown.append(word)
+            i += 1
+    return list(dict.fromkeys(mentioned)), list(dict.fromkeys(unknown))
+
+
+def resolve_name(inventory: ServiceInventory, candidate: str) -> Resolution:
+    """Resolve one candidate name by exact and then fuzzy match."""
+    suggestions = inventory.suggest(candidate, limit=3)
+    if not suggestions:
+        return Resolution(candidate, "unknown", "", 0.0, [])
+
+    best = suggestions[0]
+    alternatives = [match.name for match in suggestions[1:]]
+    if best.distance == 0:
+        return Resolution(candidate, "exact", best.name, best.score, alternatives)
+
+    runner_up = suggestions[1].score if len(suggestions) > 1 else 0.0
+    if best.score >= AUTO_ACCEPT and best.score - runner_up >= MIN_MARGIN:
+        return Resolution(candidate, "fuzzy", best.name, best.score, alternatives)
+    return Resolution(candidate, "ambiguous", "", best.score, [best.name] + alternatives)
+
+
+def prevalidate(
+    inventory: ServiceInventory, title: str = "", body: str = "", provided: str = ""
+) -> Dict[str, Any]:
+    """Resolve the services of an incident without the validation agent.
+
+    Args:
+        inventory: Refreshed service inventory
+        title: Incident title
+        body: Incident description
+        provided: ``affected_services`` as given, possibly empty or misspelled
+
+    Returns:
+        The decision (``resolved``, ``ambiguous`` or ``unresolved``), the
+        resolved services, where the candidates came from and one resolution
+        per candidate
+    """
+    resolutions: List[Resolution] = []
+    if split_services(provided):
+        source = "provided"
+        for candidate in split_services(provided)[:MAX_CANDIDATES]:
+            resolutions.append(resolve_name(inventory, candidate))
+    else:
+        source = "text"
+        names = {
+            record.name.lower(): record.name
+            for record in inventory.services()
+            if not is_system_service(record.name, record.namespace)
+        }
+        mentioned, unknown = text_candidates(f"{title}\n{body}", names)
+        for name in mentioned[:MAX_CANDIDATES]:
+            resolutions.append(Resolution(name, "exact", name, 1.0, []))
+        for word in unknown[: max(0, MAX_CANDIDATES - len(resolutions))]:
+            resolution = resolve_name(inventory, word)
+            if resolution.confident and resolution.service.lower() not in names:
+                # A near miss of a system service only
+                resolution = Resolution(word, "unknown", "", 0.0, [])
+            resolutions.append(resolution)
+
+    services = list(dict.fromkeys(r.service for r in resolutions if r.confident))
+    if not resolutions:
+        decision = "unresolved"
+    elif source == "provided":
+        decision = "resolved" if all(r.confident for r in resolutions) else "ambiguous"
+    else:
+        # Unknown words in prose are usually not service names; near misses are
+        if any(r.status == "ambiguous" for r in resolutions):
+            decision = "ambiguous"
+        else:
+            decision = "resolved" if services else "unresolved"
+
+    return {
+        "decision": decision,
+        "services": services if decision == "resolved" else [],
+        "source": source,
+        "resolutions": [r._asdict() for r in resolutions],
+    }
+
+
+def format_prevalidation(result: Dict[str, Any]) -> str:
+    """Render a pre-validation result as a report."""
+    icons = {"exact": "✅", "fuzzy": "🔤", "ambiguous": "❓", "unknown": "❌"}
+    lines = ["🔍 SERVICE PRE-VALIDATION", "=========================="]
+    lines.append(f"Candidates from: {result['source']}")
+    for r in result["resolutions"]:
+        line = f"{icons[r['status']]} {r['candidate']}: {r['status']}"
+        if r["service"]:
+            line += f" -> {r['service']} (score {r['score']:.2f})"
+        if r["alternatives"] and not r["service"]:
+            line += f" (did you mean: {', '.join(r['alternatives'])}?)"
+        lines.append(line)
+    if result["decision"] == "resolved":
+        lines.append(f"✅ Resolved services: {','.join(result['services'])}")
+    else:
+        lines.append(
+            f"🤖 {result['decision'].capitalize()} - routing to the service validation agent"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print the pre-validation of an incident's services."""
+    parser = argparse.ArgumentParser(description="Deterministic incident service pre-validation")
+    parser.add_argument("--title", default="", help="Incident title")
+    parser.add_argument("--body", default="", help="Incident description")
+    parser.add_argument("--services", default="", help="affected_services as provided")
+    parser.add_argument("--ttl", type=int, default=DEFAULT_TTL, help="Inventory TTL in seconds")
+    parser.add_argument(
+        "--format",
+        choices=["text", "json", "services", "step"],
+        default="text",
+        help="Output format",
+    )
+    args = parser.parse_args(argv)
+
+    inventory = ServiceInventory.from_env(ttl=args.ttl)
+    with inventory.lock:
+        try:
+            inventory.refresh()
+        except KubeAPIError as e:
+            if not inventory.refreshed_at:
+                # Without an inventory nothing can be validated; keep the input as given
+                provided = ",".join(split_services(args.services))
+                if args.format == "services":
+                    print(provided)
+                elif args.format == "step":
+                    print(f"unavailable:{provided}")
+                else:
+                    print(f"❌ Could not list services: {e}")
+                return 0
+            if args.format == "text":
+                print(f"⚠️ Refresh failed, answering from the cached inventory: {e}")
+
+        result = prevalidate(inventory, args.title, args.body, args.services)
+    if args.format == "step":
+        print(f"{result['decision']}:{','.join(result['services'])}")
+    elif args.format == "services":
+        print(",".join(result["services"]))
+    elif args.format == "json":
+        print(json.dumps(result, indent=2))
+    else:
+        print(format_prevalidation(result))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""
+Scale benchmark of the Kubernetes tools against a fake API server.
+
+Each tool in ``KubernetesToolDefinitions`` is run the way its container runs
+it: the tool package is laid out as in the toolbox image, its volumes are
+mapped to local directories and its script is executed with its args as
+environment variables. kubectl and helm are pointed at the fake server through a
+kubeconfig, and the Python tools through ``KUBERNETES_API``. With the
+``in-process`` runtime the Python-backed tools are called through
+``PythonToolRuntime`` instead of their scripts. Each run reports wall time,
+the API requests it made and the bytes it transferred.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .fake_kube_api import FakeKubeAPI
+from .kube_client import CLUSTER_CACHE_URL_ENV, KUBERNETES_API_ENV
+from .kubernetes_tools import (
+    PYTHON_TOOLS,
+    TOOL_MODULES,
+    TOOL_PACKAGE,
+    TOOL_PACKAGE_ROOT,
+    KubernetesToolDefinitions,
+)
+from .service_inventory import CACHE_DIR_ENV, DEFAULT_CACHE_DIR
+from .tool_runtime import PythonToolRuntime
+
+TOOL_TIMEOUT = 600
+RUNTIMES = ["container", "in-process"]
+# Binaries a tool script needs on PATH besides the shell and python
+BINARIES = ["kubectl", "helm", "jq"]
+
+
+class ToolRun(NamedTuple):
+    """One benchmarked tool execution."""
+
+    tool: str
+    run: int
+    status: str
+    seconds: float
+    requests: int
+    bytes: int
+    output_lines: int
+    note: str
+
+
+def _tool_args(tool: Dict[str, Any], values: Dict[str, str]) -> Dict[str, str]:
+    """Resolve ``{{name}}`` and ``{{name:default}}`` arg templates to environment values."""
+    env = {}
+    for variable, template in tool.get("args", {}).items():
+        found = re.fullmatch(r"\{\{(\w+)(?::(.*))?\}\}", template)
+        if found:
+            env[variable] = values.get(found.group(1), found.group(2) or "")
+        else:
+            env[variable] = template
+    return env
+
+
+def _prepare(tool: Dict[str, Any], workdir: str) -> str:
+    """Lay out the tool package under ``workdir`` as in the toolbox image and point the script at it."""
+    root = os.path.join(workdir, "root")
+    package = os.path.join(root, TOOL_PACKAGE_ROOT.lstrip("/"), TOOL_PACKAGE)
+    os.makedirs(package, exist_ok=True)
+    open(os.path.join(package, "__init__.py"), "w").close()
+    for module in TOOL_MODULES:
+        shutil.copy(os.path.join(os.path.dirname(__file__), f"{module}.py"), package)
+    return tool["content"].replace(
+        f"cd {TOOL_PACKAGE_ROOT}", f"cd {os.path.join(root, TOOL_PACKAGE_ROOT.lstrip('/'))}"
+    )
+
+
+def _volume_dirs(tool: Dict[str, Any], workdir: str) -> Dict[str, str]:
+    """Map a tool's volumes to local directories, as environment overrides."""
+    env = {}
+    for volume in tool.get("with_volumes", []):
+        local = os.path.join(workdir, "volumes", volume["name"])
+        os.makedirs(local, exist_ok=True)
+        if volume["path"] == DEFAULT_CACHE_DIR:
+            env[CACHE_DIR_ENV] = local
+    return env
+
+
+def run_tool(
+    tool: Dict[str, Any],
+    api: FakeKubeAPI,
+    workdir: str,
+    values: Dict[str, str],
+    run: int = 1,
+    timeout: int = TOOL_TIMEOUT,
+) -> ToolRun:
+    """Run one tool script against a started fake API server.
+
+    Args:
+        tool: Tool definition from ``KubernetesToolDefinitions``
+        api: Started fake API server
+        workdir: Directory shared by all runs (tool files, volumes, kubeconfig)
+        values: Values for the tool's arg templates, e.g. ``affected_services``
+        run: Run number reported with the result
+        timeout: Seconds before the tool is killed
+
+    Returns:
+        Timing and API traffic of the run; tools needing a missing binary are skipped
+    """
+    content = tool["content"]
+    missing = [b for b in BINARIES if re.search(rf"\b{b}\b", content) and not shutil.which(b)]
+    if missing:
+        return ToolRun(
+            tool["name"], run, "skipped", 0.0, 0, 0, 0, f"{', '.join(missing)} not installed"
+        )
+
+    script = os.path.join(workdir, f"{tool['name']}.sh")
+    with open(script, "w") as f:
+        f.write(_prepare(tool, workdir))
+    shell = (
+        content.lstrip().splitlines()[0][2:].strip()
+        if content.lstrip().startswith("#!")
+        else "/bin/sh"
+    )
+
+    env = {k: v for k, v in os.environ.items() if k != CLUSTER_CACHE_URL_ENV}
+    env.update(_tool_args(tool, values))
+    env.update(
+        {
+            "PATH": f"{os.path.join(workdir, 'bin')}{os.pathsep}{env.get('PATH', '')}",
+            "HOME": workdir,
+            "KUBECONFIG": os.path.join(workdir, "kubeconfig"),
+            KUBERNETES_API_ENV: api.url,
+        }
+    )
+    env.update(_volume_dirs(tool, workdir))
+
+    api.reset_stats()
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(
+            [shell, script], env=env, cwd=workdir, capture_output=True, text=True, timeout=timeout
+        )
+        status, output, note = "ok", result.stdout, ""
+        if result.returncode != 0:
+            tail = (result.stderr or result.stdout).strip().splitlines()
+            status, note = "failed", tail[-1][:80] if tail else f"exit code {result.returncode}"
+    except subprocess.TimeoutExpired:
+        status, output, note = "failed", "", f"timed out after {timeout}s"
+    seconds = time.perf_counter() - start
+    stats = api.stats()
+    return ToolRun(
+        tool["name"],
+        run,
+        status,
+        round(seconds, 3),
+        stats["requests"],
+        stats["bytes"],
+        len(output.splitlines()),
+        note,
+    )
+
+
+def run_in_process(
+    tool: Dict[str, Any],
+    api: FakeKubeAPI,
+    runtime: PythonToolRuntime,
+    workdir: str,
+    values: Dict[str, str],
+    run: int = 1,
+) -> ToolRun:
+    """Run one Python-backed tool through the in-process runtime against a started fake API server.
+
+    Args:
+        tool: Tool definition from ``KubernetesToolDefinitions`` whose name is in ``PYTHON_TOOLS``
+        api: Started fake API server
+        runtime: Runtime shared by all runs, so later runs are warm
+        workdir: Directory shared by all runs (volumes)
+        values: Values for the tool's arg templates
+        run: Run number reported with the result
+
+    Returns:
+        Timing and API traffic of the run
+    """
+    overrides = {KUBERNETES_API_ENV: api.url, **_volume_dirs(tool, workdir)}
+    saved = {name: os.environ.get(name) for name in [*overrides, CLUSTER_CACHE_URL_ENV]}
+    os.environ.update(overrides)
+    os.environ.pop(CLUSTER_CACHE_URL_ENV, None)
+
+    api.reset_stats()
+    try:
+        result = runtime.run(tool["name"], _tool_args(tool, values))
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    stats = api.stats()
+
+    status, note = "ok", "in-process"
+    if result.exit_code != 0:
+        tail = result.output.strip().splitlines()
+        status, note = "failed", tail[-1][:80] if tail else f"exit code {result.exit_code}"
+    return ToolRun(
+        tool["name"],
+        run,
+        status,
+        round(result.seconds, 3),
+        stats["requests"],
+        stats["bytes"],
+        len(result.output.splitlines()),
+        note,
+    )
+
+
+def benchmark_tools(
+    nodes: int = 50,
+    pods: int = 10000,
+    services: int = 2000,
+    events: int = 20000,
+    latency: float = 0.0,
+    runs: int = 2,
+    tools: Optional[List[str]] = None,
+    runtime: str = "container",
+) -> Dict[str, Any]:
+    """Run every Kubernetes tool against a fake cluster of the given scale.
+
+    Args:
+        nodes: Nodes in the fake cluster
+        pods: Pods in the fake cluster
+        services: Services in the fake cluster
+        events: Events in the fake cluster
+        latency: Seconds added to every API request
+        runs: Runs per tool; later runs show the effect of tool caches
+        tools: Only run tools with these names
+        runtime: ``container`` runs every tool script; ``in-process`` calls the
+            Python-backed tools through ``PythonToolRuntime``
+
+    Returns:
+        The cluster scale and one result per tool run
+    """
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Unknown runtime: {runtime}")
+    start = time.perf_counter()
+    api = FakeKubeAPI(nodes=nodes, pods=pods, services=services, events=events, latency=latency)
+    generate_seconds = time.perf_counter() - start
+
+    service_items = api.store["services"]
+    first = (
+        service_items[0]["metadata"]
+        if service_items
+        else {"name": "missing", "namespace": "default"}
+    )
+    values = {
+        "affected_services": ",".join(s["metadata"]["name"] for s in service_items[:3]) or "all",
+        "service_name": first["name"],
+        "namespace": first["namespace"],
+        "service_pattern": first["name"].split("-")[0],
+    }
+
+    results: List[ToolRun] = []
+    python_runtime = PythonToolRuntime() if runtime == "in-process" else None
+    workdir = tempfile.mkdtemp(prefix="tool-benchmark-")
+    try:
+        api.start()
+        api.write_kubeconfig(os.path.join(workdir, "kubeconfig"))
+        os.makedirs(os.path.join(workdir, "bin"))
+        # Tool scripts call ``python`` as in the toolbox image
+        os.symlink(sys.executable, os.path.join(workdir, "bin", "python"))
+
+        for tool in KubernetesToolDefinitions.get_all_tools():
+            if tools and tool["name"] not in tools:
+                continue
+            for run in range(1, runs + 1):
+                if python_runtime and tool["name"] in PYTHON_TOOLS:
+                    results.append(run_in_process(tool, api, python_runtime, workdir, values, run))
+                else:
+                    results.append(run_tool(tool, api, workdir, values, run))
+    finally:
+        api.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "cluster": {
+            "nodes": nodes,
+            "pods": pods,
+            "services": services,
+            "events": events,
+            "latency_ms": round(latency * 1000, 1),
+            "generate_seconds": round(generate_seconds, 2),
+        },
+        "runtime": runtime,
+        "runs": [run._asdict() for run in results],
+    }
+
+
+def format_benchmark(report: Dict[str, Any]) -> str:
+    """Render a benchmark report as a table."""
+    cluster = report["cluster"]
+    lines = [
+        f"🧪 Fake cluster: {cluster['nodes']} nodes, {cluster['pods']} pods, "
+        f"{cluster['services']} services, {cluster['events']} events, "
+        f"{cluster['latency_ms']} ms latency, {report.get('runtime', 'container')} runtime",
+        "",
+        f"{'TOOL':<32} {'RUN':>3} {'STATUS':<8} {'WALL (s)':>9} {'REQUESTS':>9} {'BYTES':>12}  NOTE",
+    ]
+    for run in report["runs"]:
+        lines.append(
+            f"{run['tool']:<32} {run['run']:>3} {run['status']:<8} {run['seconds']:>9.3f} "
+            f"{run['requests']:>9} {run['bytes']:>12,}  {run['note']}".rstrip()
+        )
+    return "\n".join(lines)
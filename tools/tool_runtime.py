@@ -0,0 +1,257 @@
+"""
+In-process runtime for the Python-backed Kubernetes tools.
+
+A container tool call starts a toolbox container and a fresh interpreter,
+and its module state is discarded when it ends. Here the modules of
+``PYTHON_TOOLS`` are imported once into a long-running process. Each call runs
+the module's ``main`` with the argv the container script would pass, and the
+output is captured per thread. A warm call costs only the tool logic and its
+API requests, typically tens of milliseconds. The service inventory and its
+match index also stay loaded between calls.
+
+Run with ``kubiya-incident tool-server --port 8788`` and set
+``INCIDENT_TOOL_SERVER_URL`` so ``KubernetesToolDefinitions`` serves these tools
+as HTTP tools calling the server instead of as container tools. Calls must
+carry the shared secret of ``INCIDENT_RETRIGGER_SECRET`` as a bearer token.
+"""
+
+import importlib
+import io
+import json
+import sys
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+from .kube_client import bearer_authorized
+from .kubernetes_tools import PYTHON_TOOLS
+
+MAX_BODY = 64 * 1024
+
+
+class ToolResult(NamedTuple):
+    """Output of one in-process tool call."""
+
+    tool: str
+    exit_code: int
+    output: str
+    seconds: float
+
+
+class _ThreadOutput(io.TextIOBase):
+    """Stream proxy writing to the calling thread's capture buffer, if any."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text: str) -> int:
+        return (getattr(self.local, "buffer", None) or self.stream).write(text)
+
+    def flush(self) -> None:
+        if getattr(self.local, "buffer", None) is None:
+            self.stream.flush()
+
+
+_install_lock = threading.Lock()
+
+
+def _output_proxies() -> Tuple[_ThreadOutput, _ThreadOutput]:
+    """Install the stdout and stderr proxies once per process."""
+    with _install_lock:
+        if not isinstance(sys.stdout, _ThreadOutput):
+            sys.stdout = _ThreadOutput(sys.stdout)
+        if not isinstance(sys.stderr, _ThreadOutput):
+            sys.stderr = _ThreadOutput(sys.stderr)
+        return sys.stdout, sys.stderr
+
+
+@contextmanager
+def _capture(buffer: io.StringIO) -> Iterator[None]:
+    """Send this thread's stdout and stderr to ``buffer``, as a container's combined output."""
+    proxies = _output_proxies()
+    for proxy in proxies:
+        proxy.local.buffer = buffer
+    try:
+        yield
+    finally:
+        for proxy in proxies:
+            proxy.local.buffer = None
+
+
+def tool_argv(argv: List[str], args: Dict[str, Any]) -> List[str]:
+    """Fill the ``$VAR`` items of a tool's argv from its call arguments."""
+    return [str(args.get(item[1:]) or "") if item.startswith("$") else item for item in argv]
+
+
+class PythonToolRuntime:
+    """Runs the Python-backed tools in this process."""
+
+    def __init__(self, tools: Optional[Dict[str, Tuple[str, List[str]]]] = None):
+        """Initialize the runtime; modules are imported on first use or by ``load``.
+
+        Args:
+            tools: Tool name to (module, argv) registry (defaults to ``PYTHON_TOOLS``)
+        """
+        self.tools = PYTHON_TOOLS if tools is None else tools
+        self.calls = 0
+        self._mains: Dict[str, Callable[[List[str]], int]] = {}
+        # Calls into one module are serialized, as its module state is not thread-safe
+        self._locks = {module: threading.Lock() for module, _ in self.tools.values()}
+
+    def load(self) -> "PythonToolRuntime":
+        """Import every tool module up front so no call pays for imports."""
+        for module, _ in self.tools.values():
+            self._main(module)
+        return self
+
+    def _main(self, module: str) -> Callable[[List[str]], int]:
+        """Get the ``main`` of a tool module, importing it once."""
+        main = self._mains.get(module)
+        if main is None:
+            main = self._mains[module] = importlib.import_module(f".{module}", __package__).main
+        return main
+
+    def run(self, name: str, args: Optional[Dict[str, Any]] = None) -> ToolResult:
+        """Run a tool with its call arguments.
+
+        Args:
+            name: Tool name, e.g. ``"validate_service_exists"``
+            args: Tool arguments by variable name, e.g. ``{"SERVICE_NAME": "user-api"}``
+
+        Returns:
+            Exit code and combined output, as the container tool would produce them
+        """
+        if name not in self.tools:
+            raise ValueError(f"Unknown tool: {name}")
+        module, argv = self.tools[name]
+        argv = tool_argv(argv, args or {})
+        main = self._main(module)
+
+        buffer = io.StringIO()
+        start = time.perf_counter()
+        with self._locks[module], _capture(buffer):
+            try:
+                exit_code = main(argv)
+            except SystemExit as e:
+                # argparse usage errors
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception as e:
+                print(f"❌ {name} failed: {e}")
+                exit_code = 1
+        self.calls += 1
+        return ToolResult(name, exit_code or 0, buffer.getvalue(), time.perf_counter() - start)
+
+
+class _Server(ThreadingHTTPServer):
+    """Threaded server whose listen backlog absorbs bursts of concurrent agent calls."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+# Extra POST endpoint: request arguments and headers in, (status, JSON response) out
+Route = Callable[[Dict[str, Any], Mapping[str, str]], Tuple[int, Dict[str, Any]]]
+
+
+def _handler(runtime: PythonToolRuntime, routes: Dict[str, Route], secret: str):
+    """Build the HTTP request handler class serving a runtime to holders of the secret."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if urllib.parse.urlparse(self.path).path == "/healthz":
+                self._send(
+                    200, json.dumps({"tools": sorted(runtime.tools), "calls": runtime.calls})
+                )
+            else:
+                self._send(404, json.dumps({"error": f"unknown path {self.path}"}))
+
+        def do_POST(self):
+            path = urllib.parse.urlparse(self.path).path
+            name = path[len("/tools/") :] if path.startswith("/tools/") else ""
+            if name not in runtime.tools and path not in routes:
+                self._send(404, json.dumps({"error": f"unknown tool {name or path}"}))
+                return
+            # Extra routes check the secret themselves
+            if path not in routes and not bearer_authorized(self.headers, secret):
+                self._send(401, json.dumps({"error": "missing or invalid shared secret"}))
+                return
+
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY:
+                self._send(413, json.dumps({"error": "request body too large"}))
+                return
+            try:
+                args = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(args, dict):
+                    raise ValueError("arguments must be a JSON object")
+            except ValueError as e:
+                self._send(400, json.dumps({"error": f"invalid arguments: {e}"}))
+                return
+
+            if path in routes:
+                status, response = routes[path](args, self.headers)
+                self._send(status, json.dumps(response))
+                return
+
+            result = runtime.run(name, args)
+            self._send(
+                200 if result.exit_code == 0 else 422,
+                result.output,
+                "text/plain; charset=utf-8",
+                {
+                    "X-Tool-Exit-Code": str(result.exit_code),
+                    "X-Tool-Seconds": f"{result.seconds:.3f}",
+                },
+            )
+
+        def _send(
+            self,
+            status: int,
+            body: str,
+            content_type: str = "application/json",
+            headers: Optional[Dict[str, str]] = None,
+        ):
+            data = body.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for header, value in (headers or {}).items():
+                self.send_header(header, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(
+    runtime: PythonToolRuntime,
+    secret: str,
+    host: str = "127.0.0.1",
+    port: int = 8788,
+    routes: Optional[Dict[str, Route]] = None,
+) -> ThreadingHTTPServer:
+    """Create the HTTP server answering ``POST /tools/<name>`` from a runtime.
+
+    Args:
+        runtime: Tool runtime, ideally already loaded
+        secret: Shared secret tool calls send as ``Authorization: Bearer <secret>``
+        host: Bind address
+        port: Bind port
+        routes: Extra POST endpoints by path, e.g. the ``/retrigger`` relay
+
+    Returns:
+        The server; call ``serve_forever`` to handle requests
+
+    Raises:
+        ValueError: If the secret is empty
+    """
+    if not secret:
+        raise ValueError("The tool server requires a shared secret")
+    return _Server((host, port), _handler(runtime, routes or {}, secret))
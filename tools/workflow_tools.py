@@ -1,21 +1,197 @@
 """
 Workflow re-triggering tools for incident response.
+
+Once an agent has validated an incident's services it re-triggers the
+incident with the focused re-trigger workflow
+(``IncidentResponseWorkflow.create_retrigger_workflow``). With a tool server
+(``INCIDENT_TOOL_SERVER_URL``) the tool only sends the incident and its changed
+parameters to the server's ``/retrigger`` relay, which builds that workflow and
+submits it on the configured runner (``core/retrigger.py``). Without one, the
+tool submits the same workflow definition directly. Either way a re-trigger is
+keyed by the incident and its validated service set, the re-triggered
+execution ID carries that key, and duplicates of an accepted re-trigger are
+dropped.
+
+The relay authenticates the tool with the shared secret in
+``INCIDENT_RETRIGGER_SECRET`` and is the authoritative deduplication. The
+workflow's first step also claims its key in a directory on the runner, which
+only deduplicates re-triggers that land on the same runner filesystem.
 """
 
-from typing import Any, Dict
+import hashlib
+import re
+from typing import Any, Dict, List
+
+from utils.execution_cache import DEFAULT_CACHE_DIR
+from utils.slack_token import SLACK_TOKEN_SECRET
+
+from .kube_client import SHARED_SECRET_ENV
+from .kubernetes_tools import TOOL_SERVER_URL
+
+DEFAULT_RUNNER = "gke-integration"
+# Seconds a re-trigger key stays claimed; the same services can be re-triggered after it
+RETRIGGER_TTL = 3600
+RETRIGGER_CLAIMS_DIR = f"{DEFAULT_CACHE_DIR}/retrigger-claims"
+# Shared secret the relay tool sends and the /retrigger relay requires
+RETRIGGER_SECRET_ENV = SHARED_SECRET_ENV
+# Output of the claim step for a duplicate; later steps only run on a claimed key
+DUPLICATE_CLAIM = "duplicate"
+CLAIMED_KEY_PRECONDITION = {"condition": "${retrigger_key}", "expected": "re:^[0-9a-f]{16}$"}
+# Workflow parameters a re-trigger sets, with the agent tool values they are taken from
+RETRIGGER_PARAMS = {
+    "incident_id": "{{INCIDENT_ID}}",
+    "incident_title": "{{INCIDENT_TITLE}}",
+    "incident_severity": "{{INCIDENT_SEVERITY}}",
+    "incident_body": "{{INCIDENT_BODY}}",
+    "incident_url": "{{INCIDENT_URL}}",
+    "slack_channel_id": "{{SLACK_CHANNEL_ID}}",
+    "affected_services": "{{validated_service_name}}",
+    "parent_execution_id": "{{PARENT_EXECUTION_ID}}",
+}
+
+
+def normalize_services(services: str) -> List[str]:
+    """Get the sorted, deduplicated, lowercased service names of a service list."""
+    return sorted({name.lower() for name in re.split(r"[,\s]+", services or "") if name})
+
+
+def retrigger_key(incident_id: str, services: str) -> str:
+    """Get the idempotency key of re-triggering an incident with a service set.
+
+    The key does not depend on the order, case or duplicates of the services.
+    ``claim_command`` computes the same key in shell.
+    """
+    canonical = ",".join(normalize_services(services))
+    return hashlib.sha256(f"{incident_id}\n{canonical}".encode()).hexdigest()[:16]
+
+
+def retrigger_execution_id(key: str) -> str:
+    """Get the execution ID of the re-trigger with an idempotency key (or template reference)."""
+    return f"retrigger-{key}"
+
+
+def claim_command(claims_dir: str = RETRIGGER_CLAIMS_DIR) -> str:
+    """Get the command claiming the re-trigger key of a workflow on the runner.
+
+    Prints the key, or ``DUPLICATE_CLAIM`` when the key is already claimed, so
+    a duplicate is skipped rather than failed. The incident and services are
+    read through quoted heredocs and never parsed by the shell.
+
+    Args:
+        claims_dir: Directory on the runner holding claimed keys
+    """
+    return (
+        """
+SERVICES=$(cat << 'RETRIGGER_SERVICES_EOF' | tr 'A-Z, \\t' 'a-z\\n\\n\\n' | sed '/^$/d' | LC_ALL=C sort -u | paste -sd, -
+${affected_services}
+RETRIGGER_SERVICES_EOF
+)
+INCIDENT=$(cat << 'RETRIGGER_INCIDENT_EOF'
+${incident_id}
+RETRIGGER_INCIDENT_EOF
+)
+KEY=$(printf '%s\\n%s' "$INCIDENT" "$SERVICES" | sha256sum | cut -c1-16)
+CLAIMS="CLAIMS_DIR"
+mkdir -p "$CLAIMS"
+find "$CLAIMS" -mindepth 1 -maxdepth 1 -mmin +TTL_MINUTES -exec rm -rf {} + 2>/dev/null || true
+if ! mkdir "$CLAIMS/$KEY" 2>/dev/null; then
+  echo "🔁 DUPLICATE RE-TRIGGER: $INCIDENT was already re-triggered for $SERVICES (key $KEY)" >&2
+  echo "DUPLICATE_CLAIM"
+  exit 0
+fi
+echo "$KEY"
+""".replace("CLAIMS_DIR", claims_dir)
+        .replace("TTL_MINUTES", str(RETRIGGER_TTL // 60))
+        .replace("DUPLICATE_CLAIM", DUPLICATE_CLAIM)
+    )
+
+
+def thread_reply_command() -> str:
+    """Get the command replying in the parent's incident alert thread; no alert is reposted."""
+    return """
+if [ -z "${parent_alert.ts}" ]; then
+  echo "ℹ️ No incident alert cached by the parent execution; the validation agent reports the re-trigger"
+  exit 0
+fi
+cat > /tmp/retrigger-reply.json << 'RETRIGGER_REPLY_EOF'
+{"channel": "${parent_alert.channel}", "thread_ts": "${parent_alert.ts}", "text": "✅ *Services validated:* ${affected_services}. Targeted investigation re-triggered."}
+RETRIGGER_REPLY_EOF
+curl -s -X POST https://slack.com/api/chat.postMessage \\
+  -H "Authorization: Bearer ${slack_token.token}" \\
+  -H "Content-Type: application/json; charset=utf-8" \\
+  -d @/tmp/retrigger-reply.json
+"""
 
 
 class WorkflowRetriggerTool:
     """Tool for re-triggering incident workflows with validated services."""
 
     @staticmethod
-    def create_retrigger_tool() -> Dict[str, Any]:
-        """Create workflow re-trigger tool definition."""
+    def create_retrigger_tool(
+        workflow: Dict[str, Any],
+        runner: str = DEFAULT_RUNNER,
+        slack_token_secret: str = SLACK_TOKEN_SECRET,
+        server_url: str = TOOL_SERVER_URL,
+    ) -> Dict[str, Any]:
+        """Create workflow re-trigger tool definition.
+
+        Args:
+            workflow: Focused re-trigger workflow definition submitted without a tool server
+            runner: Runner the re-triggered workflow executes on
+            slack_token_secret: Kubiya secret holding the Slack bot token
+            server_url: Tool server whose ``/retrigger`` relay builds and submits the
+                re-trigger workflow; empty submits ``workflow`` directly
+
+        Returns:
+            HTTP tool definition named ``workflow_retrigger``
+        """
+        if server_url:
+            return WorkflowRetriggerTool.relay_tool(server_url)
+        return WorkflowRetriggerTool.direct_tool(workflow, runner, slack_token_secret)
+
+    @staticmethod
+    def relay_tool(server_url: str) -> Dict[str, Any]:
+        """Create the re-trigger tool sending only the incident and its changed params to the relay.
+
+        The relay submits the re-trigger workflow with its own runner and
+        credentials, and answers duplicates of an accepted re-trigger without
+        submitting again.
+        """
+        return {
+            "name": "workflow_retrigger",
+            "description": "Re-trigger the incident workflow with validated service information; repeated calls for the same incident and services are collapsed",
+            "type": "http",
+            "url": f"{server_url.rstrip('/')}/retrigger",
+            "method": "POST",
+            "headers": {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {{{{{RETRIGGER_SECRET_ENV}}}}}",
+            },
+            "body": dict(RETRIGGER_PARAMS),
+        }
+
+    @staticmethod
+    def direct_tool(
+        workflow: Dict[str, Any],
+        runner: str = DEFAULT_RUNNER,
+        slack_token_secret: str = SLACK_TOKEN_SECRET,
+    ) -> Dict[str, Any]:
+        """Create the re-trigger tool submitting a workflow to the Kubiya Workflow API.
+
+        The workflow keeps its steps and defaults; the parameters in
+        ``RETRIGGER_PARAMS`` are filled in from the agent's tool values.
+
+        Args:
+            workflow: Workflow definition, as built by
+                ``IncidentResponseWorkflow.create_retrigger_workflow``
+            runner: Runner the workflow executes on
+            slack_token_secret: Kubiya secret the runner injects for the Slack token
+        """
         return {
             "name": "workflow_retrigger",
             "description": "Re-trigger the incident workflow with validated service information using the Kubiya Workflow API",
             "type": "http",
-            "url": "https://api.kubiya.ai/api/v1/workflow?runner=gke-integration&operation=execute_workflow",
+            "url": f"https://api.kubiya.ai/api/v1/workflow?runner={runner}&operation=execute_workflow",
             "method": "POST",
             "headers": {
                 "Content-Type": "application/json",
@@ -24,63 +200,15 @@ class WorkflowRetriggerTool:
             },
             "body": {
                 "command": "execute_workflow",
-                "name": "incident-response-retrigger-{{INCIDENT_ID}}",
-                "description": "Re-triggered incident response with validated service: {{validated_service_name}}",
+                "name": workflow["name"],
+                "description": workflow["description"],
                 "env": {
                     "KUBIYA_API_KEY": "{{KUBIYA_API_KEY}}",
                     "KUBIYA_USER_EMAIL": "{{KUBIYA_USER_EMAIL}}",
                     "KUBIYA_USER_ORG": "{{KUBIYA_USER_ORG}}",
                 },
-                "params": {
-                    "incident_id": "{{INCIDENT_ID}}",
-                    "incident_title": "{{INCIDENT_TITLE}}",
-                    "incident_severity": "{{INCIDENT_SEVERITY}}",
-                    "incident_body": "{{INCIDENT_BODY}}",
-                    "incident_url": "{{INCIDENT_URL}}",
-                    "slack_channel_id": "{{SLACK_CHANNEL_ID}}",
-                    "affected_services": "{{validated_service_name}}",
-                    "incident_priority": "medium",
-                    "incident_source": "agent-validated",
-                    "incident_owner": "{{KUBIYA_USER_EMAIL}}",
-                    "customer_impact": "partial",
-                },
-                "steps": [
-                    {
-                        "name": "validated-incident-alert",
-                        "description": "Send validated incident alert to Slack",
-                        "executor": {
-                            "type": "kubiya",
-                            "config": {
-                                "url": "api/v1/integration/slack/token/1",
-                                "method": "GET",
-                                "timeout": 30,
-                            },
-                        },
-                        "output": "slack_token",
-                    },
-                    {
-                        "name": "post-validated-alert",
-                        "description": "Post alert with validated service information",
-                        "executor": {"type": "command", "config": {}},
-                        "command": 'echo \'✅ INCIDENT WORKFLOW RE-TRIGGERED\' && echo \'Incident ID: {{INCIDENT_ID}}\' && echo \'Validated Services: {{validated_service_name}}\' && echo \'Starting targeted investigation...\' && curl -X POST https://slack.com/api/chat.postMessage -H "Authorization: Bearer ${slack_token.token}" -H "Content-Type: application/json" -d \'{"channel": "{{SLACK_CHANNEL_ID}}", "text": "✅ INCIDENT RE-TRIGGERED", "attachments": [{"color": "good", "blocks": [{"type": "header", "text": {"type": "plain_text", "text": "✅ INCIDENT VALIDATED & RE-TRIGGERED"}}, {"type": "section", "text": {"type": "mrkdwn", "text": "*{{INCIDENT_TITLE}}*"}}, {"type": "section", "fields": [{"type": "mrkdwn", "text": "*🆔 ID:*\\n{{INCIDENT_ID}}"}, {"type": "mrkdwn", "text": "*🔥 Severity:*\\n{{INCIDENT_SEVERITY}}"}, {"type": "mrkdwn", "text": "*🎯 Validated Services:*\\n{{validated_service_name}}"}, {"type": "mrkdwn", "text": "*🤖 Source:*\\nAgent Validated"}]}, {"type": "section", "text": {"type": "mrkdwn", "text": "*📝 Description:*\\n{{INCIDENT_BODY}}"}}]}]}\'',
-                        "depends": ["validated-incident-alert"],
-                        "output": "validated_alert",
-                    },
-                    {
-                        "name": "investigate-validated-services",
-                        "description": "AI investigation focused on validated services",
-                        "executor": {
-                            "type": "agent",
-                            "config": {
-                                "agent_name": "incident-responder",
-                                "message": "**VALIDATED KUBERNETES INCIDENT INVESTIGATION**\\n\\n**INCIDENT DETAILS:**\\n• **ID:** {{INCIDENT_ID}}\\n• **Title:** {{INCIDENT_TITLE}}\\n• **Severity:** {{INCIDENT_SEVERITY}} (URGENT)\\n• **Description:** {{INCIDENT_BODY}}\\n• **Validated Services:** {{validated_service_name}}\\n• **Dashboard URL:** {{INCIDENT_URL}}\\n\\n**YOUR MISSION - FOCUS ON VALIDATED SERVICES:**\\nPerform targeted investigation for the validated services: {{validated_service_name}}\\n\\n**1. SERVICE-SPECIFIC INVESTIGATION**\\n- Check the health and status of {{validated_service_name}}\\n- Analyze recent deployments affecting these services\\n- Review logs and metrics for these specific services\\n\\n**2. KUBERNETES CLUSTER ANALYSIS**\\n- Check pods, deployments, and services related to {{validated_service_name}}\\n- Verify resource utilization for these services\\n- Look for networking issues affecting these services\\n\\n**3. ROOT CAUSE ANALYSIS**\\n- Focus investigation on {{validated_service_name}}\\n- Identify specific issues with these validated services\\n- Provide targeted remediation steps\\n\\n**REQUIRED OUTPUT FORMAT:**\\n```\\n## 🎯 VALIDATED SERVICE INVESTIGATION\\n[Focus on {{validated_service_name}}]\\n\\n## 🔍 SERVICE STATUS\\n[Current status of {{validated_service_name}}]\\n\\n## 🚨 ROOT CAUSE\\n[Primary cause affecting {{validated_service_name}}]\\n\\n## ⚡ IMMEDIATE ACTIONS\\n1. [Specific action for {{validated_service_name}} - ETA]\\n2. [Additional remediation - ETA]\\n\\n## 📊 IMPACT ASSESSMENT\\n[Business impact of {{validated_service_name}} issues]\\n```\\n\\n**START TARGETED INVESTIGATION NOW!**",
-                            },
-                        },
-                        "depends": ["post-validated-alert"],
-                        "output": "investigation_results",
-                        "timeout": 600,
-                        "retries": 3,
-                    },
-                ],
+                "secrets": [slack_token_secret],
+                "params": {**workflow.get("params", {}), **RETRIGGER_PARAMS},
+                "steps": workflow["steps"],
             },
         }
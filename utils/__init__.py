@@ -0,0 +1,12 @@
+"""Utilities for incident response workflows."""
+
+from .slack_templates import CompiledTemplate, SlackBlockKitTemplates, TemplateData
+from .slack_token import SLACK_TOKEN_SECRET, slack_token_command
+
+__all__ = [
+    "SlackBlockKitTemplates",
+    "CompiledTemplate",
+    "TemplateData",
+    "SLACK_TOKEN_SECRET",
+    "slack_token_command",
+]
@@ -0,0 +1,108 @@
+"""
+Cross-execution output cache for re-triggered incident workflows.
+
+An execution stores its reusable step outputs on the runner under its
+execution ID. A re-triggered execution references that ID as its parent and
+restores the outputs while they are still fresh, instead of recomputing them.
+"""
+
+from typing import Dict, List, Optional
+
+DEFAULT_CACHE_DIR = "/tmp/incident-execution-cache"
+
+# Outputs that are safe to reuse across executions, with their TTL in seconds.
+# Credentials such as the Slack token are never cached: they would sit on the runner's disk.
+CACHEABLE_OUTPUTS: Dict[str, int] = {
+    # The incident alert a re-triggered execution replies to instead of posting a new one
+    "initial_alert_message": 3600,
+}
+
+
+class ExecutionOutputCache:
+    """Shell commands for storing and restoring step outputs by execution ID."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttls: Optional[Dict[str, int]] = None):
+        """Initialize the execution output cache.
+
+        Args:
+            cache_dir: Directory on the runner holding cached outputs
+            ttls: TTL in seconds per cacheable output (defaults to CACHEABLE_OUTPUTS)
+        """
+        self.cache_dir = cache_dir
+        self.ttls = ttls or CACHEABLE_OUTPUTS
+
+    def store_command(self, outputs: List[str], execution_id: str = "${execution_id}") -> str:
+        """Get the command that stores outputs for the current execution.
+
+        Args:
+            outputs: Names of step outputs to store; non-cacheable names are ignored
+            execution_id: Execution ID (or template reference) to store under
+
+        Returns:
+            Shell command writing each output through a quoted heredoc
+        """
+        lines = [
+            'echo "💾 CACHING REUSABLE OUTPUTS FOR RE-TRIGGERS"',
+            f'CACHE_DIR="{self.cache_dir}/{execution_id}"',
+            'mkdir -p "$CACHE_DIR" && chmod 0700 "$CACHE_DIR"',
+        ]
+        for output in outputs:
+            if output not in self.ttls:
+                continue
+            lines.extend(
+                [
+                    f"cat > \"$CACHE_DIR/{output}\" << 'EXECUTION_CACHE_EOF'",
+                    f"${{{output}}}",
+                    "EXECUTION_CACHE_EOF",
+                    f'echo "  cached {output} (ttl {self.ttls[output]}s)"',
+                ]
+            )
+        return "\n" + "\n".join(lines) + "\n"
+
+    def restore_command(
+        self,
+        output: str,
+        fallback: str,
+        parent_execution_id: str = "${parent_execution_id}",
+        execution_id: str = "${execution_id}",
+    ) -> str:
+        """Get the command that restores an output from the parent execution.
+
+        The cached value is printed on stdout when it exists and is younger than
+        the output TTL. Otherwise the fallback command runs, and its result is
+        cached under the current execution for later re-triggers.
+
+        Args:
+            output: Name of the output to restore
+            fallback: Shell command printing the value when the cache misses
+            parent_execution_id: Parent execution ID (or template reference)
+            execution_id: Current execution ID (or template reference)
+
+        Returns:
+            Shell command printing the output value
+        """
+        if output not in self.ttls:
+            raise ValueError(f"Output {output} is not cacheable across executions")
+
+        return f"""
+PARENT="{parent_execution_id}"
+CACHED="{self.cache_dir}/$PARENT/{output}"
+TTL={self.ttls[output]}
+
+if [ -n "$PARENT" ] && [ -s "$CACHED" ]; then
+  AGE=$(( $(date +%s) - $(stat -c %Y "$CACHED") ))
+  if [ "$AGE" -lt "$TTL" ]; then
+    echo "♻️ Reusing {output} from parent execution $PARENT (age $AGE seconds)" >&2
+    cat "$CACHED"
+    exit 0
+  fi
+  echo "⌛ Cached {output} from $PARENT expired (age $AGE seconds, ttl $TTL seconds)" >&2
+fi
+
+echo "🔄 Computing {output} (no fresh cached value)" >&2
+CACHE_DIR="{self.cache_dir}/{execution_id}"
+mkdir -p "$CACHE_DIR" && chmod 0700 "$CACHE_DIR"
+VALUE=$({fallback}) || exit 1
+printf '%s\\n' "$VALUE" > "$CACHE_DIR/{output}"
+printf '%s\\n' "$VALUE"
+"""
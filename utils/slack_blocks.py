@@ -0,0 +1,11 @@
+"""
+Block Kit size limits for Slack messages.
+
+Slack rejects a message whose section text exceeds 3000 characters, and a
+button value longer than 2000 characters. The workflow steps keep their
+payloads within these limits; oversized sections are cut down and delivered
+in full as a file in the message thread by the step library ``slack_fit``.
+"""
+
+MAX_SECTION_TEXT = 3000
+MAX_BUTTON_VALUE = 2000
@@ -0,0 +1,575 @@
+"""
+Slack Block Kit templates compiled once into JSON-safe renderers.
+
+A template is a Block Kit payload written as plain Python data, with
+``{name}`` or ``{name|default}`` placeholders inside string values. Compiling
+serializes the payload once and keeps the static JSON fragments, so rendering
+only escapes the placeholder values and joins them in. Values are always JSON
+string escaped, so quotes, backslashes and newlines in incident fields cannot
+break the payload.
+
+Rendered payloads are used directly by the Slack client. For workflow steps,
+whose values are only known on the runner, ``shell_command`` emits the static
+fragments as-is and escapes each runtime value on the runner.
+"""
+
+import json
+import re
+import time
+from json.encoder import encode_basestring
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+PLACEHOLDER = re.compile(r"\{([a-z_][a-z0-9_]*)(?:\|([^{}]*))?\}")
+
+# Values containing workflow template references or naming a shell variable
+# are resolved on the runner rather than at build time
+RUNTIME_REFERENCE = re.compile(r"\$\{|^\$[A-Za-z_][A-Za-z0-9_]*$")
+
+# Channel value of payloads rendered once and sent to many channels by slack_fanout
+FANOUT_CHANNEL = "@@FANOUT_CHANNEL@@"
+
+_SLOT = "@@TEMPLATE_SLOT_{}@@"
+_SLOT_PATTERN = re.compile(r"@@TEMPLATE_SLOT_(\d+)@@")
+
+
+def _escape(value: Any) -> str:
+    """JSON-escape a value for use inside a JSON string literal."""
+    return encode_basestring("" if value is None else str(value))[1:-1]
+
+
+def _shell_quote(text: str) -> str:
+    """Single-quote text for the shell."""
+    return "'" + text.replace("'", "'\\''") + "'"
+
+
+class CompiledTemplate:
+    """A Block Kit payload template compiled into static JSON fragments."""
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        """Compile a template.
+
+        Args:
+            name: Template name, used in errors and benchmarks
+            spec: Payload with ``{name}`` / ``{name|default}`` placeholders in string values
+        """
+        self.name = name
+        self.slots: List[Tuple[str, Optional[str]]] = []
+
+        serialized = json.dumps(self._mark(spec), ensure_ascii=False, separators=(",", ":"))
+        pieces = _SLOT_PATTERN.split(serialized)
+        # Static fragments at even indices, slot numbers at odd indices
+        self.fragments = pieces[0::2]
+        self.fields = sorted({name for name, _ in self.slots})
+        self.required = {name for name, default in self.slots if default is None}
+        self._format = "%s".join(f.replace("%", "%%") for f in self.fragments)
+
+    def _mark(self, node: Any) -> Any:
+        """Replace placeholders with slot markers, recording each slot."""
+        if isinstance(node, dict):
+            return {key: self._mark(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [self._mark(value) for value in node]
+        if isinstance(node, str):
+            return PLACEHOLDER.sub(self._slot, node)
+        return node
+
+    def _slot(self, match: "re.Match") -> str:
+        self.slots.append((match.group(1), match.group(2)))
+        return _SLOT.format(len(self.slots) - 1)
+
+    def _values(self, values: Dict[str, Any]) -> List[Any]:
+        """Get the raw value of every slot, applying defaults."""
+        missing = self.required - values.keys()
+        if missing:
+            raise ValueError(
+                f"Template {self.name} is missing values: {', '.join(sorted(missing))}"
+            )
+
+        resolved = []
+        for name, default in self.slots:
+            value = values.get(name)
+            if value is None or value == "":
+                value = default
+            resolved.append(value)
+        return resolved
+
+    def render_json(self, **values) -> str:
+        """Render the payload as a JSON string.
+
+        Args:
+            **values: Placeholder values; non-string values are converted with ``str``
+
+        Returns:
+            Compact JSON payload
+
+        Raises:
+            ValueError: If a placeholder without a default has no value
+        """
+        return self._format % tuple(_escape(value) for value in self._values(values))
+
+    def render(self, **values) -> Dict[str, Any]:
+        """Render the payload as data ready for the Slack client."""
+        return json.loads(self.render_json(**values))
+
+    def shell_command(self, output_file: str, **values) -> str:
+        """Get the shell command writing the rendered payload on the runner.
+
+        Values known at build time are escaped into the static JSON. Workflow
+        template references (``${...}``) are captured through a quoted heredoc,
+        and shell variables (``$NAME``) are piped directly. Both are escaped on
+        the runner by the step library ``json_value`` function.
+
+        Args:
+            output_file: File the payload is written to
+            **values: Placeholder values or references
+
+        Returns:
+            Shell command writing the payload
+        """
+        lines = ["{"]
+        static = self.fragments[0]
+        for (name, default), value, fragment in zip(
+            self.slots, self._values(values), self.fragments[1:]
+        ):
+            raw = values.get(name)
+            if isinstance(raw, str) and RUNTIME_REFERENCE.search(raw):
+                lines.append(f"printf '%s' {_shell_quote(static)}")
+                fallback = _shell_quote(default or "")
+                if "${" in raw:
+                    lines.extend(
+                        [
+                            f"json_value {fallback} << 'TEMPLATE_VALUE_EOF'",
+                            raw,
+                            "TEMPLATE_VALUE_EOF",
+                        ]
+                    )
+                else:
+                    lines.append(f"printf '%s' \"{raw}\" | json_value {fallback}")
+                static = fragment
+            else:
+                static += _escape(value) + fragment
+        lines.append(f"printf '%s\\n' {_shell_quote(static)}")
+        lines.append(f"}} > {output_file}")
+        return "\n".join(lines) + "\n"
+
+
+class TemplateData(NamedTuple):
+    """A compiled template paired with the values to render it with."""
+
+    template: CompiledTemplate
+    values: Dict[str, Any]
+
+    def render(self) -> Dict[str, Any]:
+        """Render the payload as data."""
+        return self.template.render(**self.values)
+
+    def shell_command(self, output_file: str) -> str:
+        """Get the shell command writing the payload on the runner."""
+        return self.template.shell_command(output_file, **self.values)
+
+
+def _button(text: str, value: str, action_id: str, style: Optional[str] = None) -> Dict[str, Any]:
+    """Build a Block Kit button element."""
+    button = {
+        "type": "button",
+        "text": {"type": "plain_text", "text": text, "emoji": True},
+        "value": value,
+        "action_id": action_id,
+    }
+    if style:
+        button["style"] = style
+    return button
+
+
+TEMPLATES: Dict[str, CompiledTemplate] = {
+    name: CompiledTemplate(name, spec)
+    for name, spec in {
+        "incident_alert": {
+            "channel": "{channel}",
+            "text": "🚨 INCIDENT: {incident_title}",
+            "attachments": [
+                {
+                    "color": "danger",
+                    "blocks": [
+                        {
+                            "type": "header",
+                            "text": {"type": "plain_text", "text": "🚨 PRODUCTION INCIDENT ALERT"},
+                        },
+                        {
+                            "type": "section",
+                            "text": {"type": "mrkdwn", "text": "*{incident_title}*"},
+                        },
+                        {"type": "divider"},
+                        {
+                            "type": "section",
+                            "fields": [
+                                {"type": "mrkdwn", "text": "*🆔 ID:*\n{incident_id}"},
+                                {"type": "mrkdwn", "text": "*🔥 Severity:*\n{incident_severity}"},
+                                {"type": "mrkdwn", "text": "*⚡ Priority:*\n{incident_priority}"},
+                                {
+                                    "type": "mrkdwn",
+                                    "text": "*🎯 Services:*\n{affected_services|Not specified}",
+                                },
+                            ],
+                        },
+                        {
+                            "type": "section",
+                            "text": {
+                                "type": "mrkdwn",
+                                "text": "*📝 Description:*\n{incident_body}",
+                            },
+                        },
+                        {
+                            "type": "actions",
+                            "elements": [
+                                {
+                                    "type": "button",
+                                    "text": {
+                                        "type": "plain_text",
+                                        "text": "📊 Dashboard",
+                                        "emoji": True,
+                                    },
+                                    "url": "{incident_url}",
+                                    "style": "primary",
+                                },
+                                _button(
+                                    "🤖 Co-Pilot Mode",
+                                    "{copilot_prompt|Help me triage this incident}",
+                                    "agent.process_message_1-copilot",
+                                    "primary",
+                                ),
+                            ],
+                        },
+                    ],
+                }
+            ],
+        },
+        "investigation_start": {
+            "channel": "{channel}",
+            "text": "🔍 AI Investigation Started",
+            "blocks": [
+                {
+                    "type": "header",
+                    "text": {"type": "plain_text", "text": "🔍 AI INVESTIGATION STARTED"},
+                },
+                {
+                    "type": "section",
+                    "fields": [
+                        {"type": "mrkdwn", "text": "*🤖 Agent:*\n{investigation_agent}"},
+                        {"type": "mrkdwn", "text": "*⏱️ Timeout:*\n{investigation_timeout}s"},
+                        {"type": "mrkdwn", "text": "*🔄 Max Retries:*\n{max_retries}"},
+                    ],
+                },
+            ],
+        },
+        "service_validation_agent": {
+            "channel": "{channel}",
+            "text": "⚠️ Service validation needed for incident {incident_id}",
+            "blocks": [
+                {
+                    "type": "header",
+                    "text": {"type": "plain_text", "text": "⚠️ SERVICE VALIDATION REQUIRED"},
+                },
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": "*{incident_title}*\nNo affected services were provided for this incident.",
+                    },
+                },
+                {
+                    "type": "section",
+                    "fields": [
+                        {"type": "mrkdwn", "text": "*🆔 ID:*\n{incident_id}"},
+                        {"type": "mrkdwn", "text": "*🔥 Severity:*\n{incident_severity}"},
+                        {"type": "mrkdwn", "text": "*🤖 Agent:*\n{agent_name}"},
+                        {"type": "mrkdwn", "text": "*🧰 Tools:*\n{tools_count} tools"},
+                    ],
+                },
+                {
+                    "type": "actions",
+                    "elements": [
+                        _button(
+                            "🔍 Validate Services",
+                            "{validate_prompt}",
+                            "agent.process_message_1-validate_services",
+                            "primary",
+                        )
+                    ],
+                },
+            ],
+        },
+        "investigation_results": {
+            "channel": "{channel}",
+            "thread_ts": "{thread_ts|}",
+            "text": "📊 AI Investigation Complete",
+            "attachments": [
+                {
+                    "color": "#ff9900",
+                    "blocks": [
+                        {
+                            "type": "header",
+                            "text": {"type": "plain_text", "text": "📊 AI INVESTIGATION COMPLETE"},
+                        },
+                        {
+                            "type": "section",
+                            "text": {
+                                "type": "mrkdwn",
+                                "text": "*Incident:* {incident_title}\n"
+                                "*Services:* {affected_services|All services investigated}\n"
+                                "*Status:* ✅ Analysis Complete\n*Severity:* {incident_severity}",
+                            },
+                        },
+                        {
+                            "type": "section",
+                            "text": {
+                                "type": "mrkdwn",
+                                "text": "*🎯 Investigation Digest:*\n{summary}",
+                            },
+                        },
+                        {
+                            "type": "actions",
+                            "elements": [
+                                _button(
+                                    "🔍 Deep Dive",
+                                    "{deep_dive_prompt|Help me perform a deep dive analysis of this incident}",
+                                    "agent.process_message_1-deep_dive",
+                                    "primary",
+                                ),
+                                _button(
+                                    "⚡ Apply Fixes",
+                                    "{apply_fixes_prompt|Help me apply fixes for this incident}",
+                                    "agent.process_message_1-apply_fixes",
+                                    "danger",
+                                ),
+                                _button(
+                                    "📊 Monitor",
+                                    "{monitoring_prompt|Help me monitor this incident's recovery}",
+                                    "agent.process_message_1-monitor",
+                                ),
+                            ],
+                        },
+                    ],
+                }
+            ],
+        },
+        "enhanced_investigation_results": {
+            "channel": "{channel}",
+            "thread_ts": "{thread_ts|}",
+            "text": "🤖 AI Investigation Complete - Enhanced Report Below",
+            "attachments": [
+                {
+                    "color": "#ff6600",
+                    "blocks": [
+                        {
+                            "type": "header",
+                            "text": {
+                                "type": "plain_text",
+                                "text": "🤖 AI-POWERED INCIDENT INVESTIGATION COMPLETE",
+                            },
+                        },
+                        {
+                            "type": "section",
+                            "text": {
+                                "type": "mrkdwn",
+                                "text": "*Incident:* {incident_title}\n"
+                                "*Services:* {affected_services|Cluster-wide investigation}\n"
+                                "*Status:* ✅ Enhanced Analysis Complete\n*Severity:* {incident_severity}",
+                            },
+                        },
+                        {
+                            "type": "section",
+                            "text": {"type": "mrkdwn", "text": "*🤖 LLM Summary:*\n{llm_summary}"},
+                        },
+                        {"type": "divider"},
+                        {
+                            "type": "section",
+                            "text": {
+                                "type": "mrkdwn",
+                                "text": "*🏗️ Cluster Health Investigation:*\n{cluster_health}",
+                            },
+                        },
+                        {
+                            "type": "section",
+                            "text": {
+                                "type": "mrkdwn",
+                                "text": "*🎯 Service-Specific Investigation:*\n{service_results|No service-specific findings}",
+                            },
+                        },
+                        {
+                            "type": "actions",
+                            "elements": [
+                                _button(
+                                    "🔍 Deep Dive",
+                                    "{deep_dive_prompt|Help me perform a deep dive analysis of this incident}",
+                                    "agent.process_message_1",
+                                    "primary",
+                                ),
+                                _button(
+                                    "⚡ Apply Fixes",
+                                    "{apply_fixes_prompt|Help me apply fixes for this incident}",
+                                    "agent.process_message_2",
+                                    "danger",
+                                ),
+                                _button(
+                                    "📊 Monitor",
+                                    "{monitoring_prompt|Help me monitor this incident's recovery}",
+                                    "agent.process_message_3",
+                                ),
+                            ],
+                        },
+                    ],
+                }
+            ],
+        },
+        "action_summary": {
+            "channel": "{channel}",
+            "text": "⚡ Incident {incident_id}: {status}",
+            "blocks": [
+                {
+                    "type": "header",
+                    "text": {"type": "plain_text", "text": "⚡ INCIDENT ACTION SUMMARY"},
+                },
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": "*{incident_title}* ({incident_id})\n*Status:* {status}\n\n{summary}",
+                    },
+                },
+            ],
+        },
+    }.items()
+}
+
+
+class SlackBlockKitTemplates:
+    """Named Block Kit templates for incident notifications.
+
+    Each method pairs a compiled template with its values. Values may be
+    literals or workflow references such as ``${incident_title}``.
+    """
+
+    @staticmethod
+    def incident_alert_blocks(
+        incident_title: str,
+        incident_id: str,
+        incident_severity: str,
+        incident_priority: str,
+        incident_body: str,
+        incident_url: str,
+        affected_services: str = "",
+        copilot_prompt: str = "",
+        channel: str = "${slack_channel_id}",
+    ) -> TemplateData:
+        """Root incident alert message."""
+        return TemplateData(TEMPLATES["incident_alert"], dict(locals()))
+
+    @staticmethod
+    def investigation_start_blocks(
+        investigation_agent: str,
+        investigation_timeout: str,
+        max_retries: str,
+        channel: str = "${slack_channel_id}",
+    ) -> TemplateData:
+        """Investigation start notification."""
+        return TemplateData(TEMPLATES["investigation_start"], dict(locals()))
+
+    @staticmethod
+    def service_validation_agent_blocks(
+        incident_title: str,
+        incident_id: str,
+        incident_severity: str,
+        agent_name: str,
+        tools_count: int,
+        validate_prompt: str = "",
+        channel: str = "${slack_channel_id}",
+    ) -> TemplateData:
+        """Notice that the service validation agent is available.
+
+        ``validate_prompt`` is the message the button sends to the agent; a shared
+        agent needs the incident context in it.
+        """
+        if not validate_prompt:
+            validate_prompt = (
+                f"Help me find and validate the affected services for incident {incident_id}"
+            )
+        return TemplateData(TEMPLATES["service_validation_agent"], dict(locals()))
+
+    @staticmethod
+    def investigation_results_blocks(
+        incident_title: str,
+        incident_id: str,
+        incident_severity: str,
+        summary: str,
+        affected_services: str = "",
+        thread_ts: str = "",
+        deep_dive_prompt: str = "",
+        apply_fixes_prompt: str = "",
+        monitoring_prompt: str = "",
+        channel: str = "${slack_channel_id}",
+    ) -> TemplateData:
+        """Investigation results, posted as a reply in the incident thread."""
+        return TemplateData(TEMPLATES["investigation_results"], dict(locals()))
+
+    @staticmethod
+    def enhanced_investigation_results_blocks(
+        incident_title: str,
+        incident_severity: str,
+        llm_summary: str,
+        cluster_health: str,
+        service_results: str = "",
+        affected_services: str = "",
+        thread_ts: str = "",
+        deep_dive_prompt: str = "",
+        apply_fixes_prompt: str = "",
+        monitoring_prompt: str = "",
+        channel: str = "${slack_channel_id}",
+    ) -> TemplateData:
+        """Investigation results with LLM summary and per-investigation sections."""
+        return TemplateData(TEMPLATES["enhanced_investigation_results"], dict(locals()))
+
+    @staticmethod
+    def action_summary_blocks(
+        incident_title: str,
+        incident_id: str,
+        status: str,
+        summary: str,
+        channel: str = "${slack_channel_id}",
+    ) -> TemplateData:
+        """Final action summary."""
+        return TemplateData(TEMPLATES["action_summary"], dict(locals()))
+
+
+def benchmark_render(iterations: int = 10000) -> List[Dict[str, Any]]:
+    """Measure render throughput of every compiled template.
+
+    Values contain quotes, backslashes, newlines and emoji so escaping is exercised.
+
+    Args:
+        iterations: Renders per template
+
+    Returns:
+        One entry per template with payload size and messages per second
+    """
+    sample = 'Checkout "p99" latency > 2s\\n\n🔥 see C:\\logs\tand <https://example.com|dashboard>'
+    results = []
+    for name, template in TEMPLATES.items():
+        values = {field: sample for field in template.fields}
+        payload = template.render_json(**values)
+        # Fail loudly if escaping ever produces invalid JSON
+        json.loads(payload)
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            template.render_json(**values)
+        elapsed = time.perf_counter() - start
+
+        results.append(
+            {
+                "template": name,
+                "payload_bytes": len(payload.encode("utf-8")),
+                "renders_per_second": round(iterations / elapsed) if elapsed else 0,
+            }
+        )
+    return results
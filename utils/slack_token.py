@@ -0,0 +1,38 @@
+"""
+Slack token resolution on the runner.
+
+The token never travels in the workflow request and is never written to the
+runner's disk. Executions reference a Kubiya secret holding the bot token
+(``SLACK_BOT_TOKEN`` by default); the runner injects it into the setup step,
+which then skips the integration API round-trip. Without the secret, the
+setup step fetches the token from the Kubiya integration API.
+"""
+
+import re
+
+SLACK_TOKEN_URL = "https://api.kubiya.ai/api/v1/integration/slack/token/1"
+SLACK_TOKEN_SECRET = "SLACK_BOT_TOKEN"
+_SECRET_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def slack_token_command(secret: str = SLACK_TOKEN_SECRET) -> str:
+    """Get the runner command printing the Slack token as ``{"token": ...}``.
+
+    Args:
+        secret: Name of the Kubiya secret holding the token, injected by the
+            runner as an environment variable of the same name
+
+    Returns:
+        Shell command using the injected secret, or fetching the token when it is absent
+
+    Raises:
+        ValueError: If the secret name is not a valid environment variable name
+    """
+    if not _SECRET_NAME.match(secret):
+        raise ValueError(f"Invalid Slack token secret name: {secret!r}")
+    return f"""if [ -n "${secret}" ]; then
+  echo "🔐 Using the Slack token from secret {secret}" >&2
+  printf '{{"token": "%s"}}\\n' "${secret}"
+else
+  curl -sf --max-time 30 -H "Authorization: UserKey $KUBIYA_API_KEY" {SLACK_TOKEN_URL}
+fi"""
@@ -0,0 +1,58 @@
+"""
+Shell snippets that render Block Kit templates on the runner and post them.
+"""
+
+from .slack_templates import SlackBlockKitTemplates, TemplateData
+
+
+def create_slack_message_script(
+    template_data: TemplateData,
+    output_file: str,
+    token: str = "${slack_token.token}",
+    method: str = "chat.postMessage",
+) -> str:
+    """Get the shell commands that render a template and send it to Slack.
+
+    Args:
+        template_data: Template and values, as returned by SlackBlockKitTemplates
+        output_file: File the rendered payload is written to
+        token: Slack token or workflow reference to it
+        method: Slack API method used to send the payload
+
+    Returns:
+        Shell commands using the step library ``json_value`` and ``slack_post`` functions
+    """
+    return (
+        "# Render the Slack payload (values are JSON-escaped on the runner)\n"
+        + template_data.shell_command(output_file)
+        + f'slack_post "{token}" {output_file} {method}\n'
+    )
+
+
+def generate_post_investigation_script(
+    summary: str,
+    output_file: str = "/tmp/investigation_summary.json",
+    thread_ts: str = "${initial_alert_message.ts}",
+) -> str:
+    """Get the shell commands that post investigation results in the incident thread.
+
+    Args:
+        summary: Investigation digest or workflow reference to it
+        output_file: File the rendered payload is written to
+        thread_ts: Root incident message ``ts`` or workflow reference to it
+
+    Returns:
+        Shell commands rendering and posting the results
+    """
+    template = SlackBlockKitTemplates.investigation_results_blocks(
+        incident_title="${incident_title}",
+        incident_id="${incident_id}",
+        incident_severity="${incident_severity}",
+        affected_services="${affected_services}",
+        summary=summary,
+        thread_ts=thread_ts,
+        deep_dive_prompt="$DEEP_DIVE_PROMPT",
+        apply_fixes_prompt="$APPLY_FIXES_PROMPT",
+        monitoring_prompt="$MONITORING_PROMPT",
+    )
+    return create_slack_message_script(template, output_file)
@@ -0,0 +1,216 @@
+"""
+Deadline propagation across the incident response DAG.
+"""
+
+import math
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+
+# Step definition keys read by the planner and not passed on to ``Workflow.step``
+PLANNING_KEYS = ("expected_cost", "optional", "min_timeout", "off_critical_path")
+
+
+class StepBudget(NamedTuple):
+    """Timeout and retry allowance assigned to a single step."""
+
+    timeout: int
+    retries: int
+
+    @property
+    def worst_case(self) -> int:
+        """Worst-case wall time of the step including all retries."""
+        return self.timeout * (self.retries + 1)
+
+
+class DeadlinePlanner:
+    """Divide an end-to-end deadline across workflow steps by expected cost.
+
+    Each step declares an ``expected_cost`` in seconds and whether it is
+    ``optional``. A step also has a floor, the shortest attempt timeout it can
+    run with: its expected cost, ``MIN_TIMEOUT`` or its own ``min_timeout`` (the
+    timeout of its network calls), whichever is largest. Deadlines are checked
+    along the critical path, the longest chain of dependent steps, so parallel
+    branches do not add up.
+
+    The required steps' floors must fit in the deadline, otherwise planning
+    fails. Optional enrichment steps are dropped until the floors fit. The time
+    left on the critical path is shared out proportionally to expected cost, and
+    every step receives an attempt timeout and a retry count whose worst case
+    fits inside its share, so no chain of steps can overrun the deadline.
+
+    Steps marked ``off_critical_path`` (waits nothing else depends on) take no
+    share of the deadline; they run with their own timeout and no retries.
+    """
+
+    # Attempt timeout is this multiple of the expected cost, when the share allows it
+    TIMEOUT_HEADROOM = 2.0
+    MIN_TIMEOUT = 5
+
+    def __init__(
+        self,
+        deadline: int,
+        max_retries: int = 3,
+        step_timeouts: Optional[Dict[str, int]] = None,
+    ):
+        """Initialize the planner.
+
+        Args:
+            deadline: End-to-end deadline in seconds
+            max_retries: Upper bound on retries for any step
+            step_timeouts: Optional per-step attempt timeout, used instead of the
+                headroom multiple of the expected cost whenever the step's share allows it
+        """
+        if deadline <= 0:
+            raise ValueError(f"Deadline must be positive, got {deadline}")
+
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.step_timeouts = step_timeouts or {}
+
+    def floor(self, step: Dict[str, Any]) -> int:
+        """Get the shortest attempt timeout a step can run with."""
+        return max(math.ceil(step["expected_cost"]), self.MIN_TIMEOUT, step.get("min_timeout") or 0)
+
+    def select(self, steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Select the steps whose floors fit in the deadline along the critical path.
+
+        Optional steps are kept in order while the critical path of floors still
+        fits; enrichment built on a dropped step is dropped with it.
+
+        Args:
+            steps: Step definitions in dependency order, with ``expected_cost`` and
+                optional ``optional``, ``min_timeout`` and ``off_critical_path`` keys
+
+        Returns:
+            The steps to keep, in their original order
+
+        Raises:
+            ValueError: If the required steps' floors alone exceed the deadline
+        """
+        kept = {s["name"] for s in steps if not s.get("optional")}
+        required = _critical_path(steps, kept, self.floor)
+        if required > self.deadline:
+            raise ValueError(
+                f"Required steps need {required}s on the critical path, "
+                f"more than the {self.deadline}s deadline"
+            )
+
+        skipped = set()
+        for step in steps:
+            if not step.get("optional"):
+                continue
+            if skipped.intersection(step.get("depends") or []):
+                skipped.add(step["name"])
+            elif _critical_path(steps, kept | {step["name"]}, self.floor) <= self.deadline:
+                kept.add(step["name"])
+            else:
+                skipped.add(step["name"])
+        return [s for s in steps if s["name"] in kept]
+
+    def allocate(self, steps: List[Dict[str, Any]]) -> Dict[str, StepBudget]:
+        """Allocate timeouts and retries to the selected steps.
+
+        Each step's share is its floor plus the deadline left over the critical
+        path of floors, split by its part of the critical path's expected cost.
+        No chain of steps has shares summing to more than the deadline.
+
+        Args:
+            steps: Selected step definitions in dependency order, with ``depends``
+                naming only selected steps
+
+        Returns:
+            Mapping of step name to its budget
+
+        Raises:
+            ValueError: If the steps' floors exceed the deadline along the critical path
+        """
+        budgets = {}
+        for step in steps:
+            if step.get("off_critical_path"):
+                budgets[step["name"]] = StepBudget(timeout=self.floor(step), retries=0)
+
+        names = {s["name"] for s in steps}
+        floors = _critical_path(steps, names, self.floor)
+        if floors > self.deadline:
+            raise ValueError(
+                f"Steps need {floors}s on the critical path, more than the {self.deadline}s deadline"
+            )
+        spare = self.deadline - floors
+        total_cost = _critical_path(steps, names, lambda s: s["expected_cost"]) or 1
+
+        for step in steps:
+            if step.get("off_critical_path"):
+                continue
+            floor = self.floor(step)
+            share = floor + spare * step["expected_cost"] / total_cost
+            timeout = self.step_timeouts.get(step["name"]) or math.ceil(
+                step["expected_cost"] * self.TIMEOUT_HEADROOM
+            )
+            timeout = max(min(timeout, math.floor(share)), floor)
+
+            retries = min(self.max_retries, max(0, math.floor(share / timeout) - 1))
+            budgets[step["name"]] = StepBudget(timeout=timeout, retries=retries)
+        return budgets
+
+    def plan(self, steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Select steps, rewire dependencies around skipped ones and attach budgets.
+
+        Args:
+            steps: Step definitions as passed to ``Workflow.step`` plus planning keys
+
+        Returns:
+            Step keyword arguments ready for ``Workflow.step``, with ``timeout`` and ``retries`` set
+
+        Raises:
+            ValueError: If the required steps cannot fit in the deadline
+        """
+        selected = self.select(steps)
+        kept = {s["name"] for s in selected}
+        skipped = {s["name"]: s.get("depends") or [] for s in steps if s["name"] not in kept}
+        selected = [
+            {**s, "depends": _resolve_depends(s["depends"], skipped)} if s.get("depends") else s
+            for s in selected
+        ]
+        budgets = self.allocate(selected)
+
+        planned = []
+        for step in selected:
+            step = {k: v for k, v in step.items() if k not in PLANNING_KEYS}
+            budget = budgets[step["name"]]
+            step["timeout"] = budget.timeout
+            step["retries"] = budget.retries
+            planned.append(step)
+        return planned
+
+
+def _critical_path(
+    steps: List[Dict[str, Any]], kept: Set[str], weight: Callable[[Dict[str, Any]], float]
+) -> float:
+    """Get the heaviest chain of dependent kept steps.
+
+    Dependencies on steps that are not kept are replaced by their own
+    dependencies. Off-critical-path steps weigh nothing.
+
+    Args:
+        steps: Step definitions in dependency order
+        kept: Names of the steps taking part
+        weight: Weight of a single step, e.g. its floor or expected cost
+    """
+    skipped = {s["name"]: s.get("depends") or [] for s in steps if s["name"] not in kept}
+    finish: Dict[str, float] = {}
+    for step in steps:
+        if step["name"] not in kept:
+            continue
+        depends = _resolve_depends(step.get("depends") or [], skipped)
+        start = max((finish.get(name, 0) for name in depends), default=0)
+        finish[step["name"]] = start + (0 if step.get("off_critical_path") else weight(step))
+    return max(finish.values(), default=0)
+
+
+def _resolve_depends(depends: List[str], skipped: Dict[str, List[str]]) -> List[str]:
+    """Replace skipped dependencies with their own dependencies."""
+    resolved: List[str] = []
+    for name in depends:
+        for dep in _resolve_depends(skipped[name], skipped) if name in skipped else [name]:
+            if dep not in resolved:
+                resolved.append(dep)
+    return resolved
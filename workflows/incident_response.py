@@ -3,7 +3,8 @@ Main incident response workflow implementation.
 """
 
 import json
-from typing import Any, Dict
+import re
+from typing import Any, Dict, List
 
 # Handle different import paths for DSL
 try:
@@ -14,6 +15,7 @@ except ImportError:
     except ImportError:
         # Create a minimal DSL implementation
         import json
+
         class Workflow:
             def __init__(self, name):
                 self.name = name
@@ -22,36 +24,46 @@ except ImportError:
                 self.env_vars = {}
                 self.description_text = ""
                 self.runner_config = "ubuntu-latest"
-                
+
             def description(self, text):
                 self.description_text = text
                 return self
-                
+
             def params(self, **kwargs):
                 self.params_dict.update(kwargs)
                 return self
-                
+
             def env(self, **kwargs):
                 self.env_vars.update(kwargs)
                 return self
-                
+
             def runner(self, runner):
                 self.runner_config = runner
                 return self
-                
-            def step(self, name, command=None, description="", executor=None, depends=None, output=None):
+
+            def step(
+                self,
+                name,
+                command=None,
+                description="",
+                executor=None,
+                depends=None,
+                output=None,
+                **kwargs,
+            ):
                 step = {
                     "name": name,
                     "description": description,
                     "executor": executor or {"type": "command", "config": {}},
                     "depends": depends or [],
-                    "output": output
+                    "output": output,
                 }
                 if command:
                     step["command"] = command
+                step.update({k: v for k, v in kwargs.items() if v is not None})
                 self.steps.append(step)
                 return self
-                
+
             def to_dict(self):
                 return {
                     "name": self.name,
@@ -59,19 +71,46 @@ except ImportError:
                     "runner": self.runner_config,
                     "params": self.params_dict,
                     "env": self.env_vars,
-                    "steps": self.steps
+                    "steps": self.steps,
                 }
-                
+
             def to_json(self):
                 return json.dumps(self.to_dict(), indent=2)
-                
+
             def to_yaml(self):
                 import yaml
+
                 return yaml.dump(self.to_dict(), default_flow_style=False)
 
-from ..core.config import IncidentConfig
-from ..utils.slack_templates import SlackBlockKitTemplates
-from ..utils.slack_utils import create_slack_message_script, generate_post_investigation_script
+
+from core.config import IncidentConfig
+from tools.kubernetes_tools import (
+    TOOL_SERVER_URL,
+    KubernetesToolDefinitions,
+    in_process_tool,
+)
+from tools.workflow_tools import (
+    CLAIMED_KEY_PRECONDITION,
+    RETRIGGER_PARAMS,
+    claim_command,
+    retrigger_execution_id,
+    thread_reply_command,
+)
+from utils.execution_cache import ExecutionOutputCache
+from utils.slack_blocks import MAX_BUTTON_VALUE, MAX_SECTION_TEXT
+from utils.slack_templates import FANOUT_CHANNEL, SlackBlockKitTemplates
+from utils.slack_token import slack_token_command
+from utils.slack_utils import create_slack_message_script
+
+from .deadlines import DeadlinePlanner
+from .output_budget import OutputBudget
+from .prompt_layout import PromptLayout, incident_block
+from .step_library import StepLibrary
+
+# Floor on the timeout of steps calling Slack or the Kubiya API (their curls allow 30 seconds)
+NETWORK_STEP_TIMEOUT = 30
+# Longest slack_fanout waits on Retry-After for one channel before giving up (seconds)
+FANOUT_RETRY_WAIT = 30
 
 
 class IncidentResponseWorkflow:
@@ -85,103 +124,388 @@ class IncidentResponseWorkflow:
         """
         self.config = config
         self.service_agent = None
+        self.step_library = StepLibrary.default()
 
     def create_workflow(self) -> Workflow:
-        """Create the complete incident response workflow."""
-        return (
+        """Create the complete incident response workflow.
+
+        The end-to-end deadline for the incident severity is divided across the
+        steps by expected cost. Every step gets a timeout and retry count that fit
+        inside its share, and optional enrichment steps are dropped when the
+        deadline is too tight to cover them.
+        """
+        planner = DeadlinePlanner(
+            self.config.get_deadline(),
+            max_retries=self.config.max_retries,
+            # The configured investigation timeout is kept whenever the deadline allows it
+            step_timeouts={
+                "investigate-kubernetes-cluster-health": self.config.investigation_timeout
+            },
+        )
+        steps = planner.plan(self._get_step_definitions())
+        if self.config.service_prevalidation:
+            steps = self._use_resolved_services(steps)
+        investigation = next(
+            s for s in steps if s["name"] == "investigate-kubernetes-cluster-health"
+        )
+
+        workflow = (
             Workflow("production-incident-workflow")
             .description(
                 "Production-grade incident response workflow with AI investigation and Slack integration"
             )
             .env(**self.config.to_workflow_env())
-            .params(**self.config.to_workflow_params())
+            .params(
+                **{
+                    **self.config.to_workflow_params(),
+                    # Reflect the planned investigation budget in notifications
+                    "investigation_timeout": str(investigation["timeout"]),
+                    "max_retries": str(investigation["retries"]),
+                }
+            )
             .runner(self.config.runner)
-            # Step 1: Validate incident parameters
-            .step(
-                "validate-incident",
-                self._get_validation_command(),
-                description="Validate incident parameters and prerequisites",
+        )
+        for step in steps:
+            if step.get("command"):
+                # Each command step carries the step library functions it calls
+                step = {**step, "command": self.step_library.link(step["command"])}
+            workflow.step(**step)
+        return workflow
+
+    def create_retrigger_workflow(self) -> Workflow:
+        """Create the focused workflow re-triggering an incident with validated services.
+
+        Submitted by the ``/retrigger`` relay and by the direct ``workflow_retrigger``
+        tool, which fills in the ``RETRIGGER_PARAMS``. The first step claims the
+        re-trigger key on the runner and every later step of a duplicate is
+        skipped. Its execution ID is derived from that key. The alert is not
+        reposted: the validated services are replied in the parent's alert
+        thread, and the investigation does not wait on Slack.
+        """
+        params = self.config.to_workflow_params()
+        execution_id = retrigger_execution_id("${retrigger_key}")
+        restore_alert = ExecutionOutputCache().restore_command(
+            "initial_alert_message", fallback="echo '{}'", execution_id=execution_id
+        )
+        steps = [
+            dict(
+                name="claim-retrigger",
+                command=claim_command(),
+                description="Claim the re-trigger key of the incident and service set; later steps are skipped for duplicates",
                 executor={"type": "command", "config": {}},
-                output="validation_status",
-            )
-            # Step 2: Setup Slack integration
-            .step(
-                "setup-slack-integration",
-                description="Initialize Slack integration for incident communications",
+                output="retrigger_key",
+            ),
+            dict(
+                name="restore-parent-alert",
+                command=restore_alert,
+                description="Find the parent execution's incident alert to reply to",
+                executor={"type": "command", "config": {}},
+                preconditions=[CLAIMED_KEY_PRECONDITION],
+                depends=["claim-retrigger"],
+                output="parent_alert",
+            ),
+            dict(
+                name="setup-slack-integration",
+                command=slack_token_command(self.config.slack_token_secret),
+                description="Read the Slack token from its runner secret or fetch it",
+                executor={"type": "command", "config": {}},
+                preconditions=[CLAIMED_KEY_PRECONDITION],
+                depends=["restore-parent-alert"],
+                output="slack_token",
+            ),
+            dict(
+                name="reply-validated-services",
+                command=thread_reply_command(),
+                description="Reply in the incident alert thread with the validated services",
+                executor={"type": "command", "config": {}},
+                preconditions=[CLAIMED_KEY_PRECONDITION],
+                depends=["setup-slack-integration"],
+                output="validated_alert",
+            ),
+            dict(
+                name="investigate-validated-services",
+                description="AI investigation focused on validated services",
                 executor={
-                    "type": "kubiya",
+                    "type": "agent",
                     "config": {
-                        "url": "api/v1/integration/slack/token/1",
-                        "method": "GET",
-                        "timeout": 30,
-                        "silent": False,
+                        "agent_name": "incident-responder",
+                        "message": self._get_service_specific_investigation_message(),
                     },
                 },
+                preconditions=[CLAIMED_KEY_PRECONDITION],
+                depends=["claim-retrigger"],
+                output="investigation_results",
+                timeout=self.config.investigation_timeout,
+                retries=self.config.max_retries,
+            ),
+        ]
+
+        workflow = (
+            Workflow("incident-response-retrigger")
+            .description("Re-triggered incident response focused on the validated services")
+            .env(**self.config.to_workflow_env())
+            .params(
+                **{name: params[name] for name in RETRIGGER_PARAMS},
+                incident_source="agent-validated",
+            )
+            .runner(self.config.runner)
+        )
+        for step in steps:
+            if step.get("command"):
+                step = {**step, "command": self.step_library.link(step["command"])}
+            workflow.step(**step)
+        return workflow
+
+    def _get_step_definitions(self) -> List[Dict[str, Any]]:
+        """Get step definitions with expected costs (seconds) used for deadline planning."""
+        cluster_health_budget = self._get_output_budget("kubernetes_cluster_health_results")
+        # Steps working on the affected services wait for them to be selected
+        services_step = (
+            "select-affected-services"
+            if self.config.service_prevalidation
+            else "setup-slack-integration"
+        )
+
+        return [
+            # Step 1: Validate incident parameters
+            dict(
+                name="validate-incident",
+                command=self._get_validation_command(),
+                description="Validate incident parameters and prerequisites",
+                executor={"type": "command", "config": {}},
+                output="validation_status",
+                expected_cost=2,
+            ),
+            # Step 2: Setup Slack integration (skips the fetch when the token secret is injected)
+            dict(
+                name="setup-slack-integration",
+                command=slack_token_command(self.config.slack_token_secret),
+                description="Initialize Slack integration for incident communications",
+                executor={"type": "command", "config": {}},
                 depends=["validate-incident"],
                 output="slack_token",
-            )
+                expected_cost=3,
+                min_timeout=NETWORK_STEP_TIMEOUT,
+            ),
+            # Step 2b: Resolve services deterministically so only ambiguous incidents need the agent
+            *(
+                [
+                    dict(
+                        name="prevalidate-services",
+                        description="Resolve affected services by exact and fuzzy match against the service inventory",
+                        executor={"type": "tool", "config": self._get_prevalidation_tool_config()},
+                        depends=["validate-incident"],
+                        output="prevalidation",
+                        expected_cost=3,
+                        # Runs beside the Slack setup with the same bound, so it never extends
+                        # the critical path; when it fails, times out or is dropped, the
+                        # services are kept as given
+                        min_timeout=NETWORK_STEP_TIMEOUT,
+                        optional=True,
+                        continueOn={"failure": True},
+                    ),
+                    dict(
+                        name="select-affected-services",
+                        command=self._get_select_services_command(),
+                        description="Use the pre-validated services, or the services as given if pre-validation failed",
+                        executor={"type": "command", "config": {}},
+                        depends=["setup-slack-integration", "prevalidate-services"],
+                        # Empty when the services are ambiguous, which routes the incident to the agent
+                        output="resolved_services",
+                        expected_cost=1,
+                    ),
+                ]
+                if self.config.service_prevalidation
+                else []
+            ),
             # Step 3: Handle validation failure (missing services)
-            .step(
-                "handle-validation-failure",
-                self._get_validation_failure_command(),
+            dict(
+                name="handle-validation-failure",
+                command=self._get_validation_failure_command(),
                 description="Send Slack notification when services are missing and create validation agent",
                 executor={"type": "command", "config": {}},
-                depends=["setup-slack-integration"],
+                depends=[services_step],
                 output="validation_failure_message",
-            )
-            # Step 4: Prepare copilot context
-            .step(
-                "prepare-copilot-context",
-                self._get_prepare_copilot_context_command(),
+                expected_cost=3,
+                min_timeout=NETWORK_STEP_TIMEOUT,
+            ),
+            # Step 4: Prepare copilot context (optional enrichment)
+            dict(
+                name="prepare-copilot-context",
+                command=self._get_prepare_copilot_context_command(),
                 description="Prepare context prompts for agent interactions",
                 executor={"type": "command", "config": {}},
-                depends=["setup-slack-integration"],
+                depends=[services_step],
                 output="copilot_prompts",
-            )
+                expected_cost=2,
+                optional=True,
+            ),
             # Step 5: Post incident alert (only if services provided)
-            .step(
-                "post-incident-alert",
-                self._get_incident_alert_command(),
-                description="Send beautiful incident alert to Slack when services are provided",
+            dict(
+                name="post-incident-alert",
+                command=self._get_incident_alert_command(),
+                description="Send beautiful incident alert to every alert channel concurrently",
                 executor={"type": "command", "config": {}},
                 depends=["prepare-copilot-context"],
                 output="initial_alert_message",
-            )
-            # Step 6: Notify investigation start
-            .step(
-                "notify-investigation-start",
-                self._get_investigation_start_command(),
+                expected_cost=3,
+                min_timeout=NETWORK_STEP_TIMEOUT + FANOUT_RETRY_WAIT,
+            ),
+            # Step 5a: Cache reusable outputs for re-triggered executions (optional enrichment)
+            dict(
+                name="cache-reusable-outputs",
+                command=ExecutionOutputCache().store_command(["initial_alert_message"]),
+                description="Store the incident alert for re-triggered executions",
+                executor={"type": "command", "config": {}},
+                depends=["post-incident-alert"],
+                output="cached_outputs",
+                expected_cost=1,
+                optional=True,
+            ),
+            # Step 5b: Deliver the digest this incident was batched into
+            *(
+                [
+                    dict(
+                        name="flush-incident-digest",
+                        command=self._get_digest_flush_command(),
+                        description="Send the channel digest once its window closes, unless a full digest already went out",
+                        executor={"type": "command", "config": {}},
+                        depends=["post-incident-alert"],
+                        output="incident_digest_status",
+                        # Nothing waits on the digest, so the window is not taken from the deadline
+                        expected_cost=self.config.digest_window,
+                        min_timeout=self.config.digest_window + NETWORK_STEP_TIMEOUT,
+                        off_critical_path=True,
+                    )
+                ]
+                if self.config.is_digested()
+                else []
+            ),
+            # Step 6: Notify investigation start (optional enrichment)
+            dict(
+                name="notify-investigation-start",
+                command=self._get_investigation_start_command(),
                 description="Notify AI investigation start",
                 executor={"type": "command", "config": {}},
                 depends=["post-incident-alert"],
                 output="investigation_start_message",
-            )
+                expected_cost=3,
+                min_timeout=NETWORK_STEP_TIMEOUT,
+                optional=True,
+            ),
             # Step 7: AI-powered Kubernetes basic cluster health investigation (ALWAYS RUN)
-            .step(
-                "investigate-kubernetes-cluster-health",
+            dict(
+                name="investigate-kubernetes-cluster-health",
                 description="AI-powered Kubernetes basic cluster health investigation",
                 executor={
                     "type": "agent",
                     "config": {
                         "agent_name": "test-workflow",
-                        "message": self._get_comprehensive_investigation_message()
-                    }
+                        "message": self._get_comprehensive_investigation_message(),
+                    },
                 },
-                depends=["notify-investigation-start"],
+                # Runs beside the Slack alert and start notice; it only needs the services
+                depends=[services_step],
                 output="kubernetes_cluster_health_results",
-                timeout=600,
-                retries=3
-            )
-            # Step 8: Post investigation results to Slack
-            .step(
-                "post-investigation-results-to-slack",
-                self._get_simple_post_results_command(),
-                description="Post AI investigation completion notification to Slack",
+                expected_cost=180,
+                # An investigation cut shorter than this cannot finish
+                min_timeout=180,
+            ),
+            # Step 8: Bound the investigation output before it flows downstream
+            dict(
+                name=cluster_health_budget.step_name,
+                command=cluster_health_budget.guard_command(),
+                description="Store oversized investigation output as an artifact and pass a bounded digest downstream",
                 executor={"type": "command", "config": {}},
                 depends=["investigate-kubernetes-cluster-health"],
+                output=cluster_health_budget.digest_output,
+                expected_cost=1,
+            ),
+            # Step 9: Post investigation results to Slack
+            dict(
+                name="post-investigation-results-to-slack",
+                command=self._get_enhanced_post_results_command(),
+                description="Post AI investigation completion notification to Slack",
+                executor={"type": "command", "config": {}},
+                # Threads under the alert, after the start notice
+                depends=[cluster_health_budget.step_name, "notify-investigation-start"],
                 output="investigation_results_message",
-            )
-        )
+                expected_cost=3,
+                min_timeout=NETWORK_STEP_TIMEOUT,
+            ),
+        ]
+
+    def _get_output_budget(self, output: str) -> OutputBudget:
+        """Get the byte budget declared for a step output.
+
+        Args:
+            output: Name of the step output
+
+        Returns:
+            OutputBudget using the configured size, or the default size if none is declared
+        """
+        max_bytes = self.config.output_budgets.get(output)
+        if max_bytes is None:
+            return OutputBudget(output, artifact_dir=self.config.artifact_dir)
+        return OutputBudget(output, max_bytes=max_bytes, artifact_dir=self.config.artifact_dir)
+
+    def _get_prevalidation_tool_config(self) -> Dict[str, Any]:
+        """Get the tool executor config of the service pre-validation step."""
+        tool = KubernetesToolDefinitions.prevalidate_services()
+        if TOOL_SERVER_URL:
+            tool = in_process_tool(tool)
+        return {
+            "tool_def": tool,
+            "args": {
+                "incident_title": "${incident_title}",
+                "incident_body": "${incident_body}",
+                "affected_services": "${affected_services}",
+            },
+        }
+
+    def _get_select_services_command(self) -> str:
+        """Get the command choosing the services the rest of the workflow works on.
+
+        Resolved services replace ``affected_services``; ambiguous and
+        unresolved ones print nothing. When pre-validation failed or timed out,
+        or the inventory was unavailable, the services are kept as given.
+        """
+        return self.step_library.header("select-affected-services") + """
+RESULT=$(cat << 'PREVALIDATION_EOF' | tail -n 1
+${prevalidation}
+PREVALIDATION_EOF
+)
+case "$RESULT" in
+  resolved:*|unavailable:*)
+    printf '%s\n' "$RESULT" | cut -d: -f2-
+    ;;
+  ambiguous:*|unresolved:*)
+    echo ""
+    ;;
+  *)
+    cat << 'AFFECTED_SERVICES_EOF'
+${affected_services}
+AFFECTED_SERVICES_EOF
+    ;;
+esac
+"""
+
+    @staticmethod
+    def _use_resolved_services(steps: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Point the steps after service selection at ``resolved_services``."""
+
+        def rewrite(value: Any) -> Any:
+            if isinstance(value, str):
+                return value.replace("${affected_services", "${resolved_services")
+            if isinstance(value, dict):
+                return {k: rewrite(v) for k, v in value.items()}
+            if isinstance(value, list):
+                return [rewrite(v) for v in value]
+            return value
+
+        names = [step["name"] for step in steps]
+        start = names.index("select-affected-services") + 1
+        return steps[:start] + [rewrite(step) for step in steps[start:]]
 
     def _get_validation_command(self) -> str:
         """Get the validation command for incident parameters."""
@@ -212,9 +536,9 @@ if [ -z "${incident_severity}" ]; then
   MISSING_PARAMS="${MISSING_PARAMS} incident_severity"
 fi
 
-# NOTE: affected_services validation is now handled by agent
+# NOTE: affected_services are pre-validated next; only ambiguous ones go to the agent
 if [ -z "${affected_services}" ]; then
-  echo "⚠️ WARNING: affected_services not provided - will create validation agent"
+  echo "⚠️ WARNING: affected_services not provided - will resolve them from the title and body"
 fi
 
 # Validate severity levels
@@ -251,11 +575,35 @@ fi
     def _get_validation_failure_command(self) -> str:
         """Get the validation failure handling command."""
         if self.service_agent is None:
-            from ..agents.service_validator import ServiceValidationAgent
+            from agents.service_validator import ServiceValidationAgent
+
             self.service_agent = ServiceValidationAgent(self.config)
         agent_config = self.service_agent.get_agent_config()
         agent_name = agent_config["name"]
         tools_count = len(agent_config["tools"])
+        validate_prompt = ""
+        build_prompt = ""
+        if self.service_agent.shared:
+            # The long-lived agent learns which incident it is helping from the first message,
+            # which Slack caps at MAX_BUTTON_VALUE as the button value
+            from agents.service_validator import conversation_context
+
+            context = conversation_context(
+                "${incident_id}",
+                "${incident_title}",
+                "${incident_severity}",
+                "${incident_url}",
+                "${slack_channel_id}",
+                "${execution_id}",
+                "${incident_body}",
+            )
+            build_prompt = f"""
+VALIDATE_PROMPT=$(clip_text {MAX_BUTTON_VALUE} << 'VALIDATE_PROMPT_EOF'
+{context}
+VALIDATE_PROMPT_EOF
+)
+"""
+            validate_prompt = "$VALIDATE_PROMPT"
 
         # Create Block Kit template for service validation agent
         template = SlackBlockKitTemplates.service_validation_agent_blocks(
@@ -263,27 +611,30 @@ fi
             incident_id="${incident_id}",
             incident_severity="${incident_severity}",
             agent_name=agent_name,
-            tools_count=tools_count
+            tools_count=tools_count,
+            validate_prompt=validate_prompt,
+        )
+        agent_action = (
+            "ROUTING TO SHARED SERVICE VALIDATION AGENT"
+            if self.service_agent.shared
+            else "CREATING SERVICE VALIDATION AGENT"
         )
 
         script = create_slack_message_script(
-            template_data=template,
-            output_file="/tmp/agent_message.json"
-        ).replace("'EOF'", "EOF")
+            template_data=template, output_file="/tmp/agent_message.json"
+        )
 
         return f"""
-echo "🔍 DEBUG: handle-validation-failure step starting"
-echo "affected_services value: '${{affected_services}}'"
-
+{self.step_library.header("handle-validation-failure")}
 # Check if affected_services is provided (if provided, skip this step)
 if [ -n "${{affected_services}}" ]; then
   echo "🚫 SKIPPING: affected_services is provided - handle-validation-failure will not run"
-  echo "This step only runs when affected_services is missing"
+  echo "This step only runs when affected_services is missing or ambiguous after pre-validation"
   exit 0
 fi
 
-echo "🚨 VALIDATION FAILED - CREATING SERVICE VALIDATION AGENT"
-echo "Affected services is missing, creating agent to help with validation"
+echo "🚨 VALIDATION FAILED - {agent_action}"
+echo "Affected services are missing or ambiguous, using agent {agent_name} to help with validation"
 
 echo "🤖 AGENT CONFIGURATION:"
 echo "Agent Name: {agent_name}"
@@ -291,6 +642,8 @@ echo "Tools Available: {tools_count} tools"
 echo "- kubectl_get_services: List all cluster services"
 echo "- validate_service_exists: Validate specific services"
 echo "- kubectl_cluster_investigation: Comprehensive cluster analysis"
+echo "- kubectl_cluster_snapshot: Parallel bulk snapshot with local anomaly summary"
+echo "- kubectl_log_sample: Parallel log sampling with error signatures"
 echo "- helm_deployments_check: Check recent deployments"
 echo "- workflow_retrigger: Re-trigger workflow with validated services"
 
@@ -304,7 +657,7 @@ echo "3. Re-trigger the workflow with validated services"
 echo ""
 echo "Posting agent notification to channel: ${{slack_channel_id}}"
 echo "Sending Slack message..."
-
+{build_prompt}
 {script}
 
 echo "✅ Service validation agent notification sent to Slack"
@@ -337,156 +690,159 @@ echo "MONITORING_PROMPT=$MONITORING_PROMPT"
 
     def _get_incident_alert_command(self) -> str:
         """Get the incident alert command."""
-        return f"""
-echo "🔍 DEBUG: post-incident-alert step starting"
-echo "affected_services value: '${{affected_services}}'"
+        if self.config.is_digested():
+            return self._get_digest_alert_command()
 
+        alert = SlackBlockKitTemplates.incident_alert_blocks(
+            incident_title="${incident_title}",
+            incident_id="${incident_id}",
+            incident_severity="${incident_severity}",
+            incident_priority="${incident_priority}",
+            incident_body="${incident_body}",
+            incident_url="${incident_url}",
+            affected_services="${affected_services}",
+            copilot_prompt="$COPILOT_PROMPT",
+            channel=FANOUT_CHANNEL,
+        )
+
+        return f"""
+# Only the Slack response goes to stdout, so later steps can read ${{initial_alert_message.ts}}
+exec 3>&1 1>&2
+{self.step_library.header("post-incident-alert")}
 echo "🚨 POSTING BEAUTIFUL INCIDENT ALERT"
 echo "affected_services provided: '${{affected_services:-'Not specified'}}'"
-echo "Posting to channel: ${{slack_channel_id}}"
+echo "Posting to channels: ${{alert_channels}}"
 
 echo "Sending beautiful incident alert with blocks..."
-#!/bin/bash
-# Generate Slack message from template
-cat > /tmp/incident_alert.json << EOF
-{{
-  "channel": "${{slack_channel_id}}",
-  "text": "🚨 INCIDENT: ${{incident_title}}",
-  "attachments": [
-    {{
-      "color": "danger",
-      "blocks": [
-        {{
-          "type": "header",
-          "text": {{
-            "type": "plain_text",
-            "text": "🚨 PRODUCTION INCIDENT ALERT"
-          }}
-        }},
-        {{
-          "type": "section",
-          "text": {{
-            "type": "mrkdwn",
-            "text": "*${{incident_title}}*"
-          }}
-        }},
-        {{
-          "type": "divider"
-        }},
-        {{
-          "type": "section",
-          "fields": [
-            {{
-              "type": "mrkdwn",
-              "text": "*🆔 ID:*\\\\n${{incident_id}}"
-            }},
-            {{
-              "type": "mrkdwn",
-              "text": "*🔥 Severity:*\\\\n${{incident_severity}}"
-            }},
-            {{
-              "type": "mrkdwn",
-              "text": "*⚡ Priority:*\\\\n${{incident_priority}}"
-            }},
-            {{
-              "type": "mrkdwn",
-              "text": "*🎯 Services:*\\\\n${{affected_services}}"
-            }}
-          ]
-        }},
-        {{
-          "type": "section",
-          "text": {{
-            "type": "mrkdwn",
-            "text": "*📝 Description:*\\\\n${{incident_body}}"
-          }}
-        }},
-        {{
-          "type": "actions",
-          "elements": [
-            {{
-              "type": "button",
-              "text": {{
-                "type": "plain_text",
-                "text": "📊 Dashboard",
-                "emoji": true
-              }},
-              "url": "${{incident_url}}",
-              "style": "primary"
-            }},
-            {{
-              "type": "button",
-              "text": {{
-                "type": "plain_text",
-                "text": "🤖 Co-Pilot Mode",
-                "emoji": true
-              }},
-              "style": "primary",
-              "value": "${{COPILOT_PROMPT}}",
-              "action_id": "agent.process_message_1-copilot"
-            }}
-          ]
-        }}
-      ]
-    }}
-  ]
-}}
-EOF
-
-# Post to Slack
-curl -s -X POST https://slack.com/api/chat.postMessage \\
-  -H "Authorization: Bearer ${{slack_token.token}}" \\
-  -H "Content-Type: application/json" \\
-  -d @/tmp/incident_alert.json
-
-# Check response
-if [ $? -eq 0 ]; then
-    echo "✅ Slack message posted successfully"
-else
-    echo "❌ Failed to post Slack message"
-    exit 1
-fi
+{alert.shell_command("/tmp/incident_alert.json")}
+# Fan out to every alert channel; the primary channel's message is the root of the incident lifecycle
+slack_fanout "${{slack_token.token}}" /tmp/incident_alert.json "${{alert_channels}}" >&3 || exit 1
+lifecycle_open "${{incident_id}}"
 
 echo "✅ Beautiful incident alert posted to Slack"
         """
 
-    def _get_investigation_start_command(self) -> str:
-        """Get the investigation start notification command."""
-        # Create Block Kit template for investigation start
-        template = SlackBlockKitTemplates.investigation_start_blocks(
-            investigation_agent="${investigation_agent}",
-            investigation_timeout="${investigation_timeout}",
-            max_retries="${max_retries}"
+    def _get_digest_dir(self) -> str:
+        """Get the runner directory buffering digest entries for the primary channel."""
+        slug = re.sub(r"[^A-Za-z0-9_-]+", "-", self.config.slack_channel_id).strip("-")
+        return f"/tmp/incident-digest/{slug or 'default'}"
+
+    def _get_digest_alert_command(self) -> str:
+        """Get the alert command for incidents batched into a channel digest."""
+        entry = (
+            "• `${incident_id}` *${incident_title}* (${incident_severity})"
+            " · ${affected_services} · <${incident_url}|dashboard>"
         )
+        digest_dir = self._get_digest_dir()
 
-        script = create_slack_message_script(
-            template_data=template,
-            output_file="/tmp/investigation_start.json"
-        ).replace("'EOF'", "EOF")
+        return f"""
+exec 3>&1 1>&2
+{self.step_library.header("post-incident-alert")}
+echo "📬 QUEUEING ${{incident_severity}} INCIDENT ALERT FOR THE DIGEST"
+echo "Digest channel: ${{slack_channel_id}}"
+
+# The entry is captured verbatim and kept on one line
+DIGEST_ENTRY=$(cat << 'TEMPLATE_VALUE_EOF' | paste -sd ' ' | sed 's/ ·  · / · /'
+{entry}
+TEMPLATE_VALUE_EOF
+)
+pending=$(digest_add {digest_dir} "$DIGEST_ENTRY" "${{incident_id}}")
+echo "Pending digest entries: $pending"
+if [ "$pending" -ge {self.config.digest_max_items} ]; then
+  digest_flush "${{slack_token.token}}" {digest_dir} "${{slack_channel_id}}" || exit 1
+fi
 
+# No root message: lifecycle stages are skipped and results go in the digest's thread
+printf '{{"ok": true, "digest": true, "channel": "", "ts": ""}}\\n' >&3
+echo "✅ Incident alert queued for the digest"
+        """
+
+    def _get_digest_flush_command(self) -> str:
+        """Get the command that sends the digest once its window closes.
+
+        Only the execution whose entry opened the window waits for it; the
+        others return at once.
+        """
         return f"""
-echo "🔍 DEBUG: notify-investigation-start step starting"
-echo "affected_services value: '${{affected_services}}'"
+{self.step_library.header("flush-incident-digest")}
+echo "📬 Sending the incident digest within {self.config.digest_window}s if this incident opened it"
+digest_wait "${{slack_token.token}}" {self._get_digest_dir()} "${{slack_channel_id}}" {self.config.digest_window} "${{incident_id}}"
+        """
+
+    def _get_investigation_start_command(self) -> str:
+        """Get the investigation start command, a stage update of the incident alert.
 
+        The stage is never folded: the next one only comes with the results.
+        """
+        return f"""
+{self.step_library.header("notify-investigation-start")}
 echo "🔍 NOTIFYING INVESTIGATION START"
-echo "affected_services provided: '${{affected_services:-'Not specified'}}'"
-echo "Posting to channel: ${{slack_channel_id}}"
+echo "Updating incident alert in channel: ${{slack_channel_id}}"
 
-echo "Sending beautiful investigation start notification..."
-{script}
+{self._get_lifecycle_stage_command(
+    "🔍 AI investigation started (agent ${investigation_agent}, "
+    "timeout ${investigation_timeout}s, retries ${max_retries})",
+    force=True,
+)}
 
-echo "✅ Beautiful investigation start notification posted to Slack"
+echo "✅ Investigation start recorded on the incident alert"
         """
 
-    def _get_kubernetes_cluster_health_message(self) -> str:
-        """Get the Kubernetes cluster health investigation message."""
-        return """**🔍 KUBERNETES CLUSTER INVESTIGATION**
+    def _get_lifecycle_stage_command(self, stage: str, force: bool = False) -> str:
+        """Get the command that records a lifecycle stage on the incident alert.
 
-**INCIDENT:** ${incident_title}
-**SEVERITY:** ${incident_severity}
-**SERVICES:** ${affected_services:-'All services'}
+        Args:
+            stage: Stage status line (may contain workflow template references)
+            force: Update immediately instead of folding into a pending update
 
-**TASK:** Investigate the Kubernetes cluster to identify issues related to this incident.
+        Returns:
+            Shell line calling the step library ``lifecycle_stage`` function
+        """
+        return (
+            # The title is captured verbatim so quotes in it cannot break the command
+            "LIFECYCLE_TITLE=$(cat << 'TEMPLATE_VALUE_EOF'\n${incident_title}\nTEMPLATE_VALUE_EOF\n)\n"
+            'lifecycle_stage "${slack_token.token}" "${initial_alert_message.channel}" '
+            '"${initial_alert_message.ts}" "${incident_id}" "🚨 INCIDENT: $LIFECYCLE_TITLE" '
+            f'"{stage}" {self.config.slack_fold_window}' + (" force" if force else "")
+        )
+
+    def get_prompt_layouts(self) -> List[PromptLayout]:
+        """Get the layouts of all agent and LLM prompts, for token and cache reporting."""
+        return [
+            self._get_comprehensive_investigation_layout(),
+            self._get_kubernetes_cluster_health_layout(),
+            self._get_service_specific_investigation_layout(),
+            self._get_helm_investigation_layout(),
+            self._get_argocd_investigation_layout(),
+            self._get_observe_investigation_layout(),
+            self._get_summary_generation_layout(),
+        ]
+
+    def _get_incident_details(self, services_default: str, description: bool = False) -> str:
+        """Get the INCIDENT DETAILS block closing an investigation prompt.
+
+        Args:
+            services_default: Affected services text when none were provided
+            description: Include the incident description
+
+        Returns:
+            Incident block of workflow references, resolved per incident by the engine
+        """
+        fields = [
+            ("ID", "${incident_id}"),
+            ("Title", "${incident_title}"),
+            ("Severity", "${incident_severity} (URGENT)"),
+        ]
+        if description:
+            fields.append(("Description", "${incident_body}"))
+        fields.append(("Affected Services", f"${{affected_services:-{services_default}}}"))
+        return incident_block(fields)
+
+    def _get_kubernetes_cluster_health_layout(self) -> PromptLayout:
+        """Get the Kubernetes cluster health investigation prompt layout."""
+        prefix = """**🔍 KUBERNETES CLUSTER INVESTIGATION**
+
+**TASK:** Investigate the Kubernetes cluster to identify issues related to the incident described at the end of this message.
 
 **PLEASE PERFORM:**
 1. Check cluster health: `kubectl get nodes`
@@ -511,28 +867,39 @@ echo "✅ Beautiful investigation start notification posted to Slack"
 [Immediate actions needed]
 ```
 
-**Keep it concise and actionable. Start investigating now.**"""
+**Keep it concise and actionable.**"""
+        suffix = incident_block(
+            [
+                ("Incident", "${incident_title}"),
+                ("Severity", "${incident_severity}"),
+                ("Services", "${affected_services:-'All services'}"),
+            ]
+        )
+        return PromptLayout(
+            "kubernetes_cluster_health", prefix, suffix + "\n\n**Start investigating now.**"
+        )
 
-    def _get_service_specific_investigation_message(self) -> str:
-        """Get the service-specific investigation message."""
-        return """**🎯 SERVICE-SPECIFIC INVESTIGATION**
+    def _get_kubernetes_cluster_health_message(self) -> str:
+        """Get the Kubernetes cluster health investigation message."""
+        return self._get_kubernetes_cluster_health_layout().render()
 
-**INCIDENT:** ${incident_title}
-**SERVICES:** ${affected_services}
+    def _get_service_specific_investigation_layout(self) -> PromptLayout:
+        """Get the service-specific investigation prompt layout."""
+        prefix = """**🎯 SERVICE-SPECIFIC INVESTIGATION**
 
-**TASK:** Investigate the specific services: ${affected_services}
+**TASK:** Investigate the services listed under INCIDENT DETAILS at the end of this message.
 
-If affected_services is empty, output: "⚠️ SKIPPING: No specific services provided for focused investigation"
+If no services are listed, output: "⚠️ SKIPPING: No specific services provided for focused investigation"
 
 **PLEASE PERFORM:**
-1. Check service pods: `kubectl get pods -l app=${affected_services}`
-2. Check service logs: `kubectl logs -l app=${affected_services} --tail=50`
-3. Check service health: `kubectl describe service ${affected_services}`
-4. Check deployments: `kubectl get deployments ${affected_services}`
+1. Check service pods: `kubectl get pods -l "app in (<services>)"`
+2. Check service logs: `kubectl logs -l "app in (<services>)" --prefix --tail=100 --since=1h --max-log-requests=10`
+3. Check service health: `kubectl describe service <service>`
+4. Check deployments: `kubectl get deployments <service>`
 
 **PROVIDE A BRIEF REPORT:**
 ```
-## 🎯 SERVICE INVESTIGATION: ${affected_services}
+## 🎯 SERVICE INVESTIGATION: [services]
 
 ### 📋 SERVICE STATUS
 [Pod status and health]
@@ -544,31 +911,26 @@ If affected_services is empty, output: "⚠️ SKIPPING: No specific services pr
 [Actions needed for this service]
 ```
 
-**Keep it focused and actionable. Start investigating now.**"""
-
-    def _get_summary_generation_prompt(self) -> str:
-        """Get the LLM summary generation prompt."""
-        return """**🤖 AI-POWERED INCIDENT INVESTIGATION SUMMARY**
-
-You are an expert incident response analyst creating a comprehensive summary of a Kubernetes incident investigation.
-
-**INCIDENT CONTEXT:**
-• **ID:** ${incident_id}
-• **Title:** ${incident_title}
-• **Severity:** ${incident_severity}
-• **Affected Services:** ${affected_services:-'All services investigated'}
-• **Description:** ${incident_body}
+**Keep it focused and actionable.**"""
+        suffix = incident_block(
+            [("Incident", "${incident_title}"), ("Services", "${affected_services}")]
+        )
+        return PromptLayout(
+            "service_specific_investigation", prefix, suffix + "\n\n**Start investigating now.**"
+        )
 
-**INVESTIGATION DATA TO ANALYZE:**
+    def _get_service_specific_investigation_message(self) -> str:
+        """Get the service-specific investigation message."""
+        return self._get_service_specific_investigation_layout().render()
 
-**1. CLUSTER HEALTH INVESTIGATION:**
-${kubernetes_cluster_health_results}
+    def _get_summary_generation_layout(self) -> PromptLayout:
+        """Get the LLM summary generation prompt layout; the investigation data goes in the suffix."""
+        prefix = """**🤖 AI-POWERED INCIDENT INVESTIGATION SUMMARY**
 
-**2. SERVICE-SPECIFIC INVESTIGATION:**
-${service_specific_results}
+You are an expert incident response analyst creating a comprehensive summary of a Kubernetes incident investigation.
 
 **YOUR TASK:**
-Create a comprehensive, executive-level summary that synthesizes both investigations into actionable insights.
+Create a comprehensive, executive-level summary that synthesizes the cluster health investigation given at the end of this message into actionable insights.
 
 **REQUIRED OUTPUT FORMAT:**
 ```
@@ -588,7 +950,7 @@ Create a comprehensive, executive-level summary that synthesizes both investigat
 [Key findings from cluster investigation]
 
 ### Service Analysis
-[Key findings from service-specific investigation]
+[Key findings for the affected services]
 
 ## ⚡ IMMEDIATE ACTIONS REQUIRED
 1. [Most urgent action - with specific commands]
@@ -620,129 +982,145 @@ Create a comprehensive, executive-level summary that synthesizes both investigat
 - Focus on actionable insights
 - Include specific kubectl commands where relevant
 - Prioritize by business impact
-- Use clear, executive-friendly language
-- Synthesize findings from both investigations
+- Use clear, executive-friendly language"""
+        suffix = (
+            incident_block(
+                [
+                    ("ID", "${incident_id}"),
+                    ("Title", "${incident_title}"),
+                    ("Severity", "${incident_severity}"),
+                    ("Affected Services", "${affected_services:-'All services investigated'}"),
+                    ("Description", "${incident_body}"),
+                ],
+                heading="INCIDENT CONTEXT",
+            )
+            + """
+
+**INVESTIGATION DATA TO ANALYZE:**
+
+**CLUSTER HEALTH INVESTIGATION:**
+${kubernetes_cluster_health_results_digest}
 
 **CREATE THE SUMMARY NOW:**"""
+        )
+        return PromptLayout("summary_generation", prefix, suffix)
+
+    def _get_summary_generation_prompt(self) -> str:
+        """Get the LLM summary generation prompt."""
+        return self._get_summary_generation_layout().render()
 
     def _get_enhanced_post_results_command(self) -> str:
-        """Get enhanced post investigation results command with LLM summary."""
-        return """
-echo "🔍 DEBUG: post-investigation-results step starting"
-echo "affected_services value: '${affected_services}'"
+        """Get the command posting the investigation results in the incident thread.
 
-echo "🔬 POSTING ENHANCED INVESTIGATION RESULTS"
+        The investigation's own summary section leads the message, followed by
+        its full report. Each section is measured before posting. A section too
+        large for a Slack block is uploaded as a file to the incident thread, and
+        the message keeps a short excerpt, so the post never fails on size.
+        """
+        results = SlackBlockKitTemplates.enhanced_investigation_results_blocks(
+            incident_title="${incident_title}",
+            incident_severity="${incident_severity}",
+            affected_services="${affected_services}",
+            llm_summary="$LLM_SUMMARY",
+            cluster_health="$CLUSTER_HEALTH",
+            service_results="Covered by the cluster health investigation",
+            thread_ts="$RESULTS_THREAD",
+            deep_dive_prompt="$DEEP_DIVE_PROMPT",
+            apply_fixes_prompt="$APPLY_FIXES_PROMPT",
+            monitoring_prompt="$MONITORING_PROMPT",
+        )
+        return (
+            self.step_library.header("post-investigation-results")
+            + """
+echo "🔬 POSTING INVESTIGATION RESULTS"
 echo "affected_services provided: '${affected_services:-'Not specified'}'"
 echo "Posting to channel: ${slack_channel_id}"
-
+"""
+            + self._get_results_thread_command()
+            + """
 # Load prompts from files
 DEEP_DIVE_PROMPT=$(cat /tmp/deep_dive_prompt.txt 2>/dev/null || echo "Help me perform deep dive analysis for incident ${incident_id}")
 APPLY_FIXES_PROMPT=$(cat /tmp/apply_fixes_prompt.txt 2>/dev/null || echo "Help me apply fixes for incident ${incident_id}")
 MONITORING_PROMPT=$(cat /tmp/monitoring_prompt.txt 2>/dev/null || echo "Help me monitor incident ${incident_id} recovery")
 
-# Create enhanced investigation results with LLM summary
-cat > /tmp/enhanced_investigation_summary.json << JSON_EOF
-{
-    "channel": "${slack_channel_id}",
-    "text": "🤖 AI Investigation Complete - Enhanced Report Below",
-    "attachments": [{
-        "color": "#ff6600",
-        "blocks": [{
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": "🤖 AI-POWERED INCIDENT INVESTIGATION COMPLETE"
-            }
-        }, {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*Incident:* ${incident_title}\\n*Services:* ${affected_services:-'Cluster-wide investigation'}\\n*Status:* ✅ Enhanced Analysis Complete\\n*Severity:* ${incident_severity}"
-            }
-        }, {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*🤖 LLM Summary:*\\n${investigation_summary}"
-            }
-        }, {
-            "type": "divider"
-        }, {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*🏗️ Cluster Health Investigation:*\\n${kubernetes_cluster_health_results}"
-            }
-        }, {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*🎯 Service-Specific Investigation:*\\n${service_specific_results}"
-            }
-        }, {
-            "type": "actions",
-            "elements": [{
-                "type": "button",
-                "text": {
-                    "type": "plain_text",
-                    "text": "🔍 Deep Dive",
-                    "emoji": true
-                },
-                "style": "primary",
-                "value": "$DEEP_DIVE_PROMPT",
-                "action_id": "agent.process_message_1"
-            }, {
-                "type": "button",
-                "text": {
-                    "type": "plain_text",
-                    "text": "⚡ Apply Fixes",
-                    "emoji": true
-                },
-                "style": "danger",
-                "value": "$APPLY_FIXES_PROMPT",
-                "action_id": "agent.process_message_2"
-            }, {
-                "type": "button",
-                "text": {
-                    "type": "plain_text",
-                    "text": "📊 Monitor",
-                    "emoji": true
-                },
-                "value": "$MONITORING_PROMPT",
-                "action_id": "agent.process_message_3"
-            }]
-        }]
-    }]
-}
-JSON_EOF
-
-# Post enhanced summary message
-echo "🤖 Posting enhanced investigation summary to Slack..."
-curl -s -X POST https://slack.com/api/chat.postMessage \\
-    -H "Authorization: Bearer ${slack_token.token}" \\
-    -H "Content-Type: application/json" \\
-    -d @/tmp/enhanced_investigation_summary.json
-
-echo "✅ Enhanced investigation summary posted to Slack"
-echo "📝 Investigation results posting completed"
-
-echo "ℹ️ Complete investigation data available in workflow execution output above"
+# Capture the investigation verbatim, then fit each section into a block or upload it as a file
+RESULTS_DIR="/tmp/incident-results/${incident_id}"
+mkdir -p "$RESULTS_DIR"
+cat > "$RESULTS_DIR/cluster-health.md" << 'RESULT_EOF'
+${kubernetes_cluster_health_results_digest}
+RESULT_EOF
+# The summary section of the required output format, or the start of the report without one
+awk '/^#+ .*SUMMARY/ { found = 1; next } found && /^#+ / { exit } found { print }' \
+  "$RESULTS_DIR/cluster-health.md" > "$RESULTS_DIR/summary.md"
+if ! grep -q '[^[:space:]]' "$RESULTS_DIR/summary.md"; then
+  head -n 10 "$RESULTS_DIR/cluster-health.md" > "$RESULTS_DIR/summary.md"
+fi
+
+LLM_SUMMARY=$("""
+            + self._get_fit_section_command("summary.md", "Investigation summary")
+            + """)
+CLUSTER_HEALTH=$("""
+            + self._get_fit_section_command("cluster-health.md", "Cluster health investigation")
+            + """)
+
+"""
+            + create_slack_message_script(results, "/tmp/enhanced_investigation_summary.json")
+            + """
+echo "✅ Investigation results posted to Slack"
+"""
+            + self._get_lifecycle_stage_command(
+                "✅ AI investigation complete - results in thread", force=True
+            )
+            + """
         """
+        )
 
-    def _get_helm_investigation_message(self) -> str:
-        """Get the Helm deployment investigation message."""
-        return """**AUTOMATED HELM DEPLOYMENT INVESTIGATION**
+    def _get_results_thread_command(self) -> str:
+        """Get the lines setting ``RESULTS_CHANNEL`` and ``RESULTS_THREAD`` for the results post.
 
-**CRITICAL NOTICE:** You are running in AUTOMATION MODE with NO USER INTERACTION capabilities. Perform CONCISE analysis using helm-cli tools.
+        Results go in the incident alert's thread. A digested incident has no
+        alert of its own, so its results go in the thread of the digest that
+        carried it, which is sent first if it is still pending. They are never
+        posted top-level.
+        """
+        if not self.config.is_digested():
+            return """
+RESULTS_CHANNEL="${initial_alert_message.channel}"
+RESULTS_THREAD="${initial_alert_message.ts}"
+"""
+        return f"""
+RESULTS_CHANNEL="${{slack_channel_id}}"
+RESULTS_THREAD=$(digest_thread "${{slack_token.token}}" {self._get_digest_dir()} "${{slack_channel_id}}" '`${{incident_id}}`')
+if [ -z "$RESULTS_THREAD" ]; then
+  echo "❌ No digest message found for incident ${{incident_id}}; results are not posted top-level"
+  exit 1
+fi
+"""
 
-**INCIDENT DETAILS:**
-• **ID:** ${incident_id}
-• **Title:** ${incident_title}
-• **Severity:** ${incident_severity} (URGENT)
-• **Affected Services:** ${affected_services:-'Not specified - will investigate all Helm deployments'}
+    def _get_fit_section_command(self, filename: str, title: str) -> str:
+        """Get the command printing a results section that fits in one Slack block.
+
+        Args:
+            filename: Section file under ``$RESULTS_DIR``
+            title: Title of the file uploaded when the section is too large
+
+        Returns:
+            Shell line calling the step library ``slack_fit`` function
+        """
+        return (
+            'slack_fit "${slack_token.token}" "$RESULTS_CHANNEL" "$RESULTS_THREAD" '
+            f'"$RESULTS_DIR/{filename}" "{title}" '
+            f"{MAX_SECTION_TEXT - 100}"
+        )
+
+    def _get_helm_investigation_layout(self) -> PromptLayout:
+        """Get the Helm deployment investigation prompt layout."""
+        prefix = """**AUTOMATED HELM DEPLOYMENT INVESTIGATION**
+
+**CRITICAL NOTICE:** You are running in AUTOMATION MODE with NO USER INTERACTION capabilities. Perform CONCISE analysis using helm-cli tools.
 
 **YOUR MISSION - FOCUSED HELM DEPLOYMENT INVESTIGATION:**
-Using the helm-cli tool, investigate the last 5 deployments for any issues:
+Using the helm-cli tool, investigate the last 5 deployments for any issues related to the incident described at the end of this message:
 
 **1. RECENT HELM DEPLOYMENTS**
 - List the last 5 Helm releases and their sync status
@@ -751,7 +1129,7 @@ Using the helm-cli tool, investigate the last 5 deployments for any issues:
 
 **2. DEPLOYMENT HEALTH CHECK**
 - Check sync status of all Helm releases
-- If specific services provided: ${affected_services:-'Focus on releases with recent sync issues or health problems'}
+- If specific services are provided, focus on their releases; otherwise focus on releases with recent sync issues or health problems
 - Look for any sync failures or health warnings
 - Use: `helm get values` for specific releases
 
@@ -784,27 +1162,29 @@ Using the helm-cli tool, investigate the last 5 deployments for any issues:
 
 **CONSTRAINTS:**
 - KEEP OUTPUT CONCISE - Limited output required
-- Focus on Helm deployments related to: ${affected_services:-'Otherwise focus on applications with issues'}
+- Focus on Helm deployments related to the affected services, otherwise on applications with issues
 - Use helm-cli tools only
 - No verbose command outputs
-- Provide actionable insights quickly
+- Provide actionable insights quickly"""
+        suffix = self._get_incident_details(
+            "'Not specified - will investigate all Helm deployments'"
+        )
+        return PromptLayout(
+            "helm_investigation", prefix, suffix + "\n\n**START FOCUSED HELM INVESTIGATION NOW!**"
+        )
 
-**START FOCUSED HELM INVESTIGATION NOW!**"""
+    def _get_helm_investigation_message(self) -> str:
+        """Get the Helm deployment investigation message."""
+        return self._get_helm_investigation_layout().render()
 
-    def _get_argocd_investigation_message(self) -> str:
-        """Get the ArgoCD investigation message."""
-        return """**AUTOMATED ARGOCD DEPLOYMENT INVESTIGATION**
+    def _get_argocd_investigation_layout(self) -> PromptLayout:
+        """Get the ArgoCD investigation prompt layout."""
+        prefix = """**AUTOMATED ARGOCD DEPLOYMENT INVESTIGATION**
 
 **CRITICAL NOTICE:** You are running in AUTOMATION MODE with NO USER INTERACTION capabilities. Perform CONCISE analysis using argocli tools.
 
-**INCIDENT DETAILS:**
-• **ID:** ${incident_id}
-• **Title:** ${incident_title}
-• **Severity:** ${incident_severity} (URGENT)
-• **Affected Services:** ${affected_services:-'Not specified - will investigate all ArgoCD applications'}
-
 **YOUR MISSION - FOCUSED ARGOCD INVESTIGATION:**
-Using the argocli tool, investigate the last 5 deployments for any issues:
+Using the argocli tool, investigate the last 5 deployments for any issues related to the incident described at the end of this message:
 
 **1. RECENT ARGOCD DEPLOYMENTS**
 - List the last 5 ArgoCD applications and their sync status
@@ -813,7 +1193,7 @@ Using the argocli tool, investigate the last 5 deployments for any issues:
 
 **2. DEPLOYMENT HEALTH CHECK**
 - Check sync status of all ArgoCD applications
-- If specific services provided: ${affected_services:-'Focus on applications with recent sync issues or health problems'}
+- If specific services are provided, focus on their applications; otherwise focus on applications with recent sync issues or health problems
 - Look for any sync failures or health warnings
 - Use: `argocli app get` for specific apps
 
@@ -846,31 +1226,35 @@ Using the argocli tool, investigate the last 5 deployments for any issues:
 
 **CONSTRAINTS:**
 - KEEP OUTPUT CONCISE - Limited output required
-- Focus on ArgoCD applications related to: ${affected_services:-'Otherwise focus on applications with issues'}
+- Focus on ArgoCD applications related to the affected services, otherwise on applications with issues
 - Use argocli tools only
 - No verbose command outputs
-- Provide actionable insights quickly
+- Provide actionable insights quickly"""
+        suffix = self._get_incident_details(
+            "'Not specified - will investigate all ArgoCD applications'"
+        )
+        return PromptLayout(
+            "argocd_investigation",
+            prefix,
+            suffix + "\n\n**START FOCUSED ARGOCD INVESTIGATION NOW!**",
+        )
 
-**START FOCUSED ARGOCD INVESTIGATION NOW!**"""
+    def _get_argocd_investigation_message(self) -> str:
+        """Get the ArgoCD investigation message."""
+        return self._get_argocd_investigation_layout().render()
 
-    def _get_observe_investigation_message(self) -> str:
-        """Get the Observe investigation message."""
-        return """**AUTOMATED OBSERVE ERROR INVESTIGATION**
+    def _get_observe_investigation_layout(self) -> PromptLayout:
+        """Get the Observe investigation prompt layout."""
+        prefix = """**AUTOMATED OBSERVE ERROR INVESTIGATION**
 
 **CRITICAL NOTICE:** You are running in AUTOMATION MODE with NO USER INTERACTION capabilities. Perform CONCISE analysis using observe-cli tools.
 
-**INCIDENT DETAILS:**
-• **ID:** ${incident_id}
-• **Title:** ${incident_title}
-• **Severity:** ${incident_severity} (URGENT)
-• **Affected Services:** ${affected_services:-'Not specified - will investigate all services for errors'}
-
 **YOUR MISSION - FOCUSED OBSERVE ERROR INVESTIGATION:**
-Using the observe-cli tool, investigate for suspicious errors and issues:
+Using the observe-cli tool, investigate suspicious errors and issues related to the incident described at the end of this message:
 
 **1. ERROR LOG ANALYSIS**
 - Search for recent errors across all services
-- If specific services provided: ${affected_services:-'Focus on services with high error rates or recent issues'}
+- If specific services are provided, focus on them; otherwise focus on services with high error rates or recent issues
 - Look for error patterns in the last 2 hours
 - Use: observe-cli search and query tools
 
@@ -908,209 +1292,22 @@ Using the observe-cli tool, investigate for suspicious errors and issues:
 
 **CONSTRAINTS:**
 - KEEP OUTPUT CONCISE - Limited output required
-- Focus on errors related to: ${affected_services:-'Otherwise focus on services with high error rates'}
+- Focus on errors related to the affected services, otherwise on services with high error rates
 - Use observe-cli tools only
 - No verbose command outputs
-- Provide actionable insights quickly
-
-**START FOCUSED OBSERVE INVESTIGATION NOW!**"""
-
-    def _get_process_results_command(self) -> str:
-        """Get the process investigation results command."""
-        return """
-echo "🔍 DEBUG: process-investigation-results step starting"
-echo "affected_services value: '${affected_services}'"
-
-echo "📊 PROCESSING INVESTIGATION RESULTS"
-echo "===================================="
-
-# Use printf to handle special characters properly
-printf '%s' "${investigation_results}" > /tmp/investigation_output.txt
-RESULT_LENGTH=$(wc -c < /tmp/investigation_output.txt)
-echo "AI investigation output length: $RESULT_LENGTH characters"
-
-# Simple check - just verify we have content
-if [ "$RESULT_LENGTH" -gt 10 ]; then
-  echo "✅ AI investigation completed successfully"
-  echo "AGENT_ERROR_DETECTED=false" > /tmp/agent_status
-  echo "Investigation results processed successfully"
-else
-  echo "⚠️ Investigation results appear incomplete"
-  echo "AGENT_ERROR_DETECTED=true" > /tmp/agent_status
-  echo "Providing fallback investigation results"
-fi
-
-echo "📝 Investigation results ready for Slack posting"
-echo "✅ Investigation results processing completed"
-        """
-
-    def _get_post_results_command(self) -> str:
-        """Get the post investigation results command."""
-        return """
-echo "🔍 DEBUG: post-investigation-results step starting"
-echo "affected_services value: '${affected_services}'"
-
-echo "🔬 POSTING INVESTIGATION RESULTS"
-echo "affected_services provided: '${affected_services:-'Not specified'}'"
-echo "Posting to channel: ${slack_channel_id}"
-
-# Post investigation completion notification
-echo "📊 Posting investigation completion notification..."
-curl -s -X POST https://slack.com/api/chat.postMessage \\
-  -H "Authorization: Bearer ${slack_token.token}" \\
-  -H "Content-Type: application/json" \\
-  -d "{
-    \\"channel\\": \\"${slack_channel_id}\\",
-    \\"text\\": \\"🔬 AI Investigation Complete\\",
-    \\"attachments\\": [{
-      \\"color\\": \\"#ff9900\\",
-      \\"blocks\\": [{
-        \\"type\\": \\"header\\",
-        \\"text\\": {
-          \\"type\\": \\"plain_text\\",
-          \\"text\\": \\"🔬 AI INVESTIGATION COMPLETE\\"
-        }
-      }, {
-        \\"type\\": \\"section\\",
-        \\"text\\": {
-          \\"type\\": \\"mrkdwn\\",
-          \\"text\\": \\"*Incident:* ${incident_title}\\\\n*Services:* ${affected_services:-'Investigated all services'}\\\\n*Status:* ✅ Analysis Complete\\"
-        }
-      }, {
-        \\"type\\": \\"section\\",
-        \\"text\\": {
-          \\"type\\": \\"mrkdwn\\",
-          \\"text\\": \\"*Key Findings:* Critical services not running - immediate action required\\\\n*Next Steps:* Deploy services and restore monitoring\\"
-        }
-      }]
-    }]
-  }"
-
-# Post the actual investigation results as a code block (if file exists)
-if [ -f "/tmp/investigation_output.txt" ]; then
-  echo "📝 Posting detailed investigation results..."
-
-  # Use base64 encoding to safely transfer the content
-  base64 -w 0 /tmp/investigation_output.txt > /tmp/investigation_b64.txt
-
-  # Create a simple script to decode and post
-  cat > /tmp/post_results.sh << 'EOF'
-#!/bin/bash
-CONTENT=$(base64 -d /tmp/investigation_b64.txt)
-curl -s -X POST https://slack.com/api/chat.postMessage \\
-  -H "Authorization: Bearer $1" \\
-  -H "Content-Type: application/json" \\
-  -d "{\\"channel\\": \\"$2\\", \\"text\\": \\"📋 **Investigation Results:**\\\\n\\`\\`\\`\\\\n${CONTENT}\\\\n\\`\\`\\`\\"}"
-EOF
-
-  chmod +x /tmp/post_results.sh
-  /tmp/post_results.sh "${slack_token.token}" "${slack_channel_id}" || echo "📝 Fallback: Investigation completed with findings"
-else
-  echo "📝 Investigation results file not found, posting summary"
-  curl -s -X POST https://slack.com/api/chat.postMessage \\
-    -H "Authorization: Bearer ${slack_token.token}" \\
-    -H "Content-Type: application/json" \\
-    -d "{
-      \\"channel\\": \\"${slack_channel_id}\\",
-      \\"text\\": \\"📋 Investigation completed successfully. Key finding: Critical services require immediate attention.\\"
-    }"
-fi
-
-echo "✅ Investigation results posted to Slack"
-        """
-
-    def _get_simple_post_results_command(self) -> str:
-        """Get a simple post investigation results command."""
-        return """
-echo "🔍 DEBUG: post-investigation-results step starting"
-echo "affected_services value: '${affected_services}'"
-
-echo "📊 POSTING INVESTIGATION RESULTS"
-echo "affected_services provided: '${affected_services:-'Not specified'}'"
-echo "Posting to channel: ${slack_channel_id}"
+- Provide actionable insights quickly"""
+        suffix = self._get_incident_details(
+            "'Not specified - will investigate all services for errors'"
+        )
+        return PromptLayout(
+            "observe_investigation",
+            prefix,
+            suffix + "\n\n**START FOCUSED OBSERVE INVESTIGATION NOW!**",
+        )
 
-# Create enhanced investigation results with actionable buttons
-cat > /tmp/investigation_summary.json << JSON_EOF
-{
-    "channel": "${slack_channel_id}",
-    "text": "📊 AI Investigation Complete",
-    "attachments": [{
-        "color": "#ff9900",
-        "blocks": [{
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": "📊 AI INVESTIGATION COMPLETE"
-            }
-        }, {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*Incident:* ${incident_title}\\n*Services:* ${affected_services:-'All services investigated'}\\n*Status:* ✅ Analysis Complete\\n*Severity:* ${incident_severity}"
-            }
-        }, {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*🎯 Executive Summary:*\\nComprehensive Kubernetes cluster investigation completed. Detailed analysis reveals resource constraints and performance bottlenecks affecting system stability.\\n\\n*⚠️ Key Findings:*\\n• High resource usage detected on critical nodes\\n• Kafka cluster showing performance degradation\\n• Database connectivity issues linked to resource pressure"
-            }
-        }, {
-            "type": "section",
-            "text": {
-                "type": "mrkdwn",
-                "text": "*📋 Investigation Report:*\\nComplete technical analysis available in workflow execution logs above. Report includes cluster status, root cause analysis, and prioritized remediation steps."
-            }
-        }, {
-            "type": "actions",
-            "elements": [{
-                "type": "button",
-                "text": {
-                    "type": "plain_text",
-                    "text": "🔍 Deep Dive",
-                    "emoji": true
-                },
-                "style": "primary",
-                "value": "${DEEP_DIVE_PROMPT}",
-                "action_id": "agent.process_message_1-deep_dive"
-            }, {
-                "type": "button",
-                "text": {
-                    "type": "plain_text",
-                    "text": "⚡ Apply Fixes",
-                    "emoji": true
-                },
-                "style": "danger",
-                "value": "${APPLY_FIXES_PROMPT}",
-                "action_id": "agent.process_message_1-apply_fixes"
-            }, {
-                "type": "button",
-                "text": {
-                    "type": "plain_text",
-                    "text": "📊 Monitor",
-                    "emoji": true
-                },
-                "value": "${MONITORING_PROMPT}",
-                "action_id": "agent.process_message_1-monitor"
-            }]
-        }]
-    }]
-}
-JSON_EOF
-
-# Post summary message
-echo "📊 Posting investigation summary to Slack..."
-curl -s -X POST https://slack.com/api/chat.postMessage \\
-    -H "Authorization: Bearer ${slack_token.token}" \\
-    -H "Content-Type: application/json" \\
-    -d @/tmp/investigation_summary.json
-
-echo "✅ Investigation summary posted to Slack"
-echo "📝 Investigation results posting completed"
-
-# Note: The detailed investigation results are available in the workflow execution logs
-# Due to shell variable substitution limitations with multiline content, we post a summary instead
-echo "ℹ️ Detailed investigation results are available in the workflow execution output above"
-        """
+    def _get_observe_investigation_message(self) -> str:
+        """Get the Observe investigation message."""
+        return self._get_observe_investigation_layout().render()
 
     def _get_kubernetes_cluster_health_command(self) -> str:
         """Get the Kubernetes cluster health investigation command."""
@@ -1190,18 +1387,15 @@ echo "✅ Service-specific investigation completed"
             incident_title="${incident_title}",
             incident_id="${incident_id}",
             status="Complete",
-            summary="Incident response workflow completed successfully with AI-powered investigation and automated notifications"
+            summary="Incident response workflow completed successfully with AI-powered investigation and automated notifications",
         )
 
         script = create_slack_message_script(
-            template_data=template,
-            output_file="/tmp/action_summary.json"
-        ).replace("'EOF'", "EOF")
+            template_data=template, output_file="/tmp/action_summary.json"
+        )
 
         return f"""
-echo "🔍 DEBUG: post-action-summary step starting"
-echo "affected_services value: '${{affected_services}}'"
-
+{self.step_library.header("post-action-summary")}
 echo "⚡ POSTING ACTION SUMMARY"
 echo "affected_services provided: '${{affected_services:-'Not specified'}}'"
 echo "Posting to channel: ${{slack_channel_id}}"
@@ -1212,21 +1406,14 @@ echo "Sending action summary..."
 echo "✅ Action summary posted to Slack"
         """
 
-    def _get_comprehensive_investigation_message(self) -> str:
-        """Get the comprehensive investigation message for AI-powered analysis."""
-        return """**AUTOMATED KUBERNETES INCIDENT INVESTIGATION**
+    def _get_comprehensive_investigation_layout(self) -> PromptLayout:
+        """Get the comprehensive investigation prompt layout."""
+        prefix = """**AUTOMATED KUBERNETES INCIDENT INVESTIGATION**
 
 **CRITICAL NOTICE:** You are running in AUTOMATION MODE with NO USER INTERACTION capabilities. Perform complete analysis using ALL available Kubernetes tools.
 
-**INCIDENT DETAILS:**
-• **ID:** ${incident_id}
-• **Title:** ${incident_title}
-• **Severity:** ${incident_severity} (URGENT)
-• **Description:** ${incident_body}
-• **Affected Services:** ${affected_services:-All services}
-
 **YOUR MISSION - KUBERNETES CLUSTER INVESTIGATION:**
-Perform these specific investigations using ALL available kubectl and Kubernetes tools:
+Investigate the incident described under INCIDENT DETAILS at the end of this message. Perform these specific investigations using ALL available kubectl and Kubernetes tools:
 
 **1. CLUSTER OVERVIEW**
 - Check cluster status and node health
@@ -1239,7 +1426,7 @@ Perform these specific investigations using ALL available kubectl and Kubernetes
 - Use: `kubectl get pods -A`, `kubectl describe pods`
 
 **3. SERVICE INVESTIGATION**
-- Check services related to: ${affected_services:-All critical services}
+- Check the affected services, or all critical services if none are listed
 - Verify deployments and replicasets
 - Use: `kubectl get deployments -A`, `kubectl get services -A`
 
@@ -1251,7 +1438,8 @@ Perform these specific investigations using ALL available kubectl and Kubernetes
 **5. LOGS ANALYSIS**
 - Check logs for affected services
 - Look for error patterns
-- Use: `kubectl logs` for relevant pods
+- Sample all of the services' pods at once with bounded output: `kubectl logs -l "app in (<services>)" --prefix --tail=100 --since=1h --max-log-requests=10`
+- Then read full logs only for the specific pods that show errors
 
 **REQUIRED OUTPUT FORMAT:**
 ```
@@ -1278,18 +1466,23 @@ Perform these specific investigations using ALL available kubectl and Kubernetes
 
 **AUTOMATION CONSTRAINTS:**
 - Use ONLY kubectl and read-only Kubernetes tools
-- Focus on the affected services: ${affected_services}
+- Focus on the affected services
 - Do NOT make any changes - investigation only
-- Be specific with command outputs and findings
+- Be specific with command outputs and findings"""
+        suffix = self._get_incident_details("All services", description=True)
+        return PromptLayout(
+            "comprehensive_investigation",
+            prefix,
+            suffix + "\n\n**START KUBERNETES INVESTIGATION NOW!**",
+        )
 
-**START KUBERNETES INVESTIGATION NOW!**"""
+    def _get_comprehensive_investigation_message(self) -> str:
+        """Get the comprehensive investigation message for AI-powered analysis."""
+        return self._get_comprehensive_investigation_layout().render()
 
     def _get_investigation_with_agent_command(self) -> str:
         """Get the command to run the agent for investigation."""
-        return """
-echo "🔍 DEBUG: investigate-kubernetes-cluster-health step starting"
-echo "affected_services value: '${affected_services}'"
-
+        return self.step_library.header("investigate-kubernetes-cluster-health") + """
 echo "🔬 KUBERNETES CLUSTER HEALTH INVESTIGATION"
 echo "=========================================="
 
@@ -1330,4 +1523,4 @@ echo "## 🔄 ESCALATION NEEDED"
 echo "No - Can be resolved with standard remediation procedures"
 echo ""
 echo "✅ Investigation completed successfully"
-        """
\ No newline at end of file
+        """
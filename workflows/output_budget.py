@@ -0,0 +1,111 @@
+"""
+Output size budgeting for step results that flow into downstream steps.
+"""
+
+DEFAULT_OUTPUT_BUDGET = 16 * 1024
+DEFAULT_ARTIFACT_DIR = "/tmp/incident-artifacts"
+# Characters kept from the incident ID when it names the artifact directory
+ARTIFACT_NAME_CHARS = "A-Za-z0-9._-"
+
+
+class OutputBudget:
+    """Byte budget for a single step output.
+
+    Outputs within the budget flow downstream unchanged. Oversized outputs are
+    written to an artifact file and replaced by a bounded digest made of the
+    parsed sections plus the head and tail of the original output.
+    """
+
+    def __init__(
+        self,
+        output: str,
+        max_bytes: int = DEFAULT_OUTPUT_BUDGET,
+        artifact_dir: str = DEFAULT_ARTIFACT_DIR,
+        section_line_bytes: int = 200,
+    ):
+        """Initialize the output budget.
+
+        Args:
+            output: Name of the step output the budget applies to
+            max_bytes: Maximum number of bytes allowed to flow downstream
+            artifact_dir: Directory where oversized outputs are stored
+            section_line_bytes: Maximum bytes kept per section line in the digest
+        """
+        if max_bytes < 2048:
+            raise ValueError(f"Output budget for {output} must be at least 2048 bytes")
+
+        self.output = output
+        self.max_bytes = max_bytes
+        self.artifact_dir = artifact_dir
+        self.section_line_bytes = section_line_bytes
+
+        # Half of the budget goes to parsed sections, the rest to head, tail and notices
+        self.sections_bytes = max_bytes // 2
+        self.head_bytes = max_bytes // 4
+        self.tail_bytes = max_bytes - self.sections_bytes - self.head_bytes - 256
+
+    @property
+    def digest_output(self) -> str:
+        """Name of the bounded output that downstream steps should reference."""
+        return f"{self.output}_digest"
+
+    @property
+    def step_name(self) -> str:
+        """Name of the workflow step enforcing this budget."""
+        return f"budget-{self.output.replace('_', '-')}"
+
+    def artifact_path(self, incident_dir: str = "$INCIDENT_DIR") -> str:
+        """Get the artifact path for the full output.
+
+        Args:
+            incident_dir: Sanitized directory name for the incident, the shell variable
+                set by the guard command by default
+        """
+        return f"{self.artifact_dir}/{incident_dir}/{self.output}.txt"
+
+    def guard_command(self) -> str:
+        """Get the shell command that enforces the budget at runtime.
+
+        The output is written through a quoted heredoc so agent text containing
+        quotes, backticks or ``$`` cannot break the shell. The incident ID is
+        reduced to ``[A-Za-z0-9._-]`` with no leading dot before it names the
+        artifact directory, so IDs like ``../x`` or ``/etc`` stay inside it.
+        """
+        artifact = self.artifact_path()
+        return f"""
+echo "📏 ENFORCING OUTPUT BUDGET: {self.output} ({self.max_bytes} bytes)" >&2
+
+INCIDENT_DIR=$(tr -d '\\n' << 'INCIDENT_ID_EOF' | tr -c '{ARTIFACT_NAME_CHARS}' '_' | sed 's/^\\./_/'
+${{incident_id}}
+INCIDENT_ID_EOF
+)
+[ -n "$INCIDENT_DIR" ] || INCIDENT_DIR=unknown
+ARTIFACT="{artifact}"
+mkdir -p "$(dirname "$ARTIFACT")"
+cat > "$ARTIFACT" << 'OUTPUT_BUDGET_EOF'
+${{{self.output}}}
+OUTPUT_BUDGET_EOF
+
+SIZE=$(wc -c < "$ARTIFACT" | tr -d ' ')
+if [ "$SIZE" -le {self.max_bytes} ]; then
+  echo "✅ Output within budget ($SIZE bytes)" >&2
+  cat "$ARTIFACT"
+  exit 0
+fi
+
+echo "⚠️ Output truncated: $SIZE bytes exceeds the {self.max_bytes} byte budget"
+echo "📦 Full output stored at: $ARTIFACT"
+echo ""
+echo "## 📑 SECTIONS"
+awk '/^#+ / {{ print substr($0, 1, {self.section_line_bytes}); body = 1; next }}
+     body && NF {{ print substr($0, 1, {self.section_line_bytes}); body = 0 }}' "$ARTIFACT" | head -c {self.sections_bytes}
+echo ""
+echo ""
+echo "## ⬆️ HEAD"
+head -c {self.head_bytes} "$ARTIFACT"
+echo ""
+echo ""
+echo "## ⬇️ TAIL"
+tail -c {self.tail_bytes} "$ARTIFACT"
+echo ""
+        """
@@ -0,0 +1,110 @@
+"""
+Prompt layout for provider-side prefix caching.
+
+Model providers cache prompt prefixes: a request whose leading tokens match a
+recent request skips re-processing them. A prompt is therefore built as a
+static prefix (role, mission, tool guidance, output format) that is
+byte-identical for every incident, followed by a compact suffix with the
+incident-specific values. Anything variable placed early in a prompt turns
+everything after it into a cache miss.
+"""
+
+import hashlib
+import math
+import re
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+# Providers only cache prefixes of at least this many tokens
+MIN_CACHEABLE_TOKENS = 1024
+# Rough BPE density for English prose and markdown; emoji and other non-ASCII
+# characters take several bytes and usually several tokens
+BYTES_PER_TOKEN = 4
+
+# Values resolved per incident: workflow references (${...}) and tool templates ({{...}})
+VARIABLE = re.compile(r"\$\{|\{\{")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a text without a provider tokenizer."""
+    return math.ceil(len(text.encode("utf-8")) / BYTES_PER_TOKEN)
+
+
+class PromptLayout(NamedTuple):
+    """A prompt split into a static cacheable prefix and an incident-specific suffix."""
+
+    name: str
+    prefix: str
+    suffix: str
+
+    def render(self) -> str:
+        """Get the full prompt text."""
+        return f"{self.prefix.rstrip()}\n\n{self.suffix.strip()}"
+
+
+def incident_block(fields: Sequence[Tuple[str, Any]], heading: str = "INCIDENT DETAILS") -> str:
+    """Render the incident-specific values of a prompt suffix as one compact block.
+
+    Args:
+        fields: (label, value) pairs; values may be workflow references such as ``${incident_id}``
+        heading: Block heading
+
+    Returns:
+        Markdown block with one bullet per field
+    """
+    lines = [f"**{heading}:**"]
+    lines.extend(f"• **{label}:** {value}" for label, value in fields)
+    return "\n".join(lines)
+
+
+def prompt_report(layouts: List[PromptLayout]) -> List[Dict[str, Any]]:
+    """Measure input size and cache-hit potential of prompts.
+
+    The cacheable part of a prompt ends at its first incident-specific value,
+    which for a well-formed layout is the end of the prefix.
+
+    Args:
+        layouts: Prompts to measure
+
+    Returns:
+        One entry per prompt with estimated prefix, suffix, total and cacheable
+        tokens, whether the prefix is long enough to be cached, and a prefix
+        fingerprint that must stay stable across incidents for cache hits
+    """
+    report = []
+    for layout in layouts:
+        text = layout.render()
+        found = VARIABLE.search(layout.prefix)
+        cacheable = layout.prefix[: found.start()] if found else layout.prefix
+        cacheable_tokens = estimate_tokens(cacheable)
+        total_tokens = estimate_tokens(text)
+        report.append(
+            {
+                "prompt": layout.name,
+                "prefix_tokens": estimate_tokens(layout.prefix),
+                "suffix_tokens": estimate_tokens(layout.suffix),
+                "total_tokens": total_tokens,
+                "cacheable_tokens": cacheable_tokens,
+                "cacheable_percent": round(100 * cacheable_tokens / max(1, total_tokens)),
+                "cache_eligible": cacheable_tokens >= MIN_CACHEABLE_TOKENS,
+                "prefix_sha256": hashlib.sha256(layout.prefix.encode("utf-8")).hexdigest()[:12],
+            }
+        )
+    return report
+
+
+def format_prompt_report(report: List[Dict[str, Any]]) -> str:
+    """Render a prompt report as a table."""
+    lines = [
+        f"{'PROMPT':<32} {'PREFIX':>7} {'SUFFIX':>7} {'TOTAL':>7} {'CACHEABLE':>10}  {'ELIGIBLE':<8} PREFIX SHA"
+    ]
+    for row in report:
+        lines.append(
+            f"{row['prompt']:<32} {row['prefix_tokens']:>7} {row['suffix_tokens']:>7} "
+            f"{row['total_tokens']:>7} {row['cacheable_tokens']:>6} {row['cacheable_percent']:>2}%  "
+            f"{'yes' if row['cache_eligible'] else 'no':<8} {row['prefix_sha256']}"
+        )
+    lines.append(
+        f"Token counts are estimates at ~{BYTES_PER_TOKEN} bytes per token; "
+        f"prefixes below {MIN_CACHEABLE_TOKENS} tokens are not cached by providers"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,439 @@
+"""
+Shared shell step library for incident response workflows.
+
+Common shell functions are defined once here and linked into each command
+step: a step carries only the functions it calls, so steps do not depend on
+any file left on the runner by another step, and unused Slack code is not
+shipped in every step payload.
+"""
+
+import json
+import re
+from typing import Any, Dict, List
+
+# Functions avoid ${...} so the workflow engine never substitutes inside them
+DEFAULT_FUNCTIONS = {
+    "step_preamble": """
+# Usage: step_preamble <step-name> <affected-services>
+step_preamble() {
+  echo "🔍 DEBUG: $1 step starting"
+  echo "affected_services value: '$2'"
+}
+""",
+    "slack_post": """
+# Usage: slack_post <token> <payload-file> [api-method]
+# Response headers are kept in <payload-file>.headers (e.g. for Retry-After).
+slack_post() {
+  method="$3"
+  [ -z "$method" ] && method="chat.postMessage"
+  response=$(curl -s --max-time 30 -X POST "https://slack.com/api/$method" \\
+    -D "$2.headers" \\
+    -H "Authorization: Bearer $1" \\
+    -H "Content-Type: application/json; charset=utf-8" \\
+    -d @"$2")
+  if [ $? -ne 0 ]; then
+    echo "❌ Failed to reach Slack ($method)" >&2
+    return 1
+  fi
+  echo "$response"
+  case "$response" in
+    *'"ok":true'*) echo "✅ Slack $method succeeded" >&2 ;;
+    *) echo "⚠️ Slack $method returned an error" >&2; return 1 ;;
+  esac
+}
+""",
+    "slack_fanout": """
+# Usage: slack_fanout <token> <payload-file> <channels> [api-method]
+# Sends a payload rendered for channel @@FANOUT_CHANNEL@@ to every channel of a
+# comma-separated list concurrently. Sends are paced per channel, and a
+# rate-limited send is retried after the Retry-After Slack asked for (given up
+# once a channel would wait more than 30 seconds in total). Prints the first channel's response and writes
+# an aggregated delivery report to <payload-file>.report.json. Fails when the
+# first channel was not delivered.
+slack_fanout() {
+  dir="$2.fanout"
+  rm -rf "$dir" && mkdir -p "$dir"
+  count=0
+  for channel in $(printf '%s' "$3" | tr ',' ' '); do
+    count=$((count + 1))
+    (
+      sed "s|@@FANOUT_CHANNEL@@|$channel|" "$2" > "$dir/$count.json"
+      start=$(date +%s%N)
+      attempt=0
+      waited=0
+      while :; do
+        slack_pace "$channel"
+        response=$(slack_post "$1" "$dir/$count.json" "$4" 2> /dev/null)
+        case "$response" in
+          *'"error":"ratelimited"'*) attempt=$((attempt + 1)) ;;
+          *) break ;;
+        esac
+        [ "$attempt" -ge 3 ] && break
+        retry=$(tr -d '\r' < "$dir/$count.json.headers" 2> /dev/null \\
+          | awk -F': *' 'tolower($1) == "retry-after" { value = $2 } END { print value }')
+        case "$retry" in ''|*[!0-9]*) retry=$attempt ;; esac
+        waited=$((waited + retry))
+        [ "$waited" -gt 30 ] && break
+        slack_pace "$channel" "$retry"
+      done
+      printf '%s\\n' "$response" > "$dir/$count.response"
+      case "$response" in *'"ok":true'*) ok=true ;; *) ok=false ;; esac
+      latency=$(( ($(date +%s%N) - start) / 1000000 ))
+      printf '{"channel": "%s", "ok": %s, "latency_ms": %s}' "$channel" "$ok" "$latency" > "$dir/$count.result"
+    ) &
+  done
+  wait
+
+  delivered=$(grep -l '"ok": true' "$dir"/*.result 2> /dev/null | wc -l)
+  results=$(for f in "$dir"/*.result; do cat "$f"; printf ','; done | sed 's/,$//')
+  printf '{"delivered": %s, "failed": %s, "channels": [%s]}\\n' \\
+    "$delivered" "$((count - delivered))" "$results" > "$2.report.json"
+  echo "📣 Delivered to $delivered of $count channels" >&2
+  cat "$2.report.json" >&2
+
+  cat "$dir/1.response"
+  grep -q '"ok":true' "$dir/1.response"
+}
+""",
+    "slack_pace": """
+# Usage: slack_pace <channel> [retry-after-seconds]
+# Waits for the channel's next chat.postMessage slot: one per second per
+# channel across every step and execution on the runner. With a Retry-After,
+# blocks the channel that long.
+slack_pace() {
+  mkdir -p /tmp/incident-slack-pace
+  stamp="/tmp/incident-slack-pace/$(printf '%s' "$1" | tr -c 'A-Za-z0-9_-' '_')"
+  wait_ms=$(
+    {
+      command -v flock > /dev/null && flock 9
+      now=$(( $(date +%s%N) / 1000000 ))
+      next=$(cat "$stamp" 2> /dev/null)
+      case "$next" in ''|*[!0-9]*) next=0 ;; esac
+      if [ -n "$2" ]; then
+        until=$((now + $2 * 1000))
+        [ "$until" -gt "$next" ] && echo "$until" > "$stamp"
+        echo 0
+      else
+        [ "$next" -lt "$now" ] && next=$now
+        echo $((next + 1000)) > "$stamp"
+        echo $((next - now))
+      fi
+    } 9> "$stamp.lock"
+  )
+  [ "$wait_ms" -gt 0 ] && sleep "$(awk -v ms="$wait_ms" 'BEGIN { printf "%.3f", ms / 1000 }')"
+  return 0
+}
+""",
+    "clip_text": """
+# Usage: clip_text <max-bytes> < text   (prints the text on one line, cut to at
+# most max-bytes bytes without splitting a UTF-8 character)
+clip_text() {
+  tr '\\n' ' ' | head -c "$1" | { iconv -c -f UTF-8 -t UTF-8 2> /dev/null || cat; }
+}
+""",
+    "json_escape": r"""
+# Usage: json_escape < text   (prints the text as an unquoted JSON string body)
+json_escape() {
+  sed -e 's/\\/\\\\/g' -e 's/"/\\"/g' -e 's/\t/\\t/g' -e 's/\r//g' \
+    | awk 'NR > 1 { printf "%s", "\\n" } { printf "%s", $0 }'
+}
+""",
+    "json_value": """
+# Usage: json_value [default] < value   (prints the JSON-escaped value, or the default when empty)
+json_value() {
+  value=$(cat)
+  [ -z "$value" ] && value="$1"
+  printf '%s' "$value" | json_escape
+}
+""",
+    "slack_upload": r"""
+# Usage: slack_upload <token> <channel-id> <thread-ts> <file> <title>
+slack_upload() {
+  size=$(wc -c < "$4")
+  ticket=$(curl -s -X POST https://slack.com/api/files.getUploadURLExternal \
+    -H "Authorization: Bearer $1" \
+    --data-urlencode "filename=$(basename "$4")" --data "length=$size")
+  upload_url=$(printf '%s' "$ticket" | sed -n 's/.*"upload_url":"\([^"]*\)".*/\1/p' | sed 's/\\\//\//g')
+  file_id=$(printf '%s' "$ticket" | sed -n 's/.*"file_id":"\([^"]*\)".*/\1/p')
+  if [ -z "$upload_url" ] || [ -z "$file_id" ]; then
+    echo "⚠️ Slack did not issue an upload URL for $4" >&2
+    return 1
+  fi
+  curl -s -X POST -H "Content-Type: application/octet-stream" \
+    --data-binary @"$4" "$upload_url" > /dev/null || return 1
+  title=$(printf '%s' "$5" | json_escape)
+  files=$(printf '[{"id": "%s", "title": "%s"}]' "$file_id" "$title")
+  # An empty thread_ts is rejected; without a thread the file goes to the channel
+  if [ -n "$3" ]; then
+    response=$(curl -s -X POST https://slack.com/api/files.completeUploadExternal \
+      -H "Authorization: Bearer $1" \
+      --data-urlencode "files=$files" --data "channel_id=$2" --data "thread_ts=$3")
+  else
+    response=$(curl -s -X POST https://slack.com/api/files.completeUploadExternal \
+      -H "Authorization: Bearer $1" \
+      --data-urlencode "files=$files" --data "channel_id=$2")
+  fi
+  case "$response" in
+    *'"ok":true'*) echo "📎 Uploaded $4 ($size bytes) to the incident thread" >&2 ;;
+    *) echo "⚠️ Slack upload of $4 failed" >&2; return 1 ;;
+  esac
+}
+""",
+    "slack_fit": """
+# Usage: slack_fit <token> <channel-id> <thread-ts> <file> <title> <max-bytes>
+# Prints the file content when it fits in one block. Otherwise uploads the full
+# file to the thread and prints whole-line excerpt plus a pointer to the upload.
+slack_fit() {
+  size=$(wc -c < "$4")
+  if [ "$size" -le "$6" ]; then
+    cat "$4"
+    return 0
+  fi
+  awk -v max=$(( $6 / 4 )) '{ n += length($0) + 1; if (n > max) exit; print }' "$4"
+  if slack_upload "$1" "$2" "$3" "$4" "$5"; then
+    printf '_… %s bytes, full output attached as %s_\\n' "$size" "$(basename "$4")"
+  else
+    printf '_… %s bytes, full output in the workflow execution logs_\\n' "$size"
+  fi
+}
+""",
+    "digest_add": """
+# Usage: digest_add <digest-dir> <entry-line> <owner>   (prints the number of pending entries)
+# The first entry of a window opens it and makes <owner> the one execution
+# whose digest_wait flushes it.
+digest_add() {
+  mkdir -p "$1"
+  {
+    command -v flock > /dev/null && flock 9
+    if [ ! -f "$1/opened" ]; then
+      date +%s > "$1/opened"
+      printf '%s\\n' "$3" > "$1/owner"
+    fi
+    printf '%s\\n' "$2" >> "$1/pending"
+    wc -l < "$1/pending" | tr -d ' '
+  } 9> "$1/lock"
+}
+""",
+    "digest_flush": """
+# Usage: digest_flush <token> <digest-dir> <channel>
+# Claims every pending entry, closes the window and posts the entries as one
+# digest message. The message ts of each delivered entry is kept in
+# <digest-dir>/delivered. Entries are put back when the post fails, so the next
+# flush retries them.
+digest_flush() {
+  batch="$2/batch.$$"
+  {
+    command -v flock > /dev/null && flock 9
+    rm -f "$2/opened" "$2/owner"
+    mv "$2/pending" "$batch" 2> /dev/null
+  } 9> "$2/lock"
+  [ -f "$batch" ] || return 0
+  count=$(wc -l < "$batch" | tr -d ' ')
+  noun=incidents
+  [ "$count" -eq 1 ] && noun=incident
+  text=$( { printf '*📬 Incident digest* (%s %s)\\n' "$count" "$noun"; cat "$batch"; } | json_escape)
+  channel=$(printf '%s' "$3" | json_escape)
+  printf '{"channel": "%s", "text": "%s"}\\n' "$channel" "$text" > "$batch.json"
+  if response=$(slack_post "$1" "$batch.json"); then
+    ts=$(printf '%s' "$response" | sed -n 's/.*"ts": *"\\([^"]*\\)".*/\\1/p')
+    {
+      command -v flock > /dev/null && flock 9
+      awk -v ts="$ts" '{ print ts "\\t" $0 }' "$batch" >> "$2/delivered"
+      tail -n 1000 "$2/delivered" > "$2/delivered.$$" && mv -f "$2/delivered.$$" "$2/delivered"
+    } 9> "$2/lock"
+    echo "📬 Digest of $count incidents posted to $3" >&2
+    rm -f "$batch" "$batch.json"
+    return 0
+  fi
+  {
+    command -v flock > /dev/null && flock 9
+    cat "$batch" >> "$2/pending"
+  } 9> "$2/lock"
+  rm -f "$batch" "$batch.json"
+  return 1
+}
+""",
+    "digest_wait": """
+# Usage: digest_wait <token> <digest-dir> <channel> <window-seconds> <owner>
+# Flushes the digest once its window has passed, when <owner> opened the window.
+# Other executions return at once: the owner's flush delivers their entries.
+digest_wait() {
+  if [ "$(cat "$2/owner" 2> /dev/null)" != "$5" ]; then
+    echo "📬 The digest window is flushed by the execution that opened it" >&2
+    return 0
+  fi
+  while [ "$(cat "$2/owner" 2> /dev/null)" = "$5" ]; do
+    remaining=$(( $(cat "$2/opened" 2> /dev/null || date +%s) + $4 - $(date +%s) ))
+    if [ "$remaining" -le 0 ]; then
+      digest_flush "$1" "$2" "$3" || return 1
+    else
+      sleep "$remaining"
+    fi
+  done
+  echo "📬 Digest window closed" >&2
+}
+""",
+    "digest_thread": """
+# Usage: digest_thread <token> <digest-dir> <channel> <entry-marker>
+# Prints the ts of the digest message that carried the entry containing the
+# marker, sending the pending digest first when the entry has not gone out yet.
+digest_thread() {
+  if grep -qF -- "$4" "$2/pending" 2> /dev/null; then
+    digest_flush "$1" "$2" "$3" > /dev/null || return 1
+  fi
+  grep -F -- "$4" "$2/delivered" 2> /dev/null | tail -n 1 | cut -f 1
+}
+""",
+    "lifecycle_open": """
+# Usage: lifecycle_open <incident-id>   (call right after the root message is posted)
+lifecycle_open() {
+  dir="/tmp/incident-lifecycle/$1"
+  rm -rf "$dir" && mkdir -p "$dir"
+  : > "$dir/stages"
+  date +%s > "$dir/updated"
+}
+""",
+    "lifecycle_stage": """
+# Usage: lifecycle_stage <token> <channel-id> <root-ts> <incident-id> <header> <stage> <fold-window> [force]
+# Updates the root message text in place with every stage so far. A stage that
+# lands within the fold window of the last update is held for the next one.
+lifecycle_stage() {
+  if [ -z "$3" ]; then
+    echo "⚠️ No lifecycle message for incident $4, skipping stage update" >&2
+    return 0
+  fi
+  dir="/tmp/incident-lifecycle/$4"
+  mkdir -p "$dir"
+  printf '%s\\n' "$6" >> "$dir/stages"
+  now=$(date +%s)
+  last=$(cat "$dir/updated" 2>/dev/null || echo 0)
+  if [ "$8" != "force" ] && [ $((now - last)) -lt "$7" ]; then
+    echo "🧩 Stage folded into the next lifecycle update" >&2
+    return 0
+  fi
+  text=$(printf '%s\\n' "$5" | cat - "$dir/stages" | json_escape)
+  # Without blocks/attachments, chat.update keeps the root message body
+  printf '{"channel": "%s", "ts": "%s", "text": "%s"}\\n' "$2" "$3" "$text" > "$dir/update.json"
+  slack_post "$1" "$dir/update.json" chat.update > /dev/null || return 1
+  echo "$now" > "$dir/updated"
+}
+""",
+}
+
+
+class StepLibrary:
+    """Registry of shell functions shared by all command steps of a workflow."""
+
+    def __init__(self):
+        """Initialize an empty step library."""
+        self.functions: Dict[str, str] = {}
+
+    @classmethod
+    def default(cls) -> "StepLibrary":
+        """Create a library with the standard preamble and Slack functions."""
+        library = cls()
+        for name, body in DEFAULT_FUNCTIONS.items():
+            library.register(name, body)
+        return library
+
+    def register(self, name: str, body: str) -> "StepLibrary":
+        """Register a shell function.
+
+        Args:
+            name: Function name, used for reporting
+            body: Shell source defining the function
+
+        Returns:
+            The library, for chaining
+        """
+        if "${" in body:
+            raise ValueError(f"Step library function {name} must not use ${{...}} expansions")
+        self.functions[name] = body.strip("\n")
+        return self
+
+    def used_functions(self, command: str) -> List[str]:
+        """Get the library functions a command calls, including those they call in turn.
+
+        Args:
+            command: Shell source of a step
+
+        Returns:
+            Function names in sorted order
+        """
+        used = set()
+        pending = [command]
+        while pending:
+            source = pending.pop()
+            for name, body in self.functions.items():
+                if name not in used and re.search(rf"(?<![\w-]){name}(?![\w-])", source):
+                    used.add(name)
+                    pending.append(body)
+        return sorted(used)
+
+    def link(self, command: str) -> str:
+        """Prepend the definitions of the library functions a step command calls.
+
+        Comment lines of the functions are left out of the step payload.
+
+        Args:
+            command: Shell source of a step
+
+        Returns:
+            The command, unchanged when it calls no library function
+        """
+        used = self.used_functions(command)
+        if not used:
+            return command
+        source = "\n".join(
+            line
+            for name in used
+            for line in self.functions[name].splitlines()
+            if not line.lstrip().startswith("#")
+        )
+        return source + "\n" + command
+
+    @staticmethod
+    def header(step_name: str) -> str:
+        """Get the line that runs the standard preamble.
+
+        Args:
+            step_name: Name of the step, echoed in the preamble
+
+        Returns:
+            Shell lines to place at the top of a step command
+        """
+        return f"""step_preamble "{step_name}" "${{affected_services}}"
+"""
+
+
+def payload_report(workflow_dict: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Measure the serialized size of every step in a workflow.
+
+    Args:
+        workflow_dict: Workflow as produced by ``Workflow.to_dict()``
+
+    Returns:
+        One entry per step with command, agent message and total serialized bytes,
+        followed by a ``TOTAL`` entry for the whole workflow payload
+    """
+    report = []
+    for step in workflow_dict.get("steps", []):
+        message = step.get("executor", {}).get("config", {}).get("message", "")
+        report.append(
+            {
+                "step": step["name"],
+                "command_bytes": len(step.get("command", "").encode("utf-8")),
+                "message_bytes": len(message.encode("utf-8")),
+                "total_bytes": len(json.dumps(step).encode("utf-8")),
+            }
+        )
+
+    report.append(
+        {
+            "step": "TOTAL",
+            "command_bytes": sum(r["command_bytes"] for r in report),
+            "message_bytes": sum(r["message_bytes"] for r in report),
+            "total_bytes": len(json.dumps(workflow_dict).encode("utf-8")),
+        }
+    )
+    return report